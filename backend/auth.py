@@ -0,0 +1,271 @@
+"""Bearer token authentication.
+
+``MockAuthenticator`` accepts the development ``mock-token``.
+``TokenAuthenticator`` verifies Microsoft Entra ID access tokens without a
+network call on the request path: signing keys come from ``JWKSCache``,
+which refreshes in the background and re-fetches at most once per
+``min_refresh`` seconds when a token names an unknown ``kid`` (key
+rotation).  Verified claims are memoized by token hash in a bounded LRU
+until the token's ``exp``, so a client reusing its token pays for the
+signature check once.
+
+``create_authenticator`` picks one from AUTH_MODE (mock or entra).
+python-jose is imported on first use, so mock mode never loads it.
+
+EventSource cannot send an Authorization header, and a bearer token in a
+URL ends up in proxy logs and browser history.  ``StreamTickets`` issues
+short-lived tickets for the change stream instead: HMAC-signed, so any
+worker sharing STREAM_TICKET_SECRET can check one without a lookup.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+import urllib.request
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+# Returns a JWK Set document ({"keys": [...]})
+JWKSFetcher = Callable[[], Awaitable[Dict[str, Any]]]
+
+MOCK_TOKEN = "mock-token"
+MOCK_USER = {"sub": "mock-user", "email": "user@company.com", "name": "Mock User"}
+
+
+def url_fetcher(url: str, timeout: float = 10.0) -> JWKSFetcher:
+    """Fetch a JWK Set over HTTP without blocking the event loop"""
+
+    def fetch() -> Dict[str, Any]:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+
+    async def fetcher() -> Dict[str, Any]:
+        return await asyncio.get_running_loop().run_in_executor(None, fetch)
+
+    return fetcher
+
+
+def static_fetcher(jwks: Dict[str, Any]) -> JWKSFetcher:
+    """Serve a fixed local key set (tests, benchmarks, air-gapped deployments)"""
+
+    async def fetcher() -> Dict[str, Any]:
+        return jwks
+
+    return fetcher
+
+
+class JWKSCache:
+    """Signing keys by ``kid``, constructed once and refreshed in the background"""
+
+    def __init__(self, fetcher: JWKSFetcher, refresh_interval: float = 3600.0, min_refresh: float = 30.0,
+                 default_algorithm: str = "RS256"):
+        self.fetcher = fetcher
+        self.refresh_interval = refresh_interval
+        self.min_refresh = min_refresh
+        self.default_algorithm = default_algorithm
+        self.refreshes = 0
+        self._keys: Dict[str, Any] = {}
+        self._attempted_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> None:
+        from jose import JWTError, jwk
+
+        self._attempted_at = time.monotonic()
+        jwks = await self.fetcher()
+        keys = {}
+        for data in jwks.get("keys", []):
+            if data.get("use", "sig") != "sig" or "kid" not in data:
+                continue
+            try:
+                keys[data["kid"]] = jwk.construct(data, data.get("alg", self.default_algorithm))
+            except JWTError as exc:
+                logger.warning("Skipping JWK %s: %s", data["kid"], exc)
+        self._keys = keys
+        self.refreshes += 1
+
+    async def get_key(self, kid: str):
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            if kid not in self._keys and time.monotonic() - self._attempted_at >= self.min_refresh:
+                try:
+                    await self.refresh()
+                except Exception:
+                    logger.exception("JWKS fetch for unknown kid %r failed", kid)
+        return self._keys.get(kid)
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                async with self._lock:
+                    await self.refresh()
+            except Exception:
+                logger.exception("JWKS refresh failed; keeping %d cached keys", len(self._keys))
+
+    async def start(self) -> None:
+        try:
+            async with self._lock:
+                await self.refresh()
+        except Exception:
+            logger.exception("Initial JWKS fetch failed; retrying on demand")
+        self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+class Authenticator:
+    """Resolves a bearer token to the current user, or None if it is not valid"""
+
+    async def authenticate(self, token: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": type(self).__name__}
+
+
+class MockAuthenticator(Authenticator):
+    async def authenticate(self, token):
+        return MOCK_USER if token == MOCK_TOKEN else None
+
+
+class TokenAuthenticator(Authenticator):
+    """Verifies signed JWTs against a JWKSCache, memoizing results until ``exp``"""
+
+    def __init__(self, keys: JWKSCache, audience: str, issuer: str, algorithms: Optional[List[str]] = None,
+                 max_entries: int = 10000, leeway: int = 60):
+        self.keys = keys
+        self.audience = audience
+        self.issuer = issuer
+        self.algorithms = algorithms or ["RS256"]
+        self.leeway = leeway
+        self.tokens = MemoryCache(max_entries=max_entries, default_ttl=0)
+        self.rejected = 0
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Full signature and claims check; raises JWTError"""
+        from jose import JWTError, jwt
+
+        header = jwt.get_unverified_header(token)
+        key = await self.keys.get_key(header.get("kid", ""))
+        if key is None:
+            raise JWTError(f"Unknown signing key {header.get('kid')!r}")
+        return jwt.decode(
+            token, key, algorithms=self.algorithms, audience=self.audience, issuer=self.issuer,
+            options={"leeway": self.leeway},
+        )
+
+    async def authenticate(self, token):
+        from jose import JWTError
+
+        digest = hashlib.sha256(token.encode()).hexdigest()
+        user = await self.tokens.get(digest)
+        if user is not None:
+            return user
+        try:
+            claims = await self.verify(token)
+        except JWTError:
+            self.rejected += 1
+            return None
+        user = {
+            "sub": claims.get("oid") or claims.get("sub"),
+            "email": claims.get("preferred_username") or claims.get("email") or claims.get("upn"),
+            "name": claims.get("name"),
+        }
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl > 0:
+            await self.tokens.set(digest, user, ttl=ttl)
+        return user
+
+    async def start(self):
+        await self.keys.start()
+
+    async def stop(self):
+        await self.keys.stop()
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(tokens=self.tokens.stats(), rejected=self.rejected, jwks_refreshes=self.keys.refreshes)
+        return stats
+
+
+def create_authenticator() -> Authenticator:
+    """Build the authenticator configured by AUTH_MODE (mock or entra)"""
+    mode = os.getenv("AUTH_MODE", "mock").lower()
+    if mode == "mock":
+        return MockAuthenticator()
+    if mode == "entra":
+        tenant = os.environ["AZURE_TENANT_ID"]
+        jwks_url = os.getenv("JWKS_URL", f"https://login.microsoftonline.com/{tenant}/discovery/v2.0/keys")
+        keys = JWKSCache(url_fetcher(jwks_url), refresh_interval=float(os.getenv("JWKS_REFRESH_SECONDS", "3600")))
+        return TokenAuthenticator(
+            keys,
+            audience=os.getenv("AUTH_AUDIENCE", os.environ["AZURE_CLIENT_ID"]),
+            issuer=os.getenv("AUTH_ISSUER", f"https://login.microsoftonline.com/{tenant}/v2.0"),
+            max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000")),
+        )
+    raise ValueError(f"Unknown AUTH_MODE {mode!r}; expected mock or entra")
+
+
+class StreamTickets:
+    """Signed, short-lived stand-ins for a bearer token, valid only for GET /api/clients/stream"""
+
+    SCOPE = "stream"
+
+    def __init__(self, secret: bytes, ttl: float = 60.0):
+        self.secret = secret
+        self.ttl = ttl
+        self.rejected = 0
+
+    def _sign(self, payload: bytes) -> str:
+        digest = hmac.new(self.secret, payload, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def issue(self, user: Dict[str, Any]) -> str:
+        claims = {"scope": self.SCOPE, "exp": time.time() + self.ttl,
+                  "user": {key: user.get(key) for key in ("sub", "email", "name")}}
+        payload = base64.urlsafe_b64encode(json.dumps(claims, separators=(",", ":")).encode()).rstrip(b"=")
+        return f"{payload.decode()}.{self._sign(payload)}"
+
+    def redeem(self, ticket: str) -> Optional[Dict[str, Any]]:
+        """The user a ticket was issued to, or None if it is forged, expired or for another scope"""
+        payload, _, signature = ticket.encode().partition(b".")
+        if not hmac.compare_digest(self._sign(payload).encode(), signature):
+            self.rejected += 1
+            return None
+        try:
+            claims = json.loads(base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)))
+        except ValueError:
+            self.rejected += 1
+            return None
+        if claims.get("scope") != self.SCOPE or claims.get("exp", 0) <= time.time():
+            self.rejected += 1
+            return None
+        return claims["user"]
+
+
+def create_stream_tickets() -> StreamTickets:
+    """Tickets signed with STREAM_TICKET_SECRET (random per process if unset), valid STREAM_TICKET_TTL_SECONDS"""
+    secret = os.getenv("STREAM_TICKET_SECRET", "").encode() or secrets.token_bytes(32)
+    return StreamTickets(secret, ttl=float(os.getenv("STREAM_TICKET_TTL_SECONDS", "60")))
@@ -0,0 +1,163 @@
+"""Streaming parsers and encoders for bulk client import and export.
+
+Request bodies are consumed incrementally: bytes are decoded into lines as
+they arrive and parsed into records one at a time, so an import of any
+size only ever holds the current chunk in memory.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Content types accepted by the import endpoint
+NDJSON_CONTENT_TYPES = {NDJSON_MEDIA_TYPE, "application/jsonl", "application/json-lines", "application/ndjson"}
+CSV_CONTENT_TYPES = {CSV_MEDIA_TYPE, "application/csv"}
+
+# Columns written by CSV export; the same dotted names are understood on import
+CSV_EXPORT_COLUMNS = [
+    "id",
+    "type",
+    "data.first_name",
+    "data.last_name",
+    "data.company_name",
+    "data.contact_person",
+    "data.email",
+    "data.phone",
+    "data.address",
+    "data.date_of_birth",
+    "data.company",
+    "data.position",
+    "data.website",
+    "data.industry",
+    "data.size",
+    "ownership.primary_owner",
+    "ownership.secondary_owners",
+    "ownership.department",
+    "ownership.account_manager",
+    "ownership.relationship_type",
+    "created_at",
+    "updated_at",
+]
+
+# CSV columns holding lists, joined with LIST_SEPARATOR
+LIST_COLUMNS = {"ownership.secondary_owners"}
+LIST_SEPARATOR = ";"
+
+# Record = (1-based row number, parsed record or None, error message or None)
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into text lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    row = 0
+    async for line in lines:
+        row += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield row, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "Each line must be a JSON object"
+            continue
+        yield row, record, None
+
+
+def unflatten_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Turn dotted CSV columns ("data.email") into the nested client shape."""
+    record: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column is None or value is None or value == "":
+            continue
+        if column in LIST_COLUMNS:
+            value = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+        target = record
+        *parents, leaf = column.strip().split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+    return record
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """Parse CSV rows, joining physical lines while a quoted field is still open."""
+    header: Optional[List[str]] = None
+    row = 0
+    buffered = ""
+    async for line in lines:
+        buffered = f"{buffered}\n{line}" if buffered else line
+        # Doubled quotes escape, so an odd count means a quoted newline
+        if buffered.count('"') % 2:
+            continue
+        text, buffered = buffered, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = values
+            continue
+        row += 1
+        if len(values) > len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, unflatten_row(dict(zip(header, values))), None
+    if buffered:
+        row += 1
+        yield row, None, "Unterminated quoted field"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def ndjson_line(doc: Dict[str, Any]) -> str:
+    return json.dumps(doc, default=_json_default, separators=(",", ":")) + "\n"
+
+
+def _csv_value(doc: Dict[str, Any], column: str) -> str:
+    value: Any = doc
+    for part in column.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    if value is None:
+        return ""
+    if column in LIST_COLUMNS:
+        return LIST_SEPARATOR.join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_line(values: List[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+
+def csv_header() -> str:
+    return csv_line(CSV_EXPORT_COLUMNS)
+
+
+def csv_row(doc: Dict[str, Any]) -> str:
+    return csv_line([_csv_value(doc, column) for column in CSV_EXPORT_COLUMNS])
@@ -0,0 +1,217 @@
+"""Read-through cache backends for client reads.
+
+``MemoryCache`` is an in-process LRU with per-entry TTLs; ``RedisCache``
+shares entries between workers through any client exposing the
+``redis.asyncio`` get/set/delete/incr/expire subset, so tests can pass a local
+stand-in instead of a server.  ``create_cache`` picks one from the
+environment.
+
+Values must be JSON-compatible (datetimes allowed); ``None`` is never
+cached and always reads as a miss.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+_DATE_MARKER = "$date"
+
+
+class Cache:
+    """Base class: hit/miss bookkeeping shared by every backend"""
+
+    def __init__(self, default_ttl: float):
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _record(self, value: Any) -> Any:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """Increment a counter used for key generations.
+
+        Counters are never evicted; with ``ttl`` one expires (back to 0)
+        that long after its last increment.
+        """
+        raise NotImplementedError
+
+    async def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class NullCache(Cache):
+    """Caching disabled: every lookup misses"""
+
+    def __init__(self):
+        super().__init__(default_ttl=0)
+
+    async def get(self, key):
+        return self._record(None)
+
+    async def set(self, key, value, ttl=None):
+        pass
+
+    async def delete(self, *keys):
+        self.invalidations += len(keys)
+
+    async def incr(self, key, ttl=None):
+        self.invalidations += 1
+        return 0
+
+    async def counter(self, key):
+        return 0
+
+
+class MemoryCache(Cache):
+    """Bounded in-process LRU with TTL expiry"""
+
+    def __init__(self, max_entries: int = 10000, default_ttl: float = 30.0):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # key -> (value, expires_at or None)
+        self._counters: Dict[str, tuple] = {}
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._record(None)
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return self._record(None)
+        self._entries.move_to_end(key)
+        return self._record(value)
+
+    async def set(self, key, value, ttl=None):
+        if value is None:
+            return
+        self._entries[key] = (time.monotonic() + (ttl or self.default_ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._entries.pop(key, None)
+        self.invalidations += len(keys)
+
+    async def incr(self, key, ttl=None):
+        now = time.monotonic()
+        value = await self.counter(key) + 1
+        self._counters[key] = (value, now + ttl if ttl else None)
+        if ttl and len(self._counters) > self.max_entries:
+            self._counters = {
+                name: counter for name, counter in self._counters.items() if counter[1] is None or counter[1] > now
+            }
+        self.invalidations += 1
+        return value
+
+    async def counter(self, key):
+        value, expires_at = self._counters.get(key, (0, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._counters[key]
+            return 0
+        return value
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(entries=len(self._entries), max_entries=self.max_entries, evictions=self.evictions)
+        return stats
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATE_MARKER: value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and _DATE_MARKER in obj:
+        return datetime.fromisoformat(obj[_DATE_MARKER])
+    return obj
+
+
+class RedisCache(Cache):
+    """Cache shared between workers through a Redis-compatible async client"""
+
+    def __init__(self, client, prefix: str = "client-cache:", default_ttl: float = 30.0):
+        super().__init__(default_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        return cls(redis.from_url(url), **kwargs)
+
+    async def get(self, key):
+        raw = await self.client.get(self.prefix + key)
+        return self._record(None if raw is None else json.loads(raw, object_hook=_decode))
+
+    async def set(self, key, value, ttl=None):
+        if value is None:
+            return
+        payload = json.dumps(value, default=_encode, separators=(",", ":"))
+        await self.client.set(self.prefix + key, payload, ex=max(1, int(ttl or self.default_ttl)))
+
+    async def delete(self, *keys):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+        self.invalidations += len(keys)
+
+    async def incr(self, key, ttl=None):
+        self.invalidations += 1
+        value = int(await self.client.incr(self.prefix + key))
+        if ttl:
+            await self.client.expire(self.prefix + key, max(1, int(ttl)))
+        return value
+
+    async def counter(self, key):
+        raw = await self.client.get(self.prefix + key)
+        return int(raw) if raw is not None else 0
+
+
+def create_cache() -> Cache:
+    """Build the cache configured by CACHE_BACKEND (memory, redis or none)"""
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+    if backend == "none":
+        return NullCache()
+    if backend == "redis":
+        return RedisCache.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), default_ttl=ttl)
+    if backend == "memory":
+        return MemoryCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")), default_ttl=ttl)
+    raise ValueError(f"Unknown CACHE_BACKEND {backend!r}; expected memory, redis or none")
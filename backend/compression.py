@@ -0,0 +1,272 @@
+"""Negotiated response compression (zstd, brotli, gzip).
+
+``CompressionMiddleware`` picks the first encoding in the server's
+preference order that the request's ``Accept-Encoding`` allows.  Whole
+responses below ``minimum_size`` go out as they are.  Streamed responses
+(exports, large list pages) are compressed chunk by chunk and flushed
+after each one, so the client receives rows as they are produced.
+Server-sent events are never compressed.
+
+Every response the middleware could have compressed carries
+``Vary: Accept-Encoding``, whether or not this one was.  A compressed
+response keeps a strong ETag with the coding appended (see
+``etag.encoded_etag``), and a 304 echoes that tag back when the
+request's If-None-Match named it.
+
+zstd needs the ``zstandard`` package and brotli the ``brotli`` package;
+encodings whose package is missing are skipped.
+"""
+import gzip
+import logging
+import os
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from etag import encoded_etag
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODINGS = ("zstd", "br", "gzip")
+DEFAULT_MINIMUM_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+    @staticmethod
+    def whole(data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=6)
+
+
+def _brotli():
+    import brotli
+
+    class _Brotli:
+        def __init__(self):
+            # Quality 4 keeps dynamic responses cheap to compress
+            self._compressor = brotli.Compressor(quality=4)
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.process(data) + self._compressor.flush()
+
+        def finish(self) -> bytes:
+            return self._compressor.finish()
+
+        @staticmethod
+        def whole(data: bytes) -> bytes:
+            return brotli.compress(data, quality=4)
+
+    return _Brotli
+
+
+def _zstd():
+    import zstandard
+
+    class _Zstd:
+        def __init__(self):
+            self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        def finish(self) -> bytes:
+            return self._compressor.flush()
+
+        @staticmethod
+        def whole(data: bytes) -> bytes:
+            return zstandard.ZstdCompressor(level=3).compress(data)
+
+    return _Zstd
+
+
+_FACTORIES: Dict[str, Callable] = {"gzip": lambda: _Gzip, "br": _brotli, "zstd": _zstd}
+
+
+def available_encodings(names: Sequence[str]) -> Dict[str, type]:
+    """Codec classes for ``names``, in order, leaving out those whose package is missing"""
+    codecs = {}
+    for name in names:
+        if name not in _FACTORIES:
+            raise ValueError(f"Unknown compression encoding {name!r}; expected zstd, br or gzip")
+        try:
+            codecs[name] = _FACTORIES[name]()
+        except ImportError:
+            logger.info("Compression encoding %s unavailable (package not installed)", name)
+    return codecs
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header: Optional[str], preferred: Sequence[str]) -> Optional[str]:
+    """The first of ``preferred`` the client accepts, or None for identity"""
+    if not header:
+        return None
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    for name in preferred:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    if b"no-transform" in (_header(headers, b"cache-control") or b""):
+        return False
+    content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+    if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _varied(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """``headers`` with Accept-Encoding added to Vary"""
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower() or vary.strip() == b"*":
+        return headers
+    return [(key, value + b", Accept-Encoding" if key.lower() == b"vary" else value) for key, value in headers]
+
+
+def _compressed_headers(headers: List[Tuple[bytes, bytes]], encoding: str,
+                        length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+    result = []
+    for key, value in headers:
+        name = key.lower()
+        if name == b"content-length":
+            continue
+        if name == b"etag":
+            # Each encoding is its own representation, with its own strong validator
+            value = encoded_etag(value.decode("latin-1"), encoding).encode("latin-1")
+        result.append((key, value))
+    result.append((b"content-encoding", encoding.encode()))
+    if length is not None:
+        result.append((b"content-length", str(length).encode()))
+    return _varied(result)
+
+
+def _not_modified_headers(headers: List[Tuple[bytes, bytes]], encoding: Optional[str],
+                          if_none_match: Optional[bytes]) -> List[Tuple[bytes, bytes]]:
+    """Headers for a 304: Vary, and the encoded ETag if that is the one the client holds"""
+    etag = _header(headers, b"etag")
+    if encoding and etag and if_none_match:
+        encoded = encoded_etag(etag.decode("latin-1"), encoding).encode("latin-1")
+        if encoded in if_none_match:
+            headers = [(key, encoded if key.lower() == b"etag" else value) for key, value in headers]
+    return _varied(headers)
+
+
+class CompressionMiddleware:
+    """Pure ASGI, so streamed bodies stay streamed"""
+
+    def __init__(self, app, encodings: Sequence[str] = DEFAULT_ENCODINGS, minimum_size: int = DEFAULT_MINIMUM_SIZE):
+        self.app = app
+        self.codecs = available_encodings(encodings)
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not self.codecs:
+            await self.app(scope, receive, send)
+            return
+        accept = _header(scope.get("headers", []), b"accept-encoding")
+        encoding = choose_encoding(accept.decode("latin-1") if accept else None, list(self.codecs))
+        if_none_match = _header(scope.get("headers", []), b"if-none-match")
+
+        codec_class = self.codecs.get(encoding)
+        start_message = None
+        codec = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, codec, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if message["status"] == 304:
+                    passthrough = True
+                    await send({**message, "headers": _not_modified_headers(headers, encoding, if_none_match)})
+                elif message["status"] < 200 or message["status"] == 204 or not _compressible(headers):
+                    passthrough = True
+                    await send(message)
+                elif encoding is None:
+                    passthrough = True
+                    await send({**message, "headers": _varied(headers)})
+                else:
+                    # Held back until the first body chunk shows whether this is a streamed response
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = list(start_message.get("headers", []))
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        await send({**start_message, "headers": _varied(headers)})
+                        await send(message)
+                    else:
+                        compressed = codec_class.whole(body)
+                        await send({**start_message, "headers": _compressed_headers(headers, encoding, len(compressed))})
+                        await send({"type": "http.response.body", "body": compressed})
+                    start_message = None
+                    passthrough = True
+                    return
+                codec = codec_class()
+                await send({**start_message, "headers": _compressed_headers(headers, encoding, None)})
+                start_message = None
+
+            data = codec.compress(body) if body else b""
+            if not more_body:
+                data += codec.finish()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def compression_settings() -> Dict[str, object]:
+    """Middleware options from COMPRESSION_ENCODINGS and COMPRESSION_MIN_SIZE"""
+    names = os.getenv("COMPRESSION_ENCODINGS", ",".join(DEFAULT_ENCODINGS))
+    return {
+        "encodings": [name.strip() for name in names.split(",") if name.strip()],
+        "minimum_size": int(os.getenv("COMPRESSION_MIN_SIZE", str(DEFAULT_MINIMUM_SIZE))),
+    }
@@ -0,0 +1,126 @@
+"""MongoDB client construction, configured from the environment.
+
+The app opens its client in the lifespan and closes it on shutdown, so
+importing ``server`` (tests, benchmarks, tooling) never connects; Motor
+itself is only imported then.
+
+    MONGO_URL                           connection string; its path names the database.
+                                        mongomock:// keeps every collection in process
+                                        (needs mongomock-motor; see repository.py)
+    MONGO_MAX_POOL_SIZE                 connections per worker process (default 100)
+    MONGO_MIN_POOL_SIZE                 connections kept open when idle (default 0)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS         fail a checkout after waiting this long (default: wait)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS   default 30000
+    MONGO_CONNECT_TIMEOUT_MS            default 20000
+    MONGO_SOCKET_TIMEOUT_MS             default: none
+    MONGO_COMPRESSORS                   e.g. "zstd,snappy,zlib"; zstd needs the zstandard
+                                        package and snappy python-snappy
+    MONGO_WRITE_CONCERN                 e.g. "majority" or "1" (default: the server's)
+    MONGO_LIST_READ_PREFERENCE          read preference for list, search and export
+                                        queries (default primary)
+    MONGO_MAX_STALENESS_SECONDS         bound on secondary lag for those reads
+
+A total pool across uvicorn workers is workers x MONGO_MAX_POOL_SIZE;
+the ``db_pool_*`` metrics show how long requests wait for a connection.
+"""
+import os
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+DEFAULT_MONGO_URL = "mongodb://localhost:27017/client_management"
+DEFAULT_DATABASE = "client_management"
+APP_NAME = "client-management-api"
+MOCK_SCHEME = "mongomock://"
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else None
+
+
+def client_options() -> Dict[str, Any]:
+    """Driver keyword arguments from the MONGO_* variables"""
+    options: Dict[str, Any] = {
+        "appname": APP_NAME,
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE") or 100,
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE") or 0,
+    }
+    timeouts = {
+        "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+        "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+        "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+        "socketTimeoutMS": "MONGO_SOCKET_TIMEOUT_MS",
+    }
+    for option, name in timeouts.items():
+        value = _int_env(name)
+        if value is not None:
+            options[option] = value
+    compressors = os.getenv("MONGO_COMPRESSORS", "").strip()
+    if compressors:
+        # The driver drops (with a warning) any whose package is missing
+        options["compressors"] = compressors
+    write_concern = os.getenv("MONGO_WRITE_CONCERN", "").strip()
+    if write_concern:
+        options["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+    return options
+
+
+def create_client(event_listeners: Iterable[Any] = ()) -> "AsyncIOMotorClient":
+    url = os.getenv("MONGO_URL", DEFAULT_MONGO_URL)
+    if url.startswith(MOCK_SCHEME):
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise RuntimeError("MONGO_URL=mongomock:// requires the 'mongomock-motor' package")
+        return AsyncMongoMockClient()
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(
+        url,
+        event_listeners=list(event_listeners),
+        **client_options(),
+    )
+
+
+def is_mock(client) -> bool:
+    """True for a mongomock-motor client: no replica set, change streams or admin commands"""
+    # mongomock-motor's classes subclass Motor's under the same names
+    return any(cls.__module__.startswith("mongomock") for cls in type(client).__mro__)
+
+
+def get_database(client):
+    """The database named in MONGO_URL, else client_management"""
+    if os.getenv("MONGO_URL", DEFAULT_MONGO_URL).startswith(MOCK_SCHEME):
+        # mongomock-motor only wraps databases reached by name
+        return client[DEFAULT_DATABASE]
+    return client.get_default_database(DEFAULT_DATABASE)
+
+
+def list_read_preference() -> Optional[Any]:
+    """Read preference for list/search/export queries, or None to use the client's"""
+    mode = os.getenv("MONGO_LIST_READ_PREFERENCE", "").strip()
+    if not mode:
+        return None
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGO_LIST_READ_PREFERENCE {mode!r}; expected one of {', '.join(READ_PREFERENCES)}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=_int_env("MONGO_MAX_STALENESS_SECONDS") or -1)
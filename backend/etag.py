@@ -0,0 +1,126 @@
+"""Strong ETags and conditional request handling for client resources.
+
+A client's ETag is ``"<version>.<updated_at in epoch ms>"``.  Both parts
+are stored on the document, so an ``If-Match`` header can be turned
+straight into an update filter and checked atomically by Mongo.
+Documents written before versioning existed report version 0.
+
+Background jobs (SharePoint, QuickBooks) count their writes in a separate
+``job_version``, appended as a third part once non-zero.  It changes the
+representation, so If-None-Match revalidates, but If-Match only compares
+the user-edit part: a job finishing doesn't fail someone's save with 412.
+
+A compressed response carries the same tag with the coding appended
+(``"3.1700000000000-gzip"``), so each representation keeps a strong
+validator.  Conditional headers strip that suffix again.  If-None-Match
+uses weak comparison; If-Match uses strong comparison and ignores
+``W/`` tags.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MS = timedelta(milliseconds=1)
+
+# Browsers must revalidate before reusing a cached copy
+CACHE_CONTROL = "private, no-cache"
+
+# Content codings the compression middleware can append to an ETag
+CONTENT_CODINGS = ("zstd", "br", "gzip")
+
+
+def _epoch_ms(value: datetime) -> int:
+    return (value.replace(tzinfo=None) - EPOCH) // ONE_MS
+
+
+def client_etag(doc: Dict[str, Any]) -> str:
+    tag = f'{doc.get("version", 0)}.{_epoch_ms(doc["updated_at"])}'
+    if doc.get("job_version"):
+        tag += f'.{doc["job_version"]}'
+    return f'"{tag}"'
+
+
+def _edit_part(etag: str) -> str:
+    """The version.updated_at part of a client ETag, which only user edits move"""
+    return '"' + ".".join(etag.strip('"').split(".")[:2]) + '"'
+
+
+def list_etag(docs: Iterable[Dict[str, Any]], next_cursor: Optional[str]) -> str:
+    digest = hashlib.sha1()
+    for doc in docs:
+        digest.update(f'{doc["id"]}:{doc.get("version", 0)}:{_epoch_ms(doc["updated_at"])};'.encode())
+        # Expanded rows carry job-owned sections, counted apart from the version
+        if doc.get("job_version"):
+            digest.update(f'{doc["job_version"]};'.encode())
+        # Worklist rows also carry last_activity_at, which moves without a version bump
+        if doc.get("last_activity_at"):
+            digest.update(f'{_epoch_ms(doc["last_activity_at"])};'.encode())
+    digest.update((next_cursor or "").encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The strong ETag of ``etag``'s representation compressed with ``encoding``"""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _decoded(etag: str) -> str:
+    for encoding in CONTENT_CODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def _candidates(header: str, weak: bool = True):
+    for value in header.split(","):
+        value = value.strip()
+        if value.startswith("W/"):
+            if not weak:
+                continue
+            value = value[2:]
+        if value:
+            yield value if value == "*" else _decoded(value)
+
+
+def none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """True when If-None-Match matches ``etag`` and a 304 should be sent"""
+    if not if_none_match:
+        return False
+    return any(value in ("*", etag) for value in _candidates(if_none_match))
+
+
+def if_match_allows(if_match: Optional[str], etag: str) -> bool:
+    """True when an If-Match header allows changing a resource whose ETag is ``etag``"""
+    if not if_match:
+        return True
+    current = _edit_part(etag)
+    return any(value == "*" or _edit_part(value) == current for value in _candidates(if_match, weak=False))
+
+
+def if_match_filter(if_match: str) -> Optional[Dict[str, Any]]:
+    """Mongo filter for an If-Match header.
+
+    Returns ``{}`` for ``*``, the version/updated_at conditions for a
+    client ETag (its job_version part is ignored), or None if no listed
+    ETag could ever match.
+    """
+    clauses = []
+    for value in _candidates(if_match, weak=False):
+        if value == "*":
+            return {}
+        try:
+            version, millis, *_ = value.strip('"').split(".")
+            version, updated_at = int(version), EPOCH + int(millis) * ONE_MS
+        except ValueError:
+            continue
+        clauses.append({
+            "version": version if version else {"$exists": False},
+            "updated_at": updated_at,
+        })
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
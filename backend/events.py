@@ -0,0 +1,355 @@
+"""Change feed for GET /api/clients/stream.
+
+Events fan out from one ``EventBus`` per process to every connected
+subscriber and to in-process listeners such as the suggestion index.  The bus is fed either by the write handlers themselves
+(``local``: a single process or no replica set) or by one shared Mongo
+change-stream watcher (``changestream``), which also sees writes made by
+other workers and other tools.
+
+The bus keeps the most recent events in a ring buffer, so a subscriber
+reconnecting with ``Last-Event-ID`` gets what it missed.  Local events get
+an id ``<epoch>:<sequence>`` that only the publishing process knows.
+Change-stream events are identified by the change's resume token, which
+every worker sees: a reconnect that lands on a worker whose buffer lacks
+the token resumes its own change stream after it to catch up.  When none
+of that works (id from another process or restart, older than the buffer
+or the oplog, or the subscriber fell too far behind) it receives a
+``reset`` event and should refetch.
+
+Event payloads:
+
+    insert / update   {"type", "client_id", "client_type", "owners", "client": <summary row>}
+    delete            {"type", "client_id", "client_type", "owners"}
+    note / tracking   {"type", "client_id", "client_type", "owners", "note" | "entry": <entry>}
+    reset             {"type": "reset"}
+"""
+import asyncio
+import itertools
+import logging
+import os
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo.errors import PyMongoError
+
+from bulk import ndjson_line
+from database import is_mock
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+RESET = {"type": "reset"}
+
+# Client fields an event needs for subscriber filters
+EVENT_PROJECTION = {"_id": 0, "id": 1, "type": 1, "ownership": 1}
+
+
+def client_event(event_type: str, doc: Dict[str, Any], **payload) -> Event:
+    """An event about a client, carrying what subscriber filters match on"""
+    ownership = doc.get("ownership") or {}
+    owners = [ownership.get("primary_owner"), *ownership.get("secondary_owners", [])]
+    return {
+        "type": event_type,
+        "client_id": doc.get("id"),
+        "client_type": doc.get("type"),
+        "owners": [owner for owner in owners if owner],
+        **payload,
+    }
+
+
+class Subscription:
+    """One connection's queue of (id, event), filtered by client type and owner"""
+
+    def __init__(self, bus: "EventBus", client_type: Optional[str], owner: Optional[str], max_queue: int):
+        self.bus = bus
+        self.client_type = client_type
+        self.owner = owner
+        self.queue: "asyncio.Queue[Tuple[str, Event]]" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+        # Ids already sent by a change-stream catch-up, which the live feed may repeat
+        self._sent: set = set()
+
+    def matches(self, event: Event) -> bool:
+        if event["type"] == "reset":
+            return True
+        if self.client_type and event.get("client_type") != self.client_type:
+            return False
+        if self.owner and self.owner not in event.get("owners", ()):
+            return False
+        return True
+
+    def offer(self, event_id: str, event: Event) -> None:
+        if self.overflowed or not self.matches(event):
+            return
+        try:
+            self.queue.put_nowait((event_id, event))
+        except asyncio.QueueFull:
+            # Too far behind to deliver everything; it gets a reset instead
+            self.overflowed = True
+
+    def skip(self, event_ids: Iterable[str]) -> None:
+        """Drop these ids if they are offered again"""
+        self._sent.update(event_ids)
+
+    async def next(self, timeout: float) -> Optional[Tuple[Optional[str], Event]]:
+        """The next event, a reset after an overflow, or None after ``timeout`` seconds idle"""
+        if self.overflowed:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = False
+            self._sent.clear()
+            return None, RESET
+        while True:
+            try:
+                event_id, event = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            if event_id not in self._sent:
+                return event_id, event
+            self._sent.discard(event_id)
+
+    def close(self) -> None:
+        self.bus.subscribers.discard(self)
+
+
+class EventBus:
+    """In-process fan-out with a replay buffer of recent events"""
+
+    def __init__(self, history: int = 1000, max_queue: int = 1000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.max_queue = max_queue
+        self.history: Deque[Tuple[int, str, Event]] = deque(maxlen=history)
+        self.subscribers = set()
+        self.listeners: List[Callable[[Event], None]] = []
+        self.published = 0
+
+    def listen(self, listener: Callable[[Event], None]) -> None:
+        """Call ``listener`` synchronously with every published event"""
+        self.listeners.append(listener)
+
+    def publish(self, event: Event, event_id: Optional[str] = None) -> None:
+        """Deliver ``event`` under ``event_id`` (a change's resume token), or under the next local id"""
+        self.sequence += 1
+        self.published += 1
+        event_id = event_id or f"{self.epoch}:{self.sequence}"
+        self.history.append((self.sequence, event_id, event))
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Change feed listener failed")
+        for subscriber in list(self.subscribers):
+            subscriber.offer(event_id, event)
+
+    def _replay(self, last_event_id: str) -> Optional[List[Tuple[Optional[str], Event]]]:
+        """The buffered events after ``last_event_id``, or None if this bus cannot tell what was missed"""
+        epoch, _, sequence = last_event_id.partition(":")
+        if epoch == self.epoch:
+            try:
+                last = int(sequence)
+            except ValueError:
+                return None
+            oldest = self.history[0][0] if self.history else self.sequence + 1
+            if last < oldest - 1 or last > self.sequence:
+                return None
+            return [(event_id, event) for seq, event_id, event in self.history if seq > last]
+        for position, (_, event_id, _) in enumerate(self.history):
+            if event_id == last_event_id:
+                return [(event_id, event) for _, event_id, event in itertools.islice(self.history, position + 1, None)]
+        return None
+
+    def subscribe(self, last_event_id: Optional[str] = None, client_type: Optional[str] = None,
+                  owner: Optional[str] = None) -> Tuple[Subscription, Optional[List[Tuple[Optional[str], Event]]]]:
+        """Register a subscriber and return it with the events it missed (None if unknown).
+
+        Synchronous, so nothing can be published between the replay
+        snapshot and registration.
+        """
+        subscription = Subscription(self, client_type, owner, self.max_queue)
+        missed = self._replay(last_event_id) if last_event_id else []
+        if missed is not None:
+            missed = [(event_id, event) for event_id, event in missed if subscription.matches(event)]
+        self.subscribers.add(subscription)
+        return subscription, missed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "sequence": self.sequence,
+            "published": self.published,
+            "buffered": len(self.history),
+            "subscribers": len(self.subscribers),
+        }
+
+
+class ChangeFeed:
+    """Feeds the bus from handlers (local) or from a shared change stream"""
+
+    WATCHED = ["clients", "client_notes", "client_tracking"]
+
+    def __init__(self, bus: EventBus, summary_fields: Sequence[str], mode: str = "auto"):
+        if mode not in ("auto", "changestream", "local"):
+            raise ValueError(f"Unknown CHANGE_FEED {mode!r}; expected auto, changestream or local")
+        self.bus = bus
+        self.summary_fields = list(summary_fields)
+        self.mode = mode
+        self.source = "local"
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+        self._db = None
+
+    def record(self, event: Event) -> None:
+        """Called by write handlers; ignored while the change stream reports writes"""
+        if self.source == "local":
+            self.bus.publish(event)
+
+    def summary(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: doc[field] for field in self.summary_fields if field in doc}
+
+    async def start(self, db) -> None:
+        if self.mode == "local":
+            return
+        # mongomock behaves as a standalone server but cannot answer hello
+        hello = {} if is_mock(db.client) else await db.client.admin.command("hello")
+        if not (hello.get("setName") or hello.get("msg") == "isdbgrid"):
+            if self.mode == "changestream":
+                raise RuntimeError("CHANGE_FEED=changestream needs a replica set or sharded cluster")
+            logger.info("Change streams unavailable (standalone mongod or mongomock); using the in-process change feed")
+            return
+        try:
+            # Pre-images let delete events say which client was deleted (MongoDB 6.0+)
+            await db.command({"collMod": "clients", "changeStreamPreAndPostImages": {"enabled": True}})
+        except PyMongoError as exc:
+            logger.warning("Change stream pre-images unavailable, deletes will send reset events: %s", exc)
+        self.source = "changestream"
+        self._db = db
+        self._task = asyncio.create_task(self._watch(db))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.source = "local"
+
+    async def subscribe(self, last_event_id: Optional[str] = None, client_type: Optional[str] = None,
+                        owner: Optional[str] = None) -> Tuple[Subscription, List[Tuple[Optional[str], Event]]]:
+        """Subscribe to the bus; a resume token it has not buffered is caught up from the change stream"""
+        subscription, missed = self.bus.subscribe(last_event_id, client_type, owner)
+        if missed is None and self.source == "changestream" and ":" not in last_event_id:
+            missed = await self._catch_up(last_event_id, subscription)
+        return subscription, missed if missed is not None else [(None, RESET)]
+
+    def _stream(self, db, resume_after):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": self.WATCHED},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }}]
+        return db.watch(
+            pipeline,
+            full_document="updateLookup",
+            full_document_before_change="whenAvailable",
+            resume_after=resume_after,
+        )
+
+    async def _catch_up(self, token: str, subscription: Subscription) -> Optional[List[Tuple[str, Event]]]:
+        """Events after ``token`` read from a change stream of the connection's own, up to the present.
+
+        None if the token is unknown to the oplog or the gap is more than
+        the bus would have buffered.
+        """
+        missed = []
+        try:
+            async with self._stream(self._db, {"_data": token}) as stream:
+                for _ in range(self.bus.history.maxlen or self.bus.max_queue):
+                    change = await stream.try_next()
+                    if change is None:
+                        break
+                    event = await self._translate(self._db, change)
+                    if event and subscription.matches(event):
+                        missed.append((change["_id"]["_data"], event))
+                else:
+                    return None
+        except PyMongoError as exc:
+            logger.info("Cannot resume the change stream after %s: %s", token, exc)
+            return None
+        # The live feed queued from the moment of subscribing, so it may repeat the tail
+        subscription.skip(event_id for event_id, _ in missed)
+        return missed
+
+    async def _watch(self, db) -> None:
+        while True:
+            try:
+                async with self._stream(db, self._resume_token) as stream:
+                    async for change in stream:
+                        event = await self._translate(db, change)
+                        if event:
+                            # The resume token names the event identically on every worker
+                            self.bus.publish(event, event_id=change["_id"]["_data"])
+                        self._resume_token = stream.resume_token
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError:
+                logger.exception("Change stream interrupted; resuming")
+                await asyncio.sleep(1)
+
+    async def _translate(self, db, change: Dict[str, Any]) -> Optional[Event]:
+        collection, operation = change["ns"]["coll"], change["operationType"]
+        doc = change.get("fullDocument")
+        if collection == "clients":
+            if operation == "delete":
+                before = change.get("fullDocumentBeforeChange")
+                return client_event("delete", before) if before else RESET
+            if operation == "update":
+                description = change.get("updateDescription", {})
+                changed = [*description.get("updatedFields", {}), *description.get("removedFields", [])]
+                if changed and all(field.startswith("search") or field == "last_activity_at" for field in changed):
+                    # Search grams or the worklist sort key only; the note or tracking event covers it
+                    return None
+            if not doc:
+                return None
+            return client_event("insert" if operation == "insert" else "update", doc, client=self.summary(doc))
+        if operation != "insert" or not doc:
+            return None
+        client = await db.clients.find_one({"id": doc["client_id"]}, EVENT_PROJECTION)
+        if not client:
+            return None
+        entry = {key: value for key, value in doc.items() if key not in ("_id", "client_id")}
+        if collection == "client_notes":
+            return client_event("note", client, note=entry)
+        return client_event("tracking", client, entry=entry)
+
+
+def create_change_feed(summary_fields: Sequence[str]) -> ChangeFeed:
+    """Build the change feed configured by CHANGE_FEED (auto, changestream or local)"""
+    bus = EventBus(
+        history=int(os.getenv("CHANGE_FEED_HISTORY", "1000")),
+        max_queue=int(os.getenv("CHANGE_FEED_MAX_QUEUE", "1000")),
+    )
+    return ChangeFeed(bus, summary_fields, mode=os.getenv("CHANGE_FEED", "auto").lower())
+
+
+async def sse_stream(feed: ChangeFeed, last_event_id: Optional[str] = None, client_type: Optional[str] = None,
+                     owner: Optional[str] = None, heartbeat: float = 15.0) -> AsyncIterator[str]:
+    """Server-sent events for one connection, subscribed for as long as it is iterated"""
+
+    def frame(event_id: Optional[str], event: Event) -> str:
+        lines = [f"id: {event_id}"] if event_id else []
+        lines.append(f"event: {event['type']}")
+        return "\n".join(lines) + f"\ndata: {ndjson_line(event)}\n"
+
+    subscription, missed = await feed.subscribe(last_event_id, client_type, owner)
+    try:
+        yield "retry: 3000\n: connected\n\n"
+        for event_id, event in missed:
+            yield frame(event_id, event)
+        while True:
+            item = await subscription.next(heartbeat)
+            if item is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield frame(*item)
+    finally:
+        subscription.close()
@@ -0,0 +1,170 @@
+"""Index declarations and query-plan verification.
+
+``INDEXES`` is the single source of truth for every index the handlers
+rely on; ``ensure_indexes`` creates them at startup (a no-op when they
+already exist).  ``query_shapes`` lists the query each handler issues,
+with placeholder values, and ``verify_query_plans`` explains them all and
+reports any that would fall back to a collection scan.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from jobs import JOB_RETENTION_SECONDS, JOBS_COLLECTION, claim_filter
+from pagination import keyset_filter
+from repository import OWNER_FIELDS, OWNER_SORT_KEYS, owner_filter
+from search import TEXT_INDEX_KEYS, TEXT_INDEX_NAME, TEXT_INDEX_WEIGHTS, build_search_filter
+from stats import STATS_COLLECTION, activity_pipeline, client_pipeline
+from suggest import suggest_filter
+
+ACTIVITY_INDEXES = [
+    # Per-client activity feeds, paged newest first
+    IndexModel([("client_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="client_id_created_at_id"),
+    IndexModel([("id", ASCENDING)], name="id", unique=True),
+]
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "clients": [
+        IndexModel([("id", ASCENDING)], name="id", unique=True),
+        # Keyset pagination: plain listing and listing filtered by type
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="type_created_at_id"),
+        IndexModel(TEXT_INDEX_KEYS, name=TEXT_INDEX_NAME, weights=TEXT_INDEX_WEIGHTS, default_language="none"),
+        # Typeahead fallback: anchored prefix regexes over name/email tokens
+        IndexModel([("search.keys", ASCENDING)], name="search_keys"),
+        # Live stats and rollup rebuilds group by these (type uses type_created_at_id,
+        # primary owner the worklist index below)
+        IndexModel([("ownership.department", ASCENDING)], name="ownership_department"),
+        # Owner worklists, most recently active first; secondary_owners is multikey
+        IndexModel([("ownership.primary_owner", ASCENDING), ("last_activity_at", DESCENDING), ("id", DESCENDING)],
+                   name="ownership_primary_owner_last_activity_at_id"),
+        IndexModel([("ownership.secondary_owners", ASCENDING), ("last_activity_at", DESCENDING), ("id", DESCENDING)],
+                   name="ownership_secondary_owners_last_activity_at_id"),
+    ],
+    "client_notes": ACTIVITY_INDEXES,
+    "client_tracking": ACTIVITY_INDEXES + [
+        # Weekly activity volume
+        IndexModel([("created_at", ASCENDING), ("activity_type", ASCENDING)], name="created_at_activity_type"),
+    ],
+    STATS_COLLECTION: [
+        IndexModel([("dimension", ASCENDING), ("week", ASCENDING)], name="dimension_week"),
+    ],
+    JOBS_COLLECTION: [
+        IndexModel([("id", ASCENDING)], name="id", unique=True),
+        IndexModel([("idempotency_key", ASCENDING)], name="idempotency_key", unique=True),
+        # Workers claim the earliest due job
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+        IndexModel([("client_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="client_id_created_at_id"),
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=JOB_RETENTION_SECONDS),
+    ],
+}
+
+
+async def ensure_indexes(db) -> None:
+    # One createIndexes per collection, all in flight at once
+    await asyncio.gather(*(db[collection].create_indexes(models) for collection, models in INDEXES.items()))
+
+
+_PROBE_ID = "query-plan-probe"
+_PROBE_DATE = datetime(2000, 1, 1)
+_PROBE_OWNER = "owner@example.com"
+_LIST_SORT = {"created_at": -1, "id": -1}
+_OWNER_SORT = {"last_activity_at": -1, "id": -1}
+
+
+def _find(handlers, collection, filter, sort=None, limit=None) -> Dict[str, Any]:
+    command = {"find": collection, "filter": filter}
+    if sort:
+        command["sort"] = sort
+    if limit:
+        command["limit"] = limit
+    return {"handlers": handlers, "collection": collection, "command": command}
+
+
+def _aggregate(handlers, collection, pipeline) -> Dict[str, Any]:
+    command = {"aggregate": collection, "pipeline": pipeline, "cursor": {}}
+    return {"handlers": handlers, "collection": collection, "command": command}
+
+
+def query_shapes() -> List[Dict[str, Any]]:
+    """The query issued by each handler, with placeholder values"""
+    by_id = {"id": _PROBE_ID}
+    activity_page = {"client_id": _PROBE_ID}
+    list_keyset = keyset_filter(["created_at", "id"], [_PROBE_DATE, _PROBE_ID])
+    owner_keyset = keyset_filter(OWNER_SORT_KEYS, [_PROBE_DATE, _PROBE_ID])
+    return [
+        _find(["get_client", "update_client", "delete_client", "add_note", "add_tracking_entry",
+               "get_sharepoint_url"], "clients", by_id),
+        _find(["batch_get_clients", "batch_update_clients", "batch_delete_clients"], "clients",
+              {"id": {"$in": [_PROBE_ID]}}),
+        _find(["get_clients"], "clients", {}, _LIST_SORT, 51),
+        _find(["get_clients (cursor)"], "clients", list_keyset, _LIST_SORT, 51),
+        _find(["get_clients (client_type)"], "clients", {"type": "person"}, _LIST_SORT, 51),
+        _find(["get_clients (client_type, cursor)"], "clients", {"type": "person", **list_keyset}, _LIST_SORT, 51),
+        _aggregate(["get_clients (search)", "export_clients (search)"], "clients", [
+            {"$match": build_search_filter("probe query")},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$sort": {"score": -1, "created_at": -1, "id": -1}},
+            {"$limit": 51},
+        ]),
+        _find(["get_clients (owner)", "get_my_clients"], "clients",
+              owner_filter(_PROBE_OWNER, {}), _OWNER_SORT, 51),
+        _find(["get_clients (owner, cursor)", "get_my_clients (cursor)"], "clients",
+              owner_filter(_PROBE_OWNER, owner_keyset), _OWNER_SORT, 51),
+        _find(["get_clients (owner, client_type)", "get_my_clients (client_type)"], "clients",
+              owner_filter(_PROBE_OWNER, {"type": "person"}), _OWNER_SORT, 51),
+        _aggregate(["get_clients (owner, search)"], "clients", [
+            {"$match": {**build_search_filter("probe query"), "$or": [{field: _PROBE_OWNER} for field in OWNER_FIELDS]}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$sort": {"score": -1, "created_at": -1, "id": -1}},
+            {"$limit": 51},
+        ]),
+        # count_documents runs as $match + $group
+        *(_aggregate(["get_my_clients (counts)"], "clients", [{"$match": query}, {"$group": {"_id": 1, "n": {"$sum": 1}}}])
+          for query in [{OWNER_FIELDS[0]: _PROBE_OWNER}, {OWNER_FIELDS[1]: _PROBE_OWNER}, owner_filter(_PROBE_OWNER, {})]),
+        _find(["suggest_clients (loading)"], "clients", suggest_filter("probe"), limit=8),
+        _find(["get_notes", "delete_client"], "client_notes", activity_page, _LIST_SORT, 51),
+        _find(["get_tracking_entries", "delete_client"], "client_tracking", activity_page, _LIST_SORT, 51),
+        _find(["get_client_jobs"], JOBS_COLLECTION, activity_page, _LIST_SORT, 50),
+        _find(["job worker (claim)"], JOBS_COLLECTION, claim_filter(_PROBE_DATE), {"run_at": 1}, 1),
+        _find(["get_client_stats"], STATS_COLLECTION, {"dimension": {"$in": ["type", "department", "primary_owner"]}}),
+        _find(["get_activity_stats"], STATS_COLLECTION, {"dimension": "activity", "week": {"$gte": "2000-W01"}}),
+        *(_aggregate([f"get_client_stats (live {path})"], "clients", client_pipeline(path))
+          for path in ["type", "ownership.department", "ownership.primary_owner"]),
+        _aggregate(["get_activity_stats (live)"], "client_tracking", activity_pipeline(_PROBE_DATE)),
+        _aggregate(["delete_client (stats)"], "client_tracking", activity_pipeline(client_id=_PROBE_ID)),
+        _aggregate(["batch_delete_clients (stats)"], "client_tracking", activity_pipeline(client_id=[_PROBE_ID])),
+    ]
+
+
+def _plan_stages(node: Any, stages: set) -> set:
+    """Collect every plan stage name, ignoring plans the optimizer rejected"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "rejectedPlans":
+                continue
+            if key == "stage" and isinstance(value, str):
+                stages.add(value)
+            else:
+                _plan_stages(value, stages)
+    elif isinstance(node, list):
+        for item in node:
+            _plan_stages(item, stages)
+    return stages
+
+
+async def verify_query_plans(db) -> List[Dict[str, Any]]:
+    """Explain every handler query shape; ``collscan`` is True for any that scans a collection"""
+    report = []
+    for shape in query_shapes():
+        explain = await db.command({"explain": shape["command"], "verbosity": "queryPlanner"})
+        stages = _plan_stages(explain, set())
+        report.append({
+            "handlers": shape["handlers"],
+            "collection": shape["collection"],
+            "stages": sorted(stages),
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
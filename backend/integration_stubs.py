@@ -0,0 +1,99 @@
+"""Local stand-ins for the SharePoint and QuickBooks APIs (see integrations.py).
+
+Usage:
+    python integration_stubs.py [--port 8010] [--fail-rate 0.3] [--latency 0.5]
+
+then run the API with
+
+    SHAREPOINT_API_URL=http://localhost:8010/sharepoint
+    QUICKBOOKS_API_URL=http://localhost:8010/quickbooks
+
+``--fail-rate`` answers that share of requests with HTTP 503 and
+``--latency`` delays every response, to exercise job retries and leases.
+Folders and customers are kept in memory, keyed by client id.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self, fail_rate: float = 0.0, latency: float = 0.0):
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.folders = {}
+        self.customers = {}
+        self.requests = 0
+
+    def folder(self, body):
+        with self.lock:
+            if body["client_id"] not in self.folders:
+                self.folders[body["client_id"]] = f"https://stub.sharepoint.local/sites/ClientDocuments/{body['name']}"
+            return {"url": self.folders[body["client_id"]]}
+
+    def customer(self, body):
+        with self.lock:
+            customer = self.customers.setdefault(body["client_id"], {"customer_id": body.get("customer_id") or f"QB-{uuid.uuid4().hex[:8]}"})
+            customer.update({key: value for key, value in body.items() if key != "customer_id"})
+            return {"customer_id": customer["customer_id"]}
+
+
+def make_handler(state: StubState):
+    routes = {"/sharepoint/folders": state.folder, "/quickbooks/customers": state.customer}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            with state.lock:
+                state.requests += 1
+            if state.latency:
+                time.sleep(state.latency)
+            route = routes.get(self.path)
+            if route is None:
+                self._send(404, {"error": "not found"})
+                return
+            if random.random() < state.fail_rate:
+                self._send(503, {"error": "injected failure"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            self._send(200, route(json.loads(self.rfile.read(length) or b"{}")))
+
+        def do_GET(self):
+            # Inspect what the jobs have done so far
+            with state.lock:
+                self._send(200, {"requests": state.requests, "folders": state.folders, "customers": state.customers})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 8010, fail_rate: float = 0.0, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stubs on a background thread; call ``shutdown()`` on the result to stop"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(StubState(fail_rate, latency)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before every response")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(StubState(args.fail_rate, args.latency)))
+    print(f"Integration stubs on http://127.0.0.1:{args.port}/sharepoint and /quickbooks")
+    server.serve_forever()
@@ -0,0 +1,100 @@
+"""Clients for the SharePoint and QuickBooks integrations, run from background jobs.
+
+With ``SHAREPOINT_API_URL`` / ``QUICKBOOKS_API_URL`` unset, each client
+works offline the way the app always has: the SharePoint folder URL is
+derived from ``SHAREPOINT_SITE_URL`` and QuickBooks sync is skipped.
+When set, they call these endpoints (``integration_stubs.py`` serves them
+locally, with injectable failures and latency):
+
+    POST {SHAREPOINT_API_URL}/folders    {"client_id", "name"}                 -> {"url"}
+    POST {QUICKBOOKS_API_URL}/customers  {"client_id", "customer_id", "display_name",
+                                          "email", "billing_address", "tax_id"} -> {"customer_id"}
+
+Both are upserts on ``client_id`` on the remote side, so a retried job
+never creates a second folder or customer.  HTTP runs in the default
+executor, like the JWKS fetcher in auth.py.
+"""
+import asyncio
+import json
+import os
+import urllib.request
+from typing import Any, Dict, Optional
+
+from suggest import display_name
+
+
+def _post_json(url: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+async def post_json(url: str, payload: Dict[str, Any], timeout: float = 10.0) -> Dict[str, Any]:
+    """POST JSON without blocking the event loop; HTTP errors raise"""
+    return await asyncio.get_running_loop().run_in_executor(None, _post_json, url, payload, timeout)
+
+
+def folder_name(client: Dict[str, Any]) -> str:
+    data = client.get("data") or {}
+    client_name = data.get("company_name") or f"{data.get('first_name', '')} {data.get('last_name', '')}"
+    return f"Client_{client['id']}_{client_name.replace(' ', '_')}"
+
+
+class SharePointClient:
+    def __init__(self, site_url: str, api_url: Optional[str] = None, timeout: float = 10.0):
+        self.site_url = site_url.rstrip("/")
+        self.api_url = api_url.rstrip("/") if api_url else None
+        self.timeout = timeout
+
+    def expected_url(self, client: Dict[str, Any]) -> str:
+        """Where the client's folder lives by naming convention"""
+        return f"{self.site_url}/{folder_name(client)}"
+
+    async def provision_folder(self, client: Dict[str, Any]) -> str:
+        """Create (or find) the client's document folder and return its URL"""
+        if not self.api_url:
+            return self.expected_url(client)
+        response = await post_json(
+            f"{self.api_url}/folders", {"client_id": client["id"], "name": folder_name(client)}, self.timeout
+        )
+        return response["url"]
+
+
+class QuickBooksClient:
+    def __init__(self, api_url: Optional[str] = None, timeout: float = 10.0):
+        self.api_url = api_url.rstrip("/") if api_url else None
+        self.timeout = timeout
+
+    @property
+    def enabled(self) -> bool:
+        return self.api_url is not None
+
+    async def sync_customer(self, client: Dict[str, Any]) -> str:
+        """Create or update the client's customer record; returns its customer id"""
+        data = client.get("data") or {}
+        quickbooks = client.get("quickbooks") or {}
+        response = await post_json(f"{self.api_url}/customers", {
+            "client_id": client["id"],
+            "customer_id": quickbooks.get("customer_id"),
+            "display_name": display_name(client.get("type"), data),
+            "email": data.get("email"),
+            "billing_address": quickbooks.get("billing_address") or data.get("address"),
+            "tax_id": quickbooks.get("tax_id"),
+        }, self.timeout)
+        return response["customer_id"]
+
+
+def create_sharepoint_client() -> SharePointClient:
+    return SharePointClient(
+        os.getenv("SHAREPOINT_SITE_URL", "https://mock.sharepoint.com"),
+        os.getenv("SHAREPOINT_API_URL") or None,
+    )
+
+
+def create_quickbooks_client() -> QuickBooksClient:
+    return QuickBooksClient(os.getenv("QUICKBOOKS_API_URL") or None)
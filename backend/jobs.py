@@ -0,0 +1,201 @@
+"""Durable background jobs for slow side effects (SharePoint, QuickBooks).
+
+Jobs live in the ``client_jobs`` collection, so they survive restarts and
+any API process can run them:
+
+    {"id", "kind", "client_id", "payload", "idempotency_key",
+     "status": "queued" | "running" | "succeeded" | "failed",
+     "attempts", "max_attempts", "run_at", "worker", "last_error", "result",
+     "created_at", "updated_at", "finished_at"}
+
+``enqueue`` upserts on the idempotency key, so enqueuing the same work
+twice yields one job.  Each process runs ``JOB_WORKERS`` workers that
+claim the oldest due job with one ``find_one_and_update``.  A claim sets
+``run_at`` to the end of the lease: a job whose worker died becomes due
+again when its lease runs out, and the claim query needs only the
+``status_run_at`` index.  Failures retry with exponential backoff until
+``max_attempts``; finished jobs expire after ``JOB_RETENTION_SECONDS``.
+"""
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "client_jobs"
+JOB_RETENTION_SECONDS = 30 * 24 * 3600
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+JOB_PROJECTION = {"_id": 0, "payload": 0, "idempotency_key": 0}
+
+# async handler(job) -> result stored on the job (or None)
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def _now() -> datetime:
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def new_job(kind: str, client_id: str, payload: Optional[Dict[str, Any]] = None,
+            idempotency_key: Optional[str] = None, max_attempts: int = 5) -> Dict[str, Any]:
+    """A queued job document; the idempotency key defaults to one job per kind and client"""
+    now = _now()
+    return {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "client_id": client_id,
+        "payload": payload or {},
+        "idempotency_key": idempotency_key or f"{kind}:{client_id}",
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def claim_filter(now: datetime) -> Dict[str, Any]:
+    """Due jobs: queued ones whose time has come, and running ones whose lease ran out"""
+    return {"status": {"$in": [QUEUED, RUNNING]}, "run_at": {"$lte": now}}
+
+
+class JobQueue:
+    """Enqueues jobs and runs them with a fixed number of workers per process"""
+
+    def __init__(self, workers: int = 4, lease_seconds: float = 60.0, max_attempts: int = 5,
+                 backoff_seconds: float = 5.0, max_backoff_seconds: float = 3600.0, poll_seconds: float = 2.0):
+        self.handlers: Dict[str, JobHandler] = {}
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._db = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    def job(self, kind: str, client_id: str, payload: Optional[Dict[str, Any]] = None,
+            idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        return new_job(kind, client_id, payload, idempotency_key, self.max_attempts)
+
+    async def enqueue(self, db, jobs: List[Dict[str, Any]]) -> None:
+        """Queue ``job()`` documents with one bulk write; jobs whose key is already queued are dropped"""
+        if jobs:
+            await db[JOBS_COLLECTION].bulk_write(
+                [UpdateOne({"idempotency_key": job["idempotency_key"]}, {"$setOnInsert": job}, upsert=True)
+                 for job in jobs],
+                ordered=False,
+            )
+            self._wakeup.set()
+
+    async def jobs_for(self, db, client_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        cursor = db[JOBS_COLLECTION].find({"client_id": client_id}, JOB_PROJECTION)
+        return await cursor.sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(length=limit)
+
+    async def start(self, db) -> None:
+        self._db = db
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        # The flag as well: on Python 3.11 wait_for() swallows a cancel
+        # that lands as the job finishes
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        # A job cut off here is retried once its lease runs out
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        now = _now()
+        return await self._db[JOBS_COLLECTION].find_one_and_update(
+            claim_filter(now),
+            {
+                "$set": {"status": RUNNING, "worker": self.worker_id, "updated_at": now,
+                         "run_at": now + timedelta(seconds=self.lease_seconds)},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_seconds * 2 ** (attempts - 1), self.max_backoff_seconds)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run_one(self) -> bool:
+        """Claim and run one due job; False if there was none"""
+        job = await self.claim()
+        if job is None:
+            return False
+        # Only the claim that is still current may record the outcome
+        owned = {"id": job["id"], "status": RUNNING, "worker": self.worker_id, "attempts": job["attempts"]}
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {job['kind']!r}")
+            result = await asyncio.wait_for(handler(job), self.lease_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            now = _now()
+            error = f"{type(exc).__name__}: {exc}"
+            if job["attempts"] >= job.get("max_attempts", self.max_attempts):
+                logger.warning("Job %s (%s) failed permanently: %s", job["id"], job["kind"], error)
+                update = {"status": FAILED, "finished_at": now}
+            else:
+                update = {"status": QUEUED, "run_at": now + timedelta(seconds=self.backoff(job["attempts"]))}
+            await self._db[JOBS_COLLECTION].update_one(
+                owned, {"$set": {**update, "last_error": error, "updated_at": now}}
+            )
+            return True
+        now = _now()
+        await self._db[JOBS_COLLECTION].update_one(
+            owned, {"$set": {"status": SUCCEEDED, "result": result, "finished_at": now, "updated_at": now}}
+        )
+        return True
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            try:
+                if await self.run_one():
+                    # Nothing above need suspend with an in-process store
+                    # (mongomock), so yield here or requests and stop() starve
+                    await asyncio.sleep(0)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError:
+                logger.exception("Job worker could not reach the database")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+def create_job_queue() -> JobQueue:
+    """Build the queue configured by JOB_WORKERS, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS and JOB_BACKOFF_SECONDS"""
+    return JobQueue(
+        workers=int(os.getenv("JOB_WORKERS", "4")),
+        lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")),
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "5")),
+        backoff_seconds=float(os.getenv("JOB_BACKOFF_SECONDS", "5")),
+    )
@@ -0,0 +1,174 @@
+"""Maintenance commands for the client management backend.
+
+Usage:
+    python manage.py reindex-search [--batch-size N]
+    python manage.py migrate-activity [--batch-size N]
+    python manage.py backfill-last-activity [--batch-size N]
+    python manage.py check-indexes
+    python manage.py rebuild-stats
+"""
+import argparse
+import asyncio
+import sys
+
+from pymongo import ReplaceOne, UpdateOne
+
+from dotenv import load_dotenv
+
+from database import create_client, get_database
+from indexes import ensure_indexes, verify_query_plans
+from search import build_search_fields
+from stats import rebuild
+
+# Opened by run() for the duration of one command
+db = None
+
+
+async def reindex_search(batch_size: int) -> int:
+    """(Re)build the ``search`` grams on every client document."""
+    await ensure_indexes(db)
+    updated = 0
+    batch = []
+    cursor = db.clients.find({}, {"_id": 0, "id": 1, "data": 1})
+    async for doc in cursor:
+        notes = [
+            note["content"]
+            async for note in db.client_notes.find({"client_id": doc["id"]}, {"_id": 0, "content": 1})
+        ]
+        search = build_search_fields(doc.get("data", {}), notes)
+        batch.append(UpdateOne({"id": doc["id"]}, {"$set": {"search": search}}))
+        if len(batch) >= batch_size:
+            await db.clients.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await db.clients.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    print(f"Reindexed search fields on {updated} clients")
+    return 0
+
+
+async def migrate_activity(batch_size: int) -> int:
+    """Move notes/tracking arrays embedded in client documents into their own collections.
+
+    Entries are upserted by id before the arrays are unset, so the command
+    can be re-run safely if it is interrupted.
+    """
+    await ensure_indexes(db)
+    migrated = {"notes": 0, "tracking": 0}
+    targets = {"notes": db.client_notes, "tracking": db.client_tracking}
+    query = {"$or": [{"notes": {"$exists": True}}, {"tracking": {"$exists": True}}]}
+    cursor = db.clients.find(query, {"_id": 0, "id": 1, "notes": 1, "tracking": 1}, batch_size=batch_size)
+    async for doc in cursor:
+        for field, collection in targets.items():
+            entries = doc.get(field) or []
+            for start in range(0, len(entries), batch_size):
+                await collection.bulk_write(
+                    [
+                        ReplaceOne({"id": entry["id"]}, {"client_id": doc["id"], **entry}, upsert=True)
+                        for entry in entries[start:start + batch_size]
+                    ],
+                    ordered=False,
+                )
+            migrated[field] += len(entries)
+        await db.clients.update_one({"id": doc["id"]}, {"$unset": {"notes": "", "tracking": ""}})
+    print(f"Migrated {migrated['notes']} notes and {migrated['tracking']} tracking entries")
+    return 0
+
+
+async def backfill_last_activity(batch_size: int) -> int:
+    """Set ``last_activity_at`` on clients from their latest tracking entry, or their creation time.
+
+    Clients created before worklists existed lack the field and would sort
+    last on owner pages.  ``$max`` never moves it backwards, so the command
+    can be re-run safely while the API keeps recording activity.
+    """
+    await ensure_indexes(db)
+    # The leading sort lets the planner walk client_id_created_at_id
+    latest = {
+        group["_id"]: group["at"]
+        async for group in db.client_tracking.aggregate([
+            {"$sort": {"client_id": 1}},
+            {"$group": {"_id": "$client_id", "at": {"$max": "$created_at"}}},
+        ])
+    }
+    updated = 0
+    batch = []
+    async for doc in db.clients.find({}, {"_id": 0, "id": 1, "created_at": 1}, batch_size=batch_size):
+        at = max(filter(None, [doc.get("created_at"), latest.get(doc["id"])]), default=None)
+        if at is None:
+            continue
+        batch.append(UpdateOne({"id": doc["id"]}, {"$max": {"last_activity_at": at}}))
+        if len(batch) >= batch_size:
+            await db.clients.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await db.clients.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    print(f"Backfilled last activity on {updated} clients")
+    return 0
+
+
+async def check_indexes() -> int:
+    """Ensure the declared indexes, then fail if any handler query plans a COLLSCAN."""
+    await ensure_indexes(db)
+    failed = 0
+    for entry in await verify_query_plans(db):
+        status = "COLLSCAN" if entry["collscan"] else "ok"
+        failed += entry["collscan"]
+        print(f"{status:<9} {entry['collection']:<16} {', '.join(entry['stages']):<40} {', '.join(entry['handlers'])}")
+    return 1 if failed else 0
+
+
+async def rebuild_stats() -> int:
+    """Recompute the dashboard rollups from the clients and tracking entries."""
+    groups = await rebuild(db)
+    await ensure_indexes(db)
+    print(f"Rebuilt {groups} stats groups")
+    return 0
+
+
+async def run(command, *args) -> int:
+    global db
+    client = create_client()
+    db = get_database(client)
+    try:
+        return await command(*args)
+    finally:
+        client.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reindex = commands.add_parser("reindex-search", help="Backfill search grams for existing clients")
+    reindex.add_argument("--batch-size", type=int, default=1000)
+
+    migrate = commands.add_parser("migrate-activity", help="Move embedded notes/tracking into their own collections")
+    migrate.add_argument("--batch-size", type=int, default=1000)
+
+    backfill = commands.add_parser("backfill-last-activity", help="Set last_activity_at for owner worklists")
+    backfill.add_argument("--batch-size", type=int, default=1000)
+
+    commands.add_parser("check-indexes", help="Create indexes and verify no handler query scans a collection")
+    commands.add_parser("rebuild-stats", help="Recompute the dashboard rollups from scratch")
+
+    args = parser.parse_args(argv)
+    load_dotenv()
+    if args.command == "reindex-search":
+        return asyncio.run(run(reindex_search, args.batch_size))
+    if args.command == "migrate-activity":
+        return asyncio.run(run(migrate_activity, args.batch_size))
+    if args.command == "backfill-last-activity":
+        return asyncio.run(run(backfill_last_activity, args.batch_size))
+    if args.command == "check-indexes":
+        return asyncio.run(run(check_indexes))
+    if args.command == "rebuild-stats":
+        return asyncio.run(run(rebuild_stats))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Request and database instrumentation, exposed in Prometheus text format.
+
+``MetricsMiddleware`` times every request and records its status and
+response size under the matched route template (``/api/clients/{client_id}``,
+not the raw path, so label cardinality stays bounded).  ``DBCommandListener``
+is a pymongo ``CommandListener``; Motor runs commands in executor threads
+that inherit the request's context, so each command is attributed to the
+request that issued it through a context variable.  With debug headers on,
+responses carry ``X-DB-Calls`` and ``X-DB-Time-ms``.  ``PoolListener``
+tracks connection checkout waits and pool occupancy.  singleflight.py
+reports coalesced and superseded calls here too.
+"""
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+DB_CALLS_HEADER = "X-DB-Calls"
+DB_TIME_HEADER = "X-DB-Time-ms"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+DB_CALL_BUCKETS = (0, 1, 2, 3, 4, 5, 10, 20, 50)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Driver housekeeping, not issued by handlers
+IGNORED_COMMANDS = {"hello", "isMaster", "ismaster", "ping", "endSessions", "saslStart", "saslContinue"}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class RequestStats:
+    """DB work done on behalf of one request"""
+
+    __slots__ = ("scope", "resolve_route", "db_calls", "db_seconds")
+
+    def __init__(self, scope, resolve_route: Callable[[Any], str]):
+        self.scope = scope
+        self.resolve_route = resolve_route
+        self.db_calls = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # The router fills in scope["endpoint"] before the handler issues any commands
+        return self.resolve_route(self.scope)
+
+
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(labels)} {value:g}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # labels -> (per-bucket counts, sum, count)
+        self.values: Dict[Labels, List] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][index] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%g"' % bound
+                yield f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(labels, le)} {count}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total:g}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+class Metrics:
+    """Every metric the app exports; safe to update from driver threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter("http_requests_total", "Requests by route, method and status.")
+        self.latency = Histogram("http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS)
+        self.response_size = Histogram("http_response_size_bytes", "Response body size by route.", SIZE_BUCKETS)
+        self.request_db_calls = Histogram(
+            "http_request_db_calls", "Database commands issued per request, by route.", DB_CALL_BUCKETS
+        )
+        self.db_commands = Counter("db_commands_total", "Database commands by route, command and outcome.")
+        self.db_latency = Histogram("db_command_duration_seconds", "Database command latency by route and command.",
+                                    LATENCY_BUCKETS)
+        self.pool_checkouts = Counter("db_pool_checkouts_total", "Connection checkouts by server and outcome.")
+        self.pool_wait = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+                                   POOL_WAIT_BUCKETS)
+        self.pool_connections = Gauge("db_pool_connections", "Open pooled connections by server.")
+        self.pool_in_use = Gauge("db_pool_connections_in_use", "Checked-out pooled connections by server.")
+        self.flights = Counter("singleflight_calls_total",
+                               "Coalesced calls by group and role: leader ran the query, shared joined one in flight.")
+        self.superseded = Counter("superseded_calls_total", "Calls cancelled by a newer one from the same user, by group.")
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, size: int, db_calls: int) -> None:
+        labels = (("method", method), ("route", route))
+        with self.lock:
+            self.requests.inc(labels + (("status", str(status)),))
+            self.latency.observe(labels, seconds)
+            self.response_size.observe(labels, size)
+            self.request_db_calls.observe(labels, db_calls)
+
+    def record_command(self, route: str, command: str, seconds: float, ok: bool) -> None:
+        labels = (("route", route), ("command", command))
+        with self.lock:
+            self.db_commands.inc(labels + (("outcome", "ok" if ok else "error"),))
+            self.db_latency.observe(labels, seconds)
+
+    def record_checkout(self, address: str, seconds: float, outcome: str) -> None:
+        labels = (("server", address),)
+        with self.lock:
+            self.pool_checkouts.inc(labels + (("outcome", outcome),))
+            self.pool_wait.observe(labels, seconds)
+            if outcome == "ok":
+                self.pool_in_use.inc(labels)
+
+    def record_connection(self, address: str, in_use: int = 0, open: int = 0) -> None:
+        labels = (("server", address),)
+        with self.lock:
+            self.pool_in_use.inc(labels, in_use)
+            self.pool_connections.inc(labels, open)
+
+    def record_flight(self, group: str, role: str) -> None:
+        with self.lock:
+            self.flights.inc((("group", group), ("role", role)))
+
+    def record_superseded(self, group: str) -> None:
+        with self.lock:
+            self.superseded.inc((("group", group),))
+
+    def render(self) -> str:
+        with self.lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.response_size, self.request_db_calls,
+                           self.db_commands, self.db_latency, self.pool_checkouts, self.pool_wait,
+                           self.pool_connections, self.pool_in_use, self.flights, self.superseded):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class DBCommandListener(monitoring.CommandListener):
+    """Attributes each database command to the request in whose context it ran"""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def _finished(self, event, ok: bool) -> None:
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        seconds = event.duration_micros / 1e6
+        request = current_request.get()
+        if request is not None:
+            request.db_calls += 1
+            request.db_seconds += seconds
+        self.metrics.record_command(request.route if request else "background", event.command_name, seconds, ok)
+
+    def succeeded(self, event):
+        self._finished(event, True)
+
+    def failed(self, event):
+        self._finished(event, False)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    """Connection checkout waits and pool occupancy, for sizing maxPoolSize"""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+        # Checkouts block the driver thread that asked, so start times are per thread
+        self._local = threading.local()
+
+    def _waited(self) -> float:
+        return time.perf_counter() - getattr(self._local, "started", time.perf_counter())
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        self.metrics.record_checkout(_address(event), self._waited(), "ok")
+
+    def connection_check_out_failed(self, event):
+        self.metrics.record_checkout(_address(event), self._waited(), event.reason)
+
+    def connection_checked_in(self, event):
+        self.metrics.record_connection(_address(event), in_use=-1)
+
+    def connection_created(self, event):
+        self.metrics.record_connection(_address(event), open=1)
+
+    def connection_closed(self, event):
+        self.metrics.record_connection(_address(event), open=-1)
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses pass through untouched"""
+
+    def __init__(self, app, metrics: Metrics, debug_headers: bool = False):
+        self.app = app
+        self.metrics = metrics
+        self.debug_headers = debug_headers
+        self._routes: Optional[Dict] = None
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None:
+            app = scope.get("app")
+            self._routes = {route.endpoint: route.path for route in getattr(app, "routes", []) if hasattr(route, "endpoint")}
+        return self._routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestStats(scope, self._route)
+        token = current_request.set(request)
+        status = 500
+        size = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((DB_CALLS_HEADER.lower().encode(), str(request.db_calls).encode()))
+                    headers.append((DB_TIME_HEADER.lower().encode(), f"{request.db_seconds * 1000:.2f}".encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.record_request(
+                scope["method"], request.route, status, time.perf_counter() - start, size, request.db_calls
+            )
+            current_request.reset(token)
@@ -0,0 +1,83 @@
+"""Opaque keyset cursors for descending-order list endpoints.
+
+A cursor is the sort-key values of the last row on a page, JSON-encoded
+and base64url-wrapped.  The next page is fetched with a range filter on
+those keys, so every page costs the same index seek regardless of depth
+and concurrent inserts never shift rows between pages.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_DATE_MARKER = "$date"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATE_MARKER: value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and _DATE_MARKER in value:
+        return datetime.fromisoformat(value[_DATE_MARKER])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[str]) -> List[Any]:
+    """Decode a cursor produced for ``keys``; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in values]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Cursor does not match this query")
+    return values
+
+
+def cursor_for(doc: Dict[str, Any], keys: Sequence[str]) -> str:
+    return encode_cursor([doc.get(key) for key in keys])
+
+
+def keyset_filter(keys: Sequence[str], values: Sequence[Any]) -> Dict[str, Any]:
+    """Filter selecting rows strictly after ``values`` in descending ``keys`` order."""
+    clauses = []
+    for i, key in enumerate(keys):
+        clause = {prev: values[j] for j, prev in enumerate(keys[:i])}
+        clause[key] = {"$lt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def until_filter(keys: Sequence[str], values: Sequence[Any]) -> Dict[str, Any]:
+    """Filter selecting rows up to and including ``values`` in descending ``keys`` order."""
+    clauses = []
+    for i, key in enumerate(keys):
+        clause = {prev: values[j] for j, prev in enumerate(keys[:i])}
+        clause[key] = {"$gt": values[i]}
+        clauses.append(clause)
+    clauses.append(dict(zip(keys, values)))
+    return {"$or": clauses}
+
+
+def sort_spec(keys: Sequence[str]) -> List[tuple]:
+    return [(key, -1) for key in keys]
+
+
+def split_page(docs: List[Dict[str, Any]], limit: int, keys: Sequence[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim a ``limit + 1`` fetch to one page and compute the next cursor."""
+    if len(docs) > limit:
+        page = docs[:limit]
+        return page, cursor_for(page[-1], keys)
+    return docs, None
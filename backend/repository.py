@@ -0,0 +1,634 @@
+"""Client storage behind one interface, with a Motor and an in-memory engine.
+
+Handlers reach the ``clients`` collection only through a
+``ClientRepository``; notes, tracking, stats and jobs stay on the Mongo
+database.  ``STORAGE_ENGINE`` picks the engine:
+
+    motor    MongoDB through Motor (default)
+    memory   process-local and not persisted, for embedded single-node
+             deployments, benchmarks and test runs.  Combined with
+             ``MONGO_URL=mongomock://`` nothing external is needed.
+
+The in-memory engine keeps a hash index on ``id``, per-type lists sorted
+on ``(created_at, id)`` for list pages, inverted indexes from search
+grams to ids and from owners to the clients they own or co-own.  Search scores weigh name/contact grams over note grams
+the way the text index does, so search pages rank and page the same way
+on both engines (the scores themselves differ).  Every operation runs
+without awaiting, so each one is atomic with respect to the others.
+"""
+import asyncio
+import copy
+import os
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from etag import client_etag, if_match_allows, if_match_filter
+from pagination import keyset_filter, sort_spec, until_filter
+from search import TEXT_INDEX_WEIGHTS, query_terms, terms_filter
+from stats import client_pipeline
+from suggest import SUGGEST_PROJECTION, suggest_filter, suggest_terms
+
+# Keyset pagination order for the client list (see pagination.py)
+LIST_SORT_KEYS = ["created_at", "id"]
+SEARCH_SORT_KEYS = ["score", "created_at", "id"]
+# Owner worklists: most recently active first (last_activity_at is the
+# creation time until the client's first tracking entry)
+OWNER_SORT_KEYS = ["last_activity_at", "id"]
+# A client is on an owner's worklist through either field; both are indexed
+OWNER_FIELDS = ["ownership.primary_owner", "ownership.secondary_owners"]
+
+
+class ClientQuery(NamedTuple):
+    """Filter shared by the list and export endpoints"""
+
+    terms: Tuple[str, ...] = ()
+    client_type: Optional[str] = None
+    owner: Optional[str] = None
+    # A search with nothing searchable in it (one letter, punctuation) matches no client
+    empty: bool = False
+
+    @property
+    def sort_keys(self) -> List[str]:
+        # Relevance when searching, recent activity on a worklist, else newest first
+        if self.terms:
+            return SEARCH_SORT_KEYS
+        return OWNER_SORT_KEYS if self.owner else LIST_SORT_KEYS
+
+
+def client_query(search: Optional[str], client_type: Optional[str], owner: Optional[str] = None) -> ClientQuery:
+    terms = tuple(query_terms(search)) if search else ()
+    return ClientQuery(
+        terms=terms,
+        client_type=client_type if client_type in ["person", "company"] else None,
+        owner=owner or None,
+        empty=bool(search and search.strip()) and not terms,
+    )
+
+
+def owner_filter(owner: str, match: Dict[str, Any]) -> Dict[str, Any]:
+    """``match`` restricted to clients ``owner`` owns or co-owns: one ``$or`` branch per ownership index"""
+    return {"$or": [{field: owner, **match} for field in OWNER_FIELDS]}
+
+
+class ClientRepository:
+    """Data access for clients.
+
+    Reads take a Mongo-style projection.  ``list`` yields rows in
+    ``query.sort_keys`` order (search rows carry ``score``); ``after`` and
+    ``until`` are sort-key values bounding the rows, exclusive and
+    inclusive respectively.
+    """
+
+    engine = ""
+
+    async def find(self, client_id: str, projection: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def exists(self, client_id: str) -> bool:
+        raise NotImplementedError
+
+    def find_many(self, ids: List[str], projection: Dict[str, int]) -> AsyncIterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def scan(self, projection: Dict[str, int]) -> AsyncIterator[Dict[str, Any]]:
+        """Every client, in no particular order"""
+        raise NotImplementedError
+
+    def list(self, query: ClientQuery, projection: Dict[str, int], after: Optional[List[Any]] = None,
+             until: Optional[List[Any]] = None, skip: int = 0,
+             limit: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def suggest(self, q: str, client_type: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Clients whose name or email tokens start with each typed token (SUGGEST_PROJECTION)"""
+        raise NotImplementedError
+
+    async def count_by(self, path: str) -> Dict[Any, int]:
+        raise NotImplementedError
+
+    async def count_owned(self, owner: str) -> Dict[str, int]:
+        """How many clients ``owner`` is the primary owner of, a secondary owner of, and either"""
+        raise NotImplementedError
+
+    async def insert(self, doc: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def insert_many(self, docs: List[Dict[str, Any]]) -> List[Tuple[int, str]]:
+        """Insert what can be inserted; returns (index, error) for the rest"""
+        raise NotImplementedError
+
+    async def update(self, client_id: str, fields: Dict[str, Any], projection: Dict[str, int],
+                     if_match: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """``$set`` fields (dotted paths allowed) and bump the version.
+
+        Returns the before-image, or None if the client is missing or
+        ``if_match`` does not match its ETag.
+        """
+        raise NotImplementedError
+
+    async def update_many(self, updates: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Set[str]:
+        """Apply each (before-image, fields) update if the client is still at that version.
+
+        Returns the ids that were updated.
+        """
+        raise NotImplementedError
+
+    async def set_fields(self, client_id: str, fields: Dict[str, Any]) -> bool:
+        """Store job-owned fields, counted in ``job_version`` rather than ``version``; False if the client is missing"""
+        raise NotImplementedError
+
+    async def push_note_grams(self, client_id: str, grams: List[str],
+                              projection: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        """Add a note's search grams; returns the client, or None if it is missing"""
+        raise NotImplementedError
+
+    async def record_activity(self, client_id: str, at: datetime,
+                              projection: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        """Move ``last_activity_at`` forward to ``at``; returns the client, or None if it is missing"""
+        raise NotImplementedError
+
+    async def delete(self, client_id: str, projection: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def delete_many(self, ids: List[str], projection: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+        """Delete the clients that exist; returns them by id"""
+        raise NotImplementedError
+
+
+class MotorClientRepository(ClientRepository):
+    engine = "motor"
+
+    def __init__(self, db, list_read_preference=None):
+        self.collection = db.clients
+        # List, search, export and suggestion reads may go to secondaries
+        if list_read_preference is None:
+            self.list_collection = self.collection
+        else:
+            self.list_collection = self.collection.with_options(read_preference=list_read_preference)
+
+    async def find(self, client_id, projection):
+        return await self.collection.find_one({"id": client_id}, projection)
+
+    async def exists(self, client_id):
+        return await self.collection.find_one({"id": client_id}, {"_id": 1}) is not None
+
+    def find_many(self, ids, projection):
+        return self.collection.find({"id": {"$in": ids}}, projection)
+
+    def scan(self, projection):
+        return self.collection.find({}, projection)
+
+    def list(self, query, projection, after=None, until=None, skip=0, limit=None):
+        if query.empty:
+            return _Async([])
+        sort_keys = query.sort_keys
+        match: Dict[str, Any] = {}
+        if query.client_type:
+            match["type"] = query.client_type
+        bounds = []
+        if after:
+            bounds.append(keyset_filter(sort_keys, after))
+        if until:
+            bounds.append(until_filter(sort_keys, until))
+        keyset = bounds[0] if len(bounds) == 1 else {"$and": bounds} if bounds else None
+
+        if query.terms:
+            # The text score only exists inside the query, so search pages run as
+            # an aggregation that can range-filter on it.
+            match.update(terms_filter(list(query.terms)))
+            if query.owner:
+                # Only one $text per query, so the owner branches go alongside it
+                match["$or"] = [{field: query.owner} for field in OWNER_FIELDS]
+            pipeline = [
+                {"$match": match},
+                {"$addFields": {"score": {"$meta": "textScore"}}},
+            ]
+            if keyset:
+                pipeline.append({"$match": keyset})
+            pipeline.append({"$sort": dict(sort_spec(sort_keys))})
+            if skip:
+                pipeline.append({"$skip": skip})
+            if limit:
+                pipeline.append({"$limit": limit})
+            # $project cannot mix inclusion and exclusion; an exclusion keeps score anyway
+            pipeline.append({"$project": dict(projection, score=1) if is_inclusion(projection) else projection})
+            return self.list_collection.aggregate(pipeline)
+
+        if keyset:
+            match.update(keyset)
+        if query.owner:
+            match = owner_filter(query.owner, match)
+        cursor = self.list_collection.find(match, projection).sort(sort_spec(sort_keys)).skip(skip)
+        return cursor.limit(limit) if limit else cursor
+
+    async def suggest(self, q, client_type, limit):
+        query = suggest_filter(q, client_type)
+        if query is None:
+            return []
+        return await self.list_collection.find(query, SUGGEST_PROJECTION).limit(limit).to_list(length=limit)
+
+    async def count_by(self, path):
+        return {group["_id"]: group["count"] async for group in self.collection.aggregate(client_pipeline(path))}
+
+    async def count_owned(self, owner):
+        primary, secondary, total = await asyncio.gather(
+            self.list_collection.count_documents({"ownership.primary_owner": owner}),
+            self.list_collection.count_documents({"ownership.secondary_owners": owner}),
+            self.list_collection.count_documents(owner_filter(owner, {})),
+        )
+        return {"primary": primary, "secondary": secondary, "total": total}
+
+    async def insert(self, doc):
+        await self.collection.insert_one(doc)
+
+    async def insert_many(self, docs):
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            return [(error["index"], error.get("errmsg", "Write failed")) for error in exc.details.get("writeErrors", [])]
+        return []
+
+    async def update(self, client_id, fields, projection, if_match=None):
+        query = {"id": client_id}
+        if if_match:
+            precondition = if_match_filter(if_match)
+            if precondition is None:
+                return None
+            query.update(precondition)
+        return await self.collection.find_one_and_update(
+            query, {"$set": fields, "$inc": {"version": 1}}, projection=projection,
+        )
+
+    async def update_many(self, updates):
+        operations = [
+            UpdateOne(
+                {"id": before["id"], "version": before.get("version", {"$exists": False})},
+                {"$set": fields, "$inc": {"version": 1}},
+            )
+            for before, fields in updates
+        ]
+        try:
+            matched = (await self.collection.bulk_write(operations, ordered=False)).matched_count
+        except BulkWriteError as exc:
+            matched = exc.details.get("nMatched", 0)
+        if matched == len(updates):
+            return {before["id"] for before, _ in updates}
+        # Some clients changed after they were read; find out which writes landed
+        versions = {
+            doc["id"]: doc
+            async for doc in self.collection.find(
+                {"id": {"$in": [before["id"] for before, _ in updates]}},
+                {"_id": 0, "id": 1, "version": 1, "updated_at": 1},
+            )
+        }
+        return {
+            before["id"] for before, fields in updates
+            if versions.get(before["id"], {}).get("version") == before.get("version", 0) + 1
+            and versions[before["id"]].get("updated_at") == fields["updated_at"]
+        }
+
+    async def set_fields(self, client_id, fields):
+        result = await self.collection.update_one({"id": client_id}, {"$set": fields, "$inc": {"job_version": 1}})
+        return result.matched_count == 1
+
+    async def push_note_grams(self, client_id, grams, projection):
+        return await self.collection.find_one_and_update(
+            {"id": client_id}, {"$addToSet": {"search.notes": {"$each": grams}}}, projection=projection,
+        )
+
+    async def record_activity(self, client_id, at, projection):
+        return await self.collection.find_one_and_update(
+            {"id": client_id}, {"$max": {"last_activity_at": at}}, projection=projection,
+        )
+
+    async def delete(self, client_id, projection):
+        return await self.collection.find_one_and_delete({"id": client_id}, projection=projection)
+
+    async def delete_many(self, ids, projection):
+        # A client deleted by someone else between this read and the bulk write is
+        # counted twice in the stats rollups; manage.py rebuild-stats corrects that
+        found = {doc["id"]: doc async for doc in self.collection.find({"id": {"$in": ids}}, projection)}
+        if found:
+            await self.collection.bulk_write([DeleteOne({"id": client_id}) for client_id in found], ordered=False)
+        return found
+
+
+def _get(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _set(doc: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def is_inclusion(projection: Dict[str, int]) -> bool:
+    """Whether a Mongo projection lists the fields to keep (``_id`` aside) rather than those to drop"""
+    fields = [value for path, value in projection.items() if path != "_id"]
+    return bool(fields) and all(fields)
+
+
+def project(doc: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+    """A copy of ``doc`` shaped by a Mongo projection (inclusion, or top-level exclusion)"""
+    fields = {path: value for path, value in projection.items() if path != "_id"}
+    if is_inclusion(projection):
+        result: Dict[str, Any] = {}
+        for path in fields:
+            if "." not in path:
+                if path in doc:
+                    result[path] = doc[path]
+            elif _get(doc, path) is not None:
+                _set(result, path, _get(doc, path))
+    else:
+        result = {key: value for key, value in doc.items() if key not in fields}
+    return copy.deepcopy(result)
+
+
+def _stored(value: Any) -> Any:
+    """A deep copy as MongoDB would store it: datetimes keep millisecond precision"""
+    if isinstance(value, dict):
+        return {key: _stored(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_stored(item) for item in value]
+    if isinstance(value, datetime):
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+class _Async:
+    """Async iteration over rows already in hand"""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self._rows = iter(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class MemoryClientRepository(ClientRepository):
+    engine = "memory"
+
+    def __init__(self):
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        # Ascending (created_at, id) keys; None holds every client, the rest one type each
+        self._order: Dict[Optional[str], List[Tuple[datetime, str]]] = defaultdict(list)
+        self._primary: Dict[str, Set[str]] = defaultdict(set)
+        self._notes: Dict[str, Set[str]] = defaultdict(set)
+        # Ownership field -> owner -> ids
+        self._owned: Dict[str, Dict[str, Set[str]]] = {field: defaultdict(set) for field in OWNER_FIELDS}
+
+    def _owners(self, doc: Dict[str, Any], field: str) -> List[str]:
+        value = _get(doc, field)
+        return [owner for owner in (value if isinstance(value, list) else [value]) if owner]
+
+    def _index(self, doc: Dict[str, Any]) -> None:
+        key = (doc["created_at"], doc["id"])
+        insort(self._order[None], key)
+        insort(self._order[doc.get("type")], key)
+        search = doc.get("search") or {}
+        for gram in search.get("primary", []):
+            self._primary[gram].add(doc["id"])
+        for gram in search.get("notes", []):
+            self._notes[gram].add(doc["id"])
+        for field, postings in self._owned.items():
+            for owner in self._owners(doc, field):
+                postings[owner].add(doc["id"])
+
+    def _unindex(self, doc: Dict[str, Any]) -> None:
+        key = (doc["created_at"], doc["id"])
+        for order in (self._order[None], self._order[doc.get("type")]):
+            index = bisect_left(order, key)
+            if index < len(order) and order[index] == key:
+                del order[index]
+        search = doc.get("search") or {}
+        for postings, grams in ((self._primary, search.get("primary", [])), (self._notes, search.get("notes", []))):
+            for gram in grams:
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(doc["id"])
+                    if not ids:
+                        del postings[gram]
+        for field, postings in self._owned.items():
+            for owner in self._owners(doc, field):
+                ids = postings.get(owner)
+                if ids is not None:
+                    ids.discard(doc["id"])
+                    if not ids:
+                        del postings[owner]
+
+    def _apply(self, doc: Dict[str, Any], fields: Dict[str, Any], counter: str = "version") -> None:
+        self._unindex(doc)
+        for path, value in fields.items():
+            _set(doc, path, _stored(value))
+        doc[counter] = doc.get(counter, 0) + 1
+        self._index(doc)
+
+    async def find(self, client_id, projection):
+        doc = self._docs.get(client_id)
+        return project(doc, projection) if doc is not None else None
+
+    async def exists(self, client_id):
+        return client_id in self._docs
+
+    def find_many(self, ids, projection):
+        return _Async([project(self._docs[client_id], projection) for client_id in ids if client_id in self._docs])
+
+    def scan(self, projection):
+        return _Async([project(doc, projection) for doc in list(self._docs.values())])
+
+    def _score(self, client_id: str, terms: Tuple[str, ...]) -> float:
+        # Every term matched; name/contact hits outrank note-only ones
+        return float(sum(
+            TEXT_INDEX_WEIGHTS["search.primary"] if client_id in self._primary.get(term, ())
+            else TEXT_INDEX_WEIGHTS["search.notes"]
+            for term in terms
+        ))
+
+    def _owned_ids(self, owner: str) -> Set[str]:
+        return set().union(*(postings.get(owner, ()) for postings in self._owned.values()))
+
+    def _search_keys(self, query: ClientQuery) -> List[Tuple[float, datetime, str]]:
+        postings = [self._primary.get(term, set()) | self._notes.get(term, set()) for term in query.terms]
+        if query.owner:
+            postings.append(self._owned_ids(query.owner))
+        postings.sort(key=len)
+        ids = set.intersection(*postings) if postings else set()
+        keys = []
+        for client_id in ids:
+            doc = self._docs[client_id]
+            if query.client_type and doc.get("type") != query.client_type:
+                continue
+            keys.append((self._score(client_id, query.terms), doc["created_at"], client_id))
+        keys.sort(reverse=True)
+        return keys
+
+    def _owner_keys(self, query: ClientQuery) -> List[Tuple[datetime, str]]:
+        keys = []
+        for client_id in self._owned_ids(query.owner):
+            doc = self._docs[client_id]
+            if query.client_type and doc.get("type") != query.client_type:
+                continue
+            keys.append((doc["last_activity_at"], client_id))
+        keys.sort(reverse=True)
+        return keys
+
+    def list(self, query, projection, after=None, until=None, skip=0, limit=None):
+        if query.empty:
+            return _Async([])
+        if query.terms or query.owner:
+            keys = self._search_keys(query) if query.terms else self._owner_keys(query)
+            if after:
+                keys = [key for key in keys if key < tuple(after)]
+            if until:
+                keys = [key for key in keys if key >= tuple(until)]
+        else:
+            order = self._order.get(query.client_type, [])
+            high = bisect_left(order, tuple(after)) if after else len(order)
+            low = bisect_left(order, tuple(until)) if until else 0
+            keys = order[low:high][::-1]
+        keys = keys[skip:skip + limit] if limit else keys[skip:]
+
+        def rows():
+            # Keys are a snapshot; rows are read as they are consumed
+            for key in keys:
+                doc = self._docs.get(key[-1])
+                if doc is None:
+                    continue
+                row = project(doc, projection)
+                if query.terms:
+                    row["score"] = key[0]
+                yield row
+
+        return _Async(rows())
+
+    async def suggest(self, q, client_type, limit):
+        terms = suggest_terms(q)
+        if not terms:
+            return []
+        found = []
+        for created_at, client_id in reversed(self._order.get(client_type, [])):
+            doc = self._docs[client_id]
+            keys = (doc.get("search") or {}).get("keys", [])
+            if all(any(key.startswith(term) for key in keys) for term in terms):
+                found.append(project(doc, SUGGEST_PROJECTION))
+                if len(found) >= limit:
+                    break
+        return found
+
+    async def count_by(self, path):
+        return dict(Counter(_get(doc, path) for doc in self._docs.values()))
+
+    async def count_owned(self, owner):
+        return {
+            "primary": len(self._owned["ownership.primary_owner"].get(owner, ())),
+            "secondary": len(self._owned["ownership.secondary_owners"].get(owner, ())),
+            "total": len(self._owned_ids(owner)),
+        }
+
+    def _insert(self, doc: Dict[str, Any]) -> None:
+        if doc["id"] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: clients index: id dup key: {doc['id']}")
+        stored = _stored({key: value for key, value in doc.items() if key != "_id"})
+        self._docs[stored["id"]] = stored
+        self._index(stored)
+
+    async def insert(self, doc):
+        self._insert(doc)
+
+    async def insert_many(self, docs):
+        errors = []
+        for index, doc in enumerate(docs):
+            try:
+                self._insert(doc)
+            except DuplicateKeyError as exc:
+                errors.append((index, str(exc)))
+        return errors
+
+    async def update(self, client_id, fields, projection, if_match=None):
+        doc = self._docs.get(client_id)
+        if doc is None or (if_match and not if_match_allows(if_match, client_etag(doc))):
+            return None
+        before = project(doc, projection)
+        self._apply(doc, fields)
+        return before
+
+    async def update_many(self, updates):
+        updated = set()
+        for before, fields in updates:
+            doc = self._docs.get(before["id"])
+            if doc is not None and doc.get("version", 0) == before.get("version", 0):
+                self._apply(doc, fields)
+                updated.add(before["id"])
+        return updated
+
+    async def set_fields(self, client_id, fields):
+        doc = self._docs.get(client_id)
+        if doc is None:
+            return False
+        self._apply(doc, fields, counter="job_version")
+        return True
+
+    async def push_note_grams(self, client_id, grams, projection):
+        doc = self._docs.get(client_id)
+        if doc is None:
+            return None
+        before = project(doc, projection)
+        notes = doc.setdefault("search", {}).setdefault("notes", [])
+        for gram in grams:
+            if gram not in self._notes or client_id not in self._notes[gram]:
+                notes.append(gram)
+                self._notes[gram].add(client_id)
+        return before
+
+    async def record_activity(self, client_id, at, projection):
+        doc = self._docs.get(client_id)
+        if doc is None:
+            return None
+        before = project(doc, projection)
+        at = _stored(at)
+        if doc.get("last_activity_at") is None or doc["last_activity_at"] < at:
+            doc["last_activity_at"] = at
+        return before
+
+    async def delete(self, client_id, projection):
+        doc = self._docs.pop(client_id, None)
+        if doc is None:
+            return None
+        self._unindex(doc)
+        return project(doc, projection)
+
+    async def delete_many(self, ids, projection):
+        found = {}
+        for client_id in ids:
+            doc = await self.delete(client_id, projection)
+            if doc is not None:
+                found[client_id] = doc
+        return found
+
+
+def create_client_repository(db, engine: Optional[str] = None, list_read_preference=None) -> ClientRepository:
+    """The engine named by ``engine`` or STORAGE_ENGINE (motor or memory)"""
+    engine = (engine or os.getenv("STORAGE_ENGINE", "motor")).lower()
+    if engine == "motor":
+        return MotorClientRepository(db, list_read_preference)
+    if engine == "memory":
+        return MemoryClientRepository()
+    raise ValueError(f"Unknown STORAGE_ENGINE {engine!r}; expected motor or memory")
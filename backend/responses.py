@@ -0,0 +1,89 @@
+"""Opt-in fast path for read responses (FAST_RESPONSES=true), and streamed JSON arrays.
+
+By default read handlers return Mongo documents through their
+``response_model``, so FastAPI re-validates every row and walks it with
+``jsonable_encoder`` before the stdlib encoder runs.  Documents this
+server wrote already have the model's shape, so the fast path only checks
+that a row's keys fit the model, drops internal keys, and hands it
+straight to orjson, which encodes datetimes natively.  Rows that
+fail the key check (older or hand-edited documents) still go through the
+model, so the output is the same either way.
+"""
+import os
+from functools import lru_cache
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Tuple, Type
+
+from pydantic import BaseModel
+
+# Query artifacts and ETag bookkeeping that are never part of a response body
+INTERNAL_KEYS = {"_id", "score", "job_version"}
+
+
+def fast_responses() -> bool:
+    """FAST_RESPONSES, read when the app is built; orjson must be installed to turn it on"""
+    enabled = os.getenv("FAST_RESPONSES", "false").lower() in ("1", "true", "yes")
+    if enabled:
+        try:
+            import orjson  # noqa: F401
+        except ImportError as exc:
+            raise RuntimeError("FAST_RESPONSES requires the 'orjson' package") from exc
+    return enabled
+
+
+@lru_cache(maxsize=None)
+def _field_keys(model: Type[BaseModel], exclude_unset: bool) -> Tuple[frozenset, frozenset]:
+    """(keys a trusted row must have, keys it may have) for ``model``"""
+    allowed = frozenset(model.model_fields)
+    if not exclude_unset:
+        # Defaults must be filled in, so every declared field is needed
+        return allowed, allowed
+    required = frozenset(name for name, field in model.model_fields.items() if field.is_required())
+    return required, allowed
+
+
+def trusted_rows(
+    docs: Iterable[Dict[str, Any]],
+    model: Type[BaseModel],
+    exclude_unset: bool = False,
+) -> List[Dict[str, Any]]:
+    """Rows ready for encoding; only documents whose keys don't fit ``model`` are validated"""
+    required, allowed = _field_keys(model, exclude_unset)
+    rows = []
+    for doc in docs:
+        if not INTERNAL_KEYS.isdisjoint(doc):
+            doc = {key: value for key, value in doc.items() if key not in INTERNAL_KEYS}
+        if not required <= doc.keys() <= allowed:
+            doc = model.model_validate(doc).model_dump(exclude_unset=exclude_unset)
+        rows.append(doc)
+    return rows
+
+
+async def json_array(
+    docs: AsyncIterable[Dict[str, Any]],
+    model: Type[BaseModel],
+    exclude_unset: bool = False,
+    fast: bool = False,
+    chunk_size: int = 64 * 1024,
+) -> AsyncIterator[bytes]:
+    """Encode rows as one JSON array while the cursor yields them.
+
+    Output is flushed every ``chunk_size`` bytes, so memory stays bounded
+    however many rows there are.  Rows are encoded the way the response
+    model would encode them, or with orjson when ``fast`` is set.
+    """
+    if fast:
+        import orjson
+    buffer = bytearray(b"[")
+    separator = b""
+    async for doc in docs:
+        buffer += separator
+        separator = b","
+        if fast:
+            buffer += orjson.dumps(trusted_rows([doc], model, exclude_unset)[0])
+        else:
+            buffer += model.model_validate(doc).model_dump_json(exclude_unset=exclude_unset).encode()
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
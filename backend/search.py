@@ -0,0 +1,140 @@
+"""Client search: prefix n-gram maintenance and text-index query building.
+
+Every client document carries a ``search`` sub-document with edge n-grams
+(prefixes) of its searchable fields.  A MongoDB text index over those
+arrays lets search-as-you-type queries run off the index instead of
+regex-scanning the whole collection, and the text score gives relevance
+ranking for free.
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import TEXT
+
+# Searchable keys inside Client.data (person and company layouts)
+PRIMARY_FIELDS = [
+    "first_name",
+    "last_name",
+    "company_name",
+    "contact_person",
+    "email",
+    "phone",
+    "company",
+]
+
+# Fields the typeahead matches on (see suggest.py)
+SUGGEST_FIELDS = ["first_name", "last_name", "company_name", "email"]
+
+MIN_GRAM = 2
+MAX_GRAM = 15
+MAX_QUERY_TERMS = 8
+
+TEXT_INDEX_NAME = "client_search"
+TEXT_INDEX_KEYS = [("search.primary", TEXT), ("search.notes", TEXT)]
+# Name/contact matches outrank hits that only occur in notes
+TEXT_INDEX_WEIGHTS = {"search.primary": 10, "search.notes": 1}
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip diacritics so 'José' and 'jose' share grams."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: Any) -> List[str]:
+    """Split a value into folded alphanumeric tokens."""
+    if text is None:
+        return []
+    return _TOKEN_RE.findall(_fold(str(text)))
+
+
+def _field_tokens(key: str, value: Any) -> List[str]:
+    tokens = tokenize(value)
+    if key == "phone":
+        # Also index the bare digit string so "5550123" finds "+1-555-0123"
+        digits = "".join(ch for ch in str(value) if ch.isdigit())
+        if digits:
+            tokens.append(digits)
+    return tokens
+
+
+def edge_grams(tokens: Iterable[str]) -> List[str]:
+    """Return the sorted, de-duplicated prefixes of each token."""
+    grams = set()
+    for token in tokens:
+        if len(token) < MIN_GRAM:
+            continue
+        for size in range(MIN_GRAM, min(len(token), MAX_GRAM) + 1):
+            grams.add(token[:size])
+    return sorted(grams)
+
+
+def primary_grams(data: Dict[str, Any]) -> List[str]:
+    """Grams for the name/contact fields of a client's ``data`` dict."""
+    tokens: List[str] = []
+    for key in PRIMARY_FIELDS:
+        if data.get(key):
+            tokens.extend(_field_tokens(key, data[key]))
+    return edge_grams(tokens)
+
+
+def suggest_keys(data: Dict[str, Any]) -> List[str]:
+    """Whole tokens of the typeahead fields, for anchored prefix lookups."""
+    tokens = set()
+    for key in SUGGEST_FIELDS:
+        if data.get(key):
+            tokens.update(tokenize(data[key]))
+    return sorted(tokens)
+
+
+def note_grams(content: str) -> List[str]:
+    """Grams for the text of a single note."""
+    return edge_grams(tokenize(content))
+
+
+def build_search_fields(data: Dict[str, Any], notes: Iterable[str] = ()) -> Dict[str, List[str]]:
+    """Build the ``search`` sub-document stored alongside a client."""
+    note_tokens: List[str] = []
+    for content in notes:
+        note_tokens.extend(tokenize(content))
+    return {"primary": primary_grams(data), "notes": edge_grams(note_tokens), "keys": suggest_keys(data)}
+
+
+def query_terms(search: str) -> List[str]:
+    """Normalize a user search string into index terms.
+
+    Tokens are reduced to ``[^\\W_]+`` runs, so no user input ever reaches
+    the ``$text`` parser with quoting or negation operators in it.
+    """
+    terms: List[str] = []
+    for token in tokenize(search):
+        term = token[:MAX_GRAM]
+        if len(term) >= MIN_GRAM and term not in terms:
+            terms.append(term)
+    return terms[:MAX_QUERY_TERMS]
+
+
+def build_search_filter(search: str) -> Optional[Dict[str, Any]]:
+    """Return the Mongo filter for a search string, or None if it has no usable terms.
+
+    ``$text`` drives the query off the index and ORs the terms for scoring;
+    the ``$and`` clause then requires every term to be present, so typing
+    more narrows the results the way the old regex search did.
+    """
+    return terms_filter(query_terms(search))
+
+
+def terms_filter(terms: List[str]) -> Optional[Dict[str, Any]]:
+    """``build_search_filter`` for terms already normalized by ``query_terms``."""
+    if not terms:
+        return None
+    return {
+        "$text": {"$search": " ".join(terms)},
+        "$and": [
+            {"$or": [{"search.primary": term}, {"search.notes": term}]}
+            for term in terms
+        ],
+    }
@@ -0,0 +1,218 @@
+"""Production entry point: the API under uvicorn, or under gunicorn with uvicorn workers.
+
+Usage:
+    python serve.py [--workers N] [--host HOST] [--port PORT] [--manager uvicorn|gunicorn]
+
+Each option can also be set in the environment or .env:
+
+    SERVE_HOST                      default 0.0.0.0
+    SERVE_PORT                      default 8001
+    SERVE_WORKERS                   worker processes (default 1); 0 means one per available core
+    SERVE_MANAGER                   uvicorn (default), or gunicorn, which also replaces
+                                    workers that die (needs the gunicorn package)
+    SERVE_LOOP                      auto (uvloop when installed), uvloop or asyncio
+    SERVE_HTTP                      auto (httptools when installed), httptools or h11
+    SERVE_KEEPALIVE_SECONDS         close idle keep-alive connections after this long (default 5);
+                                    keep it above a fronting load balancer's idle timeout
+    SERVE_BACKLOG                   listen backlog (default 2048)
+    SERVE_LIMIT_CONCURRENCY         connections plus in-flight requests per worker beyond which
+                                    new requests get 503 (default: unlimited)
+    SERVE_GRACEFUL_TIMEOUT_SECONDS  how long in-flight requests may run after SIGTERM (default 30)
+    SERVE_ACCESS_LOG                log every request (default false; /api/metrics has the figures)
+
+On SIGTERM each worker stops accepting connections, lets in-flight
+requests finish (for up to the graceful timeout) and then runs the app's
+lifespan shutdown: job workers stop, the change feed closes and the Mongo
+client disconnects.
+
+Every worker is a process with its own Mongo pool (workers x
+MONGO_MAX_POOL_SIZE connections in all).  Several workers are only
+started when nothing else is per process either:
+
+    STORAGE_ENGINE=motor and a real MONGO_URL (not mongomock://)
+    CACHE_BACKEND=redis or none, so list generations and cached records
+        (and the ETags derived from them) are shared
+    CHANGE_FEED=changestream, so every worker's SSE subscribers and
+        suggestion index see every worker's writes
+    STREAM_TICKET_SECRET set, so a stream ticket issued by one worker
+        opens the stream on any other
+"""
+import argparse
+import importlib.util
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from database import DEFAULT_MONGO_URL, MOCK_SCHEME
+
+APP = "server:app"
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MANAGERS = ["uvicorn", "gunicorn"]
+LOOPS = {"uvloop": "uvloop", "asyncio": None}
+HTTP_IMPLEMENTATIONS = {"httptools": "httptools", "h11": "h11"}
+
+
+def available_cores() -> int:
+    try:
+        # Honours CPU affinity (taskset, container cpusets); Linux only
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _installed(module: Optional[str]) -> bool:
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def _choose(setting: str, value: str, choices: Dict[str, Optional[str]]) -> str:
+    """Resolve ``auto`` to the first installed choice; an explicit choice must be installed"""
+    if value == "auto":
+        return next(name for name, module in choices.items() if _installed(module))
+    if value not in choices:
+        raise ValueError(f"Unknown {setting} {value!r}; expected auto or {' or '.join(choices)}")
+    if not _installed(choices[value]):
+        raise RuntimeError(f"{setting}={value} requires the '{choices[value]}' package")
+    return value
+
+
+def single_process_settings() -> List[str]:
+    """Settings that keep state inside one process, so only one worker can serve them"""
+    reasons = []
+    if os.getenv("STORAGE_ENGINE", "motor").lower() == "memory":
+        reasons.append("STORAGE_ENGINE=memory")
+    if os.getenv("MONGO_URL", DEFAULT_MONGO_URL).startswith(MOCK_SCHEME):
+        reasons.append(f"MONGO_URL={MOCK_SCHEME}")
+    cache_backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if cache_backend not in ("redis", "none"):
+        reasons.append(f"CACHE_BACKEND={cache_backend} (use redis or none)")
+    change_feed = os.getenv("CHANGE_FEED", "auto").lower()
+    if change_feed != "changestream":
+        reasons.append(f"CHANGE_FEED={change_feed} (use changestream)")
+    if not os.getenv("STREAM_TICKET_SECRET"):
+        reasons.append("STREAM_TICKET_SECRET unset (stream tickets would only work on the worker that issued them)")
+    return reasons
+
+
+def serve_settings(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Server options from the SERVE_* variables and ``overrides``, resolved and checked"""
+    limit = os.getenv("SERVE_LIMIT_CONCURRENCY", "").strip()
+    settings: Dict[str, Any] = {
+        "host": os.getenv("SERVE_HOST", "0.0.0.0"),
+        "port": int(os.getenv("SERVE_PORT", "8001")),
+        "workers": int(os.getenv("SERVE_WORKERS", "1")),
+        "manager": os.getenv("SERVE_MANAGER", "uvicorn").lower(),
+        "loop": os.getenv("SERVE_LOOP", "auto").lower(),
+        "http": os.getenv("SERVE_HTTP", "auto").lower(),
+        "keepalive": int(os.getenv("SERVE_KEEPALIVE_SECONDS", "5")),
+        "backlog": int(os.getenv("SERVE_BACKLOG", "2048")),
+        "limit_concurrency": int(limit) if limit else None,
+        "graceful_timeout": int(os.getenv("SERVE_GRACEFUL_TIMEOUT_SECONDS", "30")),
+        "access_log": os.getenv("SERVE_ACCESS_LOG", "false").lower() == "true",
+    }
+    settings.update({key: value for key, value in (overrides or {}).items() if value is not None})
+
+    if settings["manager"] not in MANAGERS:
+        raise ValueError(f"Unknown SERVE_MANAGER {settings['manager']!r}; expected {' or '.join(MANAGERS)}")
+    if settings["manager"] == "gunicorn" and not _installed("gunicorn"):
+        raise RuntimeError("SERVE_MANAGER=gunicorn requires the 'gunicorn' package")
+    settings["loop"] = _choose("SERVE_LOOP", settings["loop"], LOOPS)
+    settings["http"] = _choose("SERVE_HTTP", settings["http"], HTTP_IMPLEMENTATIONS)
+
+    if not settings["workers"]:
+        settings["workers"] = available_cores()
+    reasons = single_process_settings()
+    if settings["workers"] > 1 and reasons:
+        raise ValueError(
+            f"{settings['workers']} workers would each keep their own state under {', '.join(reasons)}; "
+            "run one worker or change those settings"
+        )
+    return settings
+
+
+def run_uvicorn(settings: Dict[str, Any]) -> None:
+    import uvicorn
+
+    # With workers > 1 uvicorn supervises that many processes, each importing APP
+    uvicorn.run(
+        APP,
+        app_dir=APP_DIR,
+        host=settings["host"],
+        port=settings["port"],
+        workers=settings["workers"],
+        loop=settings["loop"],
+        http=settings["http"],
+        lifespan="on",
+        timeout_keep_alive=settings["keepalive"],
+        backlog=settings["backlog"],
+        limit_concurrency=settings["limit_concurrency"],
+        timeout_graceful_shutdown=settings["graceful_timeout"],
+        access_log=settings["access_log"],
+    )
+
+
+def run_gunicorn(settings: Dict[str, Any]) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        # Uvicorn options gunicorn has no setting for; keep-alive and backlog are passed below
+        CONFIG_KWARGS = {
+            "loop": settings["loop"],
+            "http": settings["http"],
+            "lifespan": "on",
+            "limit_concurrency": settings["limit_concurrency"],
+            "timeout_graceful_shutdown": settings["graceful_timeout"],
+            "access_log": settings["access_log"],
+        }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{settings['host']}:{settings['port']}",
+                "workers": settings["workers"],
+                "worker_class": Worker,
+                "keepalive": settings["keepalive"],
+                "backlog": settings["backlog"],
+                # Gunicorn kills workers still draining after this long
+                "graceful_timeout": settings["graceful_timeout"],
+                "accesslog": "-" if settings["access_log"] else None,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Runs in each worker after the fork, so no worker inherits a Mongo client
+            sys.path.insert(0, APP_DIR)
+            import server
+            return server.app
+
+    Application().run()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", help="Interface to bind (SERVE_HOST)")
+    parser.add_argument("--port", type=int, help="Port to bind (SERVE_PORT)")
+    parser.add_argument("--workers", type=int, help="Worker processes, 0 for one per core (SERVE_WORKERS)")
+    parser.add_argument("--manager", choices=MANAGERS, help="Process manager (SERVE_MANAGER)")
+    args = parser.parse_args(argv)
+    load_dotenv()
+    try:
+        settings = serve_settings(vars(args))
+    except (RuntimeError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+    print(
+        f"Serving {APP} on {settings['host']}:{settings['port']} with {settings['workers']} "
+        f"{settings['manager']} worker(s), loop={settings['loop']}, http={settings['http']}",
+        file=sys.stderr,
+    )
+    (run_gunicorn if settings["manager"] == "gunicorn" else run_uvicorn)(settings)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,50 +1,257 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Query
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, status, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Iterable, List, Optional, Dict, Any, Mapping
+from collections import Counter
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
 import os
+import secrets
 import uuid
-import re
 from dotenv import load_dotenv
 
-load_dotenv()
+from bulk import (
+    CSV_CONTENT_TYPES,
+    CSV_MEDIA_TYPE,
+    NDJSON_CONTENT_TYPES,
+    NDJSON_MEDIA_TYPE,
+    csv_header,
+    csv_row,
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+    ndjson_line,
+)
+from cache import create_cache
+from compression import CompressionMiddleware, compression_settings
+from etag import CACHE_CONTROL, client_etag, if_match_allows, list_etag, none_match
+from events import EVENT_PROJECTION, client_event, create_change_feed, sse_stream
+from indexes import ensure_indexes, verify_query_plans
+from jobs import create_job_queue
+from metrics import DB_CALLS_HEADER, DB_TIME_HEADER, DBCommandListener, Metrics, MetricsMiddleware, PoolListener
+from pagination import (
+    NEXT_CURSOR_HEADER,
+    cursor_for,
+    decode_cursor,
+    keyset_filter,
+    sort_spec,
+    split_page,
+)
+from repository import ClientQuery, client_query, create_client_repository
+from responses import fast_responses, json_array, trusted_rows
+from singleflight import SingleFlight, Superseded, SupersedingLimiter
+from search import (
+    build_search_fields,
+    note_grams,
+    primary_grams,
+    suggest_keys,
+)
+from stats import (
+    activity_deltas,
+    activity_stats,
+    apply_deltas,
+    client_activity_deltas,
+    client_deltas,
+    client_stats,
+    live_activity_stats,
+    live_client_stats,
+)
+from suggest import SuggestIndex, suggestion
 
-app = FastAPI(title="Enterprise Client Management API", version="1.0.0")
+# Services shared by the handlers. create_app() builds them from the
+# environment and lifespan() opens their connections, so importing this
+# module reads no configuration and connects to nothing.
+metrics = None  # Request and DB metrics (see metrics.py)
+cache = None  # Read-through cache (see cache.py)
+authenticator = None  # Mock token or Microsoft Entra ID, per AUTH_MODE (see auth.py)
+stream_tickets = None  # Short-lived query-string credentials for the change stream (see auth.py)
+change_feed = None  # Change events for GET /api/clients/stream (see events.py)
+suggest_index = None  # Typeahead over names and emails, loaded at startup and fed by the change feed
+job_queue = None  # SharePoint provisioning and QuickBooks sync (see jobs.py and integrations.py)
+sharepoint = None
+quickbooks = None
+list_flights = None  # Identical list queries in flight are joined (see singleflight.py)
+search_limiter = None  # A search box's newer search cancels its older ones (X-Search-Session)
+FAST_RESPONSES = False  # See responses.py
 
-# CORS configuration
-origins = [
-    "http://localhost:3000",  # React dev server
-    "http://127.0.0.1:3000",
-]
+# Database connection and client storage (see repository.py), opened by lifespan()
+client = None
+db = None
+repository = None
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, repository
+    from database import create_client as create_mongo_client, get_database, list_read_preference
+    
+    # Pool size, timeouts, compression etc. come from MONGO_* (see database.py)
+    client = create_mongo_client([DBCommandListener(metrics), PoolListener(metrics)])
+    db = get_database(client)
+    repository = create_client_repository(db, list_read_preference=list_read_preference())
+    # Independent round trips, so the worker is ready after the slowest rather
+    # than their sum. Creating an existing index (see indexes.py) is a no-op.
+    await asyncio.gather(ensure_indexes(db), authenticator.start())
+    if repository.engine == "motor":
+        # A change stream cannot see the in-memory engine's writes
+        await change_feed.start(db)
+    await suggest_index.start(repository)
+    await job_queue.start(db)
+    yield
+    await job_queue.stop()
+    await suggest_index.stop()
+    await change_feed.stop()
+    await authenticator.stop()
+    client.close()
+
+def create_app(settings: Optional[Mapping[str, str]] = None) -> FastAPI:
+    """Build the app and the services its handlers share.
+    
+    ``settings`` take precedence over the environment and .env, under the
+    same names (MONGO_URL, STORAGE_ENGINE, ...).  Every module reads its
+    configuration from the process environment as its part is built, so
+    they are written there: a process serves one app, and the latest one
+    built is ``server.app``.  Nothing connects until the lifespan runs.
+    """
+    global app, metrics, cache, authenticator, stream_tickets, change_feed, suggest_index, job_queue, sharepoint, quickbooks
+    global list_flights, search_limiter, FAST_RESPONSES, STREAM_MIN_LIMIT, METRICS_TOKEN
+    # Only needed here, and only some modes need what they import (python-jose for entra)
+    from auth import create_authenticator, create_stream_tickets
+    from integrations import create_quickbooks_client, create_sharepoint_client
+    
+    load_dotenv()
+    os.environ.update(settings or {})
+    
+    metrics = Metrics()
+    cache = create_cache()
+    authenticator = create_authenticator()
+    stream_tickets = create_stream_tickets()
+    change_feed = create_change_feed(SUMMARY_FIELDS)
+    suggest_index = SuggestIndex()
+    # Fed by the change feed, so it also sees other workers' writes when change streams are on
+    change_feed.bus.listen(suggest_index.apply)
+    job_queue = create_job_queue()
+    job_queue.register(PROVISION_SHAREPOINT, provision_sharepoint)
+    job_queue.register(SYNC_QUICKBOOKS, sync_quickbooks)
+    sharepoint = create_sharepoint_client()
+    quickbooks = create_quickbooks_client()
+    list_flights = SingleFlight("list_clients", metrics)
+    search_limiter = SupersedingLimiter("search_clients", int(os.getenv("SEARCH_MAX_IN_FLIGHT_PER_USER", "1")), metrics)
+    FAST_RESPONSES = fast_responses()
+    STREAM_MIN_LIMIT = int(os.getenv("LIST_STREAM_MIN_LIMIT", "200"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    
+    app = FastAPI(title="Enterprise Client Management API", version="1.0.0", lifespan=lifespan)
+    
+    # CORS configuration
+    origins = [
+        "http://localhost:3000",  # React dev server
+        "http://127.0.0.1:3000",
+    ]
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", DB_CALLS_HEADER, DB_TIME_HEADER],
+    )
+    
+    # Negotiated zstd/br/gzip for bodies over COMPRESSION_MIN_SIZE (see compression.py)
+    app.add_middleware(CompressionMiddleware, **compression_settings())
+    
+    # Per-route latency, size and status, plus DB commands attributed to the
+    # request that issued them (see metrics.py). Added last so it times CORS too.
+    app.add_middleware(
+        MetricsMiddleware,
+        metrics=metrics,
+        debug_headers=os.getenv("METRICS_DEBUG_HEADERS", "false").lower() == "true",
+    )
+    
+    app.include_router(router)
+    return app
+
+def __getattr__(name: str):
+    # ``uvicorn server:app`` and other readers of server.app build it on
+    # first use; create_app() replaces it afterwards
+    if name == "app":
+        return create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+router = APIRouter()
+
+# List pages are cached under a generation counter that every write
+# affecting list results bumps
+LIST_GENERATION_KEY = "clients:generation"
+
+# A client's record is cached under its own generation, bumped by every
+# write, so a read that raced a write can only fill a key nobody reads
+# again.  Generations outlive the records cached under them, so one that
+# expires cannot bring an old record back.
+GENERATION_TTL_FACTOR = 10
+
+def client_generation_key(client_id: str) -> str:
+    return f"client-generation:{client_id}"
 
-# Database connection
-MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/client_management")
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.client_management
+async def client_cache_key(client_id: str) -> str:
+    generation = await cache.counter(client_generation_key(client_id))
+    return f"client:{client_id}:{generation}"
+
+async def list_cache_key(params: Dict[str, Any]) -> str:
+    generation = await cache.counter(LIST_GENERATION_KEY)
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"client-pages:{generation}:{digest}"
+
+async def invalidate_lists():
+    await cache.incr(LIST_GENERATION_KEY)
+
+async def invalidate_records(client_ids: Iterable[str]):
+    ttl = cache.default_ttl * GENERATION_TTL_FACTOR
+    await asyncio.gather(*(cache.incr(client_generation_key(client_id), ttl=ttl) for client_id in client_ids))
+
+async def invalidate_client(client_id: str):
+    await invalidate_records([client_id])
+    await invalidate_lists()
 
 # Security
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-# Mock authentication (replace with real Microsoft Entra ID)
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    # Mock authentication - replace with real Microsoft Entra ID validation
-    if credentials.credentials == "mock-token":
-        return {"sub": "mock-user", "email": "user@company.com", "name": "Mock User"}
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid authentication credentials"
-    )
+    user = await authenticator.authenticate(credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    return user
+
+async def get_metrics_reader(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Prometheus scrapes with a static bearer token (METRICS_TOKEN); people sign in as usual
+    if METRICS_TOKEN and secrets.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return {"sub": "metrics", "email": None, "name": "Metrics scraper"}
+    return await get_current_user(credentials)
+
+async def get_stream_user(
+    ticket: Optional[str] = Query(None, description="Ticket from POST /api/clients/stream/ticket, for EventSource clients that cannot send headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    # Bearer tokens never go in the query string, where proxies and browser history keep them
+    if credentials:
+        user = await authenticator.authenticate(credentials.credentials)
+    else:
+        user = stream_tickets.redeem(ticket) if ticket else None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    return user
 
 # Pydantic Models
 class PersonData(BaseModel):
@@ -114,11 +321,102 @@ class Client(BaseModel):
     quickbooks: QuickBooksData = Field(default_factory=QuickBooksData)
     documents: DocumentsData = Field(default_factory=DocumentsData)
     credentials: CredentialsData = Field(default_factory=CredentialsData)
-    notes: List[Note] = []
-    tracking: List[TrackingEntry] = []
     ownership: OwnershipData
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = 1  # Incremented on every update; part of the ETag
+
+class ClientSuggestion(BaseModel):
+    id: str
+    name: str
+    type: str
+
+class ClientSummary(BaseModel):
+    """List row: the summary fields plus whichever sections were requested via expand"""
+    id: str
+    type: str
+    data: Dict[str, Any]
+    ownership: OwnershipData
+    created_at: datetime
+    updated_at: datetime
+    version: Optional[int] = None
+    last_activity_at: Optional[datetime] = None
+    quickbooks: Optional[QuickBooksData] = None
+    documents: Optional[DocumentsData] = None
+    credentials: Optional[CredentialsData] = None
+
+class OwnerCounts(BaseModel):
+    primary: int
+    secondary: int
+    total: int
+
+class MyClientsPage(BaseModel):
+    owner: str
+    counts: Optional[OwnerCounts] = None  # First page only
+    clients: List[ClientSummary]
+
+# Fields always returned by the list endpoint, and the heavy sections callers can opt into
+SUMMARY_FIELDS = ["id", "type", "data", "ownership", "created_at", "updated_at", "version"]
+EXPANDABLE_FIELDS = ["quickbooks", "documents", "credentials"]
+
+# Full client record minus internal search grams, legacy embedded activity
+# arrays and the worklist sort key (which tracking entries move without a
+# version bump, so it stays out of cached records and ETags)
+CLIENT_PROJECTION = {"_id": 0, "search": 0, "notes": 0, "tracking": 0, "last_activity_at": 0}
+
+# owner=me stands for the caller
+OWNER_ME = "me"
+
+# SharePoint provisioning and QuickBooks sync run as durable background jobs;
+# handlers only enqueue them
+PROVISION_SHAREPOINT = "sharepoint.provision"
+SYNC_QUICKBOOKS = "quickbooks.sync"
+
+def provisioning_jobs(client_doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Jobs for a new client: its SharePoint folder and QuickBooks customer"""
+    return [job_queue.job(PROVISION_SHAREPOINT, client_doc["id"]), *sync_jobs(client_doc)]
+
+def sync_jobs(client_doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Without QUICKBOOKS_API_URL the job would only skip, so edits don't pay for queueing it
+    if not quickbooks.enabled:
+        return []
+    # One sync per client version; re-enqueuing the same version is a no-op
+    return [job_queue.job(
+        SYNC_QUICKBOOKS, client_doc["id"],
+        idempotency_key=f"{SYNC_QUICKBOOKS}:{client_doc['id']}:{client_doc.get('version', 0)}",
+    )]
+
+def summary_projection(expand: Optional[str]) -> Dict[str, int]:
+    """Mongo projection for list rows; raises HTTP 400 for unknown expand sections"""
+    requested = [field.strip() for field in (expand or "").split(",") if field.strip()]
+    unknown = [field for field in requested if field not in EXPANDABLE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown expand field(s): {', '.join(unknown)}. Allowed: {', '.join(EXPANDABLE_FIELDS)}"
+        )
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in SUMMARY_FIELDS + requested})
+    if requested:
+        # Expanded sections are written by jobs, which only bump job_version
+        projection["job_version"] = 1
+    return projection
+
+def resolve_owner(owner: Optional[str], current_user: dict) -> Optional[str]:
+    """The ownership value to filter on: ``me`` is the caller's email (or subject), anything else is used as given"""
+    if owner != OWNER_ME:
+        return owner or None
+    identity = current_user.get("email") or current_user.get("sub")
+    if not identity:
+        raise HTTPException(status_code=400, detail="The current user has no email or subject to match owners against")
+    return identity
+
+def list_projection(query: ClientQuery, expand: Optional[str]) -> Dict[str, int]:
+    """Projection for list rows, plus the worklist sort key on owner-filtered pages"""
+    projection = summary_projection(expand)
+    if "last_activity_at" in query.sort_keys:
+        projection["last_activity_at"] = 1
+    return projection
 
 class ClientCreate(BaseModel):
     type: str
@@ -134,129 +432,616 @@ class ClientUpdate(BaseModel):
     ownership: Optional[OwnershipData] = None
 
 # API Routes
-@app.get("/api/health")
+@router.get("/api/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
-@app.get("/api/clients", response_model=List[Client])
+@router.get("/api/clients", response_model=List[ClientSummary], response_model_exclude_unset=True)
 async def get_clients(
+    response: Response,
     search: Optional[str] = Query(None, description="Search term for real-time search"),
     client_type: Optional[str] = Query(None, description="Filter by client type: person, company"),
-    limit: int = Query(50, description="Number of clients to return"),
-    skip: int = Query(0, description="Number of clients to skip"),
+    owner: Optional[str] = Query(None, description="Only clients this owner owns or co-owns, most recently active first; 'me' for the caller"),
+    limit: int = Query(50, ge=1, le=1000, description="Number of clients to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Number of clients to skip; use cursor instead"),
+    expand: Optional[str] = Query(None, description="Comma-separated extra sections: quickbooks, documents, credentials"),
+    if_none_match: Optional[str] = Header(None),
+    x_search_session: Optional[str] = Header(None, description="Id of the search box sending this search (e.g. one per browser tab); its newer searches supersede older ones"),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get clients with optional search and filtering"""
-    query = {}
-    
-    # Add type filter
-    if client_type and client_type in ["person", "company"]:
-        query["type"] = client_type
-    
-    # Add search functionality
-    if search:
-        search_pattern = re.compile(search, re.IGNORECASE)
-        query["$or"] = [
-            {"data.first_name": search_pattern},
-            {"data.last_name": search_pattern},
-            {"data.company_name": search_pattern},
-            {"data.contact_person": search_pattern},
-            {"data.email": search_pattern},
-            {"data.phone": search_pattern},
-            {"data.company": search_pattern},
-            {"notes.content": search_pattern}
-        ]
-    
-    cursor = db.clients.find(query).skip(skip).limit(limit).sort("created_at", -1)
-    clients = await cursor.to_list(length=limit)
-    
-    return clients
-
-@app.post("/api/clients", response_model=Client)
-async def create_client(
-    client_data: ClientCreate,
+    """Get client summaries with optional search and filtering"""
+    query = client_query(search, client_type, resolve_owner(owner, current_user))
+    projection = list_projection(query, expand)
+    if limit >= STREAM_MIN_LIMIT:
+        return await stream_client_page(query, limit, cursor, skip, projection)
+    # Scoped to the caller too, so one session id cannot cancel someone else's searches
+    session = (current_user.get("sub"), x_search_session) if x_search_session else None
+    page = await client_page(query, limit, cursor, skip, projection, session)
+    
+    headers = {"ETag": page["etag"], "Cache-Control": CACHE_CONTROL}
+    if page["next_cursor"]:
+        headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    if none_match(if_none_match, page["etag"]):
+        return Response(status_code=304, headers=headers)
+    if FAST_RESPONSES:
+        return ORJSONResponse(trusted_rows(page["clients"], ClientSummary, exclude_unset=True), headers=headers)
+    response.headers.update(headers)
+    return page["clients"]
+
+async def client_page(
+    query: ClientQuery,
+    limit: int,
+    cursor: Optional[str],
+    skip: int,
+    projection: Dict[str, int],
+    session: Optional[tuple] = None,
+) -> Dict[str, Any]:
+    """A list page from the cache, or loaded into it"""
+    cache_key = await list_cache_key({
+        "search": list(query.terms),
+        "empty": query.empty,
+        "client_type": query.client_type,
+        "owner": query.owner,
+        "limit": limit,
+        "cursor": cursor,
+        "skip": skip,
+        "fields": sorted(projection),
+    })
+    page = await cache.get(cache_key)
+    if page is None:
+        page = await load_client_page(cache_key, query, limit, cursor, skip, projection, session)
+    return page
+
+async def load_client_page(
+    cache_key: str,
+    query: ClientQuery,
+    limit: int,
+    cursor: Optional[str],
+    skip: int,
+    projection: Dict[str, int],
+    session: Optional[tuple] = None,
+) -> Dict[str, Any]:
+    """Fetch and cache a list page after a miss; identical concurrent misses share one query"""
+    async def load():
+        page = await fetch_client_page(query, limit, cursor, skip, projection)
+        await cache.set(cache_key, page)
+        return page
+    
+    # Owners are resolved before the key is built, so the cache key (which
+    # carries the list generation) is the whole flight key
+    flight = lambda: list_flights.do(cache_key, load)
+    if not query.terms or session is None:
+        # Without a session id there is no telling whose searches replace whose:
+        # callers sharing an account (mock auth, service accounts) would cancel each other
+        return await flight()
+    try:
+        return await search_limiter.run(session, flight)
+    except Superseded:
+        raise HTTPException(status_code=409, detail="Superseded by a newer search")
+
+async def fetch_client_page(
+    query: ClientQuery,
+    limit: int,
+    cursor: Optional[str],
+    skip: int,
+    projection: Dict[str, int],
+) -> Dict[str, Any]:
+    """Run a list query: one page of rows, the next-page cursor and the page's ETag"""
+    after = cursor_values(cursor, query.sort_keys)
+    rows = [doc async for doc in repository.list(query, projection, after=after, skip=skip, limit=limit + 1)]
+    clients, next_cursor = split_page(rows, limit, query.sort_keys)
+    return {"clients": clients, "next_cursor": next_cursor, "etag": list_etag(clients, next_cursor)}
+
+def cursor_values(cursor: Optional[str], sort_keys: List[str]) -> Optional[List[Any]]:
+    """Sort-key values of the row before the page; raises HTTP 400 for a bad cursor"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor, sort_keys)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+# Pages of at least this many rows are streamed from the cursor instead of
+# being built (and cached) in memory; LIST_STREAM_MIN_LIMIT overrides it
+STREAM_MIN_LIMIT = 200
+
+async def stream_client_page(
+    query: ClientQuery,
+    limit: int,
+    cursor: Optional[str],
+    skip: int,
+    projection: Dict[str, int],
+) -> StreamingResponse:
+    """A list page encoded row by row as the cursor yields it.
+
+    The next-page cursor has to be sent before the body, so a keys-only
+    query finds the page's last row first and the body query runs up to
+    and including it.  Rows inserted in between make the page longer but
+    never push a row off it.  Streamed pages carry no ETag.
+    """
+    sort_keys = query.sort_keys
+    after = cursor_values(cursor, sort_keys)
+    key_projection = {"_id": 0, **{key: 1 for key in sort_keys if key != "score"}}
+    boundary = [doc async for doc in repository.list(query, key_projection, after=after, skip=skip + limit - 1, limit=2)]
+    
+    headers = {"Cache-Control": CACHE_CONTROL}
+    until = None
+    if len(boundary) > 1:
+        headers[NEXT_CURSOR_HEADER] = cursor_for(boundary[0], sort_keys)
+        until = [boundary[0].get(key) for key in sort_keys]
+    db_cursor = repository.list(query, projection, after=after, until=until, skip=skip)
+    return StreamingResponse(
+        json_array(db_cursor, ClientSummary, exclude_unset=True, fast=FAST_RESPONSES),
+        media_type="application/json",
+        headers=headers,
+    )
+
+class StreamTicket(BaseModel):
+    ticket: str
+    expires_in: int  # Seconds; the stream must be (re)opened with it before then
+
+@router.post("/api/clients/stream/ticket", response_model=StreamTicket)
+async def create_stream_ticket(current_user: dict = Depends(get_current_user)):
+    """Issue a short-lived ticket that opens the change stream in place of the bearer token"""
+    return StreamTicket(ticket=stream_tickets.issue(current_user), expires_in=int(stream_tickets.ttl))
+
+@router.get("/api/clients/stream")
+async def stream_client_changes(
+    client_type: Optional[str] = Query(None, description="Only events for clients of this type: person, company"),
+    owner: Optional[str] = Query(None, description="Only events for clients this user owns or co-owns; 'me' for the caller"),
+    last_event_id: Optional[str] = Header(None),
+    resume_after: Optional[str] = Query(None, alias="last_event_id", description="Last-Event-ID, for a client reopening the stream itself"),
+    current_user: dict = Depends(get_stream_user)
+):
+    """Server-sent events for client inserts, updates, deletes, notes and tracking entries"""
+    return StreamingResponse(
+        sse_stream(change_feed, last_event_id or resume_after, client_type, resolve_owner(owner, current_user)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/api/clients/mine", response_model=MyClientsPage, response_model_exclude_unset=True)
+async def get_my_clients(
+    response: Response,
+    client_type: Optional[str] = Query(None, description="Filter by client type: person, company"),
+    limit: int = Query(50, ge=1, le=200, description="Number of clients to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    expand: Optional[str] = Query(None, description="Comma-separated extra sections: quickbooks, documents, credentials"),
     current_user: dict = Depends(get_current_user)
 ):
-    """Create a new client"""
-    client = Client(
+    """The caller's worklist: clients they own or co-own, most recently active first"""
+    owner = resolve_owner(OWNER_ME, current_user)
+    query = client_query(None, client_type, owner)
+    projection = list_projection(query, expand)
+    result: Dict[str, Any] = {"owner": owner}
+    if cursor:
+        page = await client_page(query, limit, cursor, 0, projection)
+    else:
+        page, result["counts"] = await asyncio.gather(
+            client_page(query, limit, None, 0, projection),
+            repository.count_owned(owner),
+        )
+    
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if page["next_cursor"]:
+        headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    if FAST_RESPONSES:
+        result["clients"] = trusted_rows(page["clients"], ClientSummary, exclude_unset=True)
+        return ORJSONResponse(result, headers=headers)
+    response.headers.update(headers)
+    result["clients"] = page["clients"]
+    return result
+
+@router.get("/api/clients/suggest", response_model=List[ClientSuggestion])
+async def suggest_clients(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    client_type: Optional[str] = Query(None, description="Filter by client type: person, company"),
+    limit: int = Query(8, ge=1, le=25, description="Number of suggestions to return"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Names matching a typed prefix, from the in-process index (see suggest.py)"""
+    suggestions = suggest_index.search(q, limit, client_type)
+    if suggestions is None:
+        suggestions = [suggestion(doc) for doc in await repository.suggest(q, client_type, limit)]
+    return suggestions
+
+@router.get("/api/clients/export")
+async def export_clients(
+    search: Optional[str] = Query(None, description="Search term, as for GET /api/clients"),
+    client_type: Optional[str] = Query(None, description="Filter by client type: person, company"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream every matching client as NDJSON or CSV"""
+    db_cursor = repository.list(client_query(search, client_type), CLIENT_PROJECTION)
+    
+    async def rows():
+        if export_format == "csv":
+            yield csv_header()
+        lines = []
+        async for doc in db_cursor:
+            doc.pop("score", None)
+            lines.append(csv_row(doc) if export_format == "csv" else ndjson_line(doc))
+            if len(lines) >= EXPORT_FLUSH_ROWS:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+    
+    media_type = CSV_MEDIA_TYPE if export_format == "csv" else NDJSON_MEDIA_TYPE
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="clients.{export_format}"'},
+    )
+
+def build_client(client_data: ClientCreate) -> Client:
+    """Build a new Client; its SharePoint folder is provisioned by a background job"""
+    return Client(
         type=client_data.type,
         data=client_data.data,
         ownership=client_data.ownership
     )
+
+def client_document(client: Client) -> Dict[str, Any]:
+    """Mongo document for a client, with its search grams"""
+    client_doc = client.model_dump()
+    client_doc["search"] = build_search_fields(client.data)
+    # Worklists order by this; tracking entries move it forward
+    client_doc["last_activity_at"] = client.created_at
+    return client_doc
+
+@router.post("/api/clients", response_model=Client)
+async def create_client(
+    client_data: ClientCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Create a new client"""
+    client = build_client(client_data)
+    client_doc = client_document(client)
+    await repository.insert(client_doc)
+    await apply_deltas(db, client_deltas(client_doc))
+    await invalidate_lists()
+    await job_queue.enqueue(db, provisioning_jobs(client_doc))
+    change_feed.record(client_event("insert", client_doc, client=change_feed.summary(client_doc)))
+    return client
+
+# Bulk import: rows are validated and inserted one chunk at a time
+BULK_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+EXPORT_FLUSH_ROWS = 500
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
+    errors_truncated: bool = False
+
+@router.post("/api/clients/bulk", response_model=BulkImportResult)
+async def bulk_import_clients(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Import clients from a streamed NDJSON or CSV body"""
+    content_type = request.headers.get("content-type", NDJSON_MEDIA_TYPE).split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        records = iter_ndjson_records(iter_lines(request.stream()))
+    elif content_type in CSV_CONTENT_TYPES:
+        records = iter_csv_records(iter_lines(request.stream()))
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type {content_type!r}; send {NDJSON_MEDIA_TYPE} or {CSV_MEDIA_TYPE}"
+        )
+    
+    result = BulkImportResult(inserted=0, failed=0, errors=[])
+    
+    def record_error(row: int, error: str):
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(BulkRowError(row=row, error=error))
+        else:
+            result.errors_truncated = True
+    
+    async def flush(rows: List[int], docs: List[Dict[str, Any]]):
+        if not docs:
+            return
+        errors = await repository.insert_many(docs)
+        await invalidate_lists()
+        result.inserted += len(docs) - len(errors)
+        failed = set()
+        for index, error in errors:
+            failed.add(index)
+            record_error(rows[index], error)
+        deltas = Counter()
+        jobs = []
+        for index, doc in enumerate(docs):
+            if index not in failed:
+                deltas.update(client_deltas(doc))
+                jobs.extend(provisioning_jobs(doc))
+                change_feed.record(client_event("insert", doc, client=change_feed.summary(doc)))
+        await apply_deltas(db, deltas)
+        await job_queue.enqueue(db, jobs)
+    
+    rows, docs = [], []
+    async for row, record, error in records:
+        if error:
+            record_error(row, error)
+            continue
+        try:
+            client_data = ClientCreate.model_validate(record)
+        except ValidationError as exc:
+            record_error(row, "; ".join(
+                f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in exc.errors()
+            ))
+            continue
+        rows.append(row)
+        docs.append(client_document(build_client(client_data)))
+        if len(docs) >= BULK_CHUNK_SIZE:
+            await flush(rows, docs)
+            rows, docs = [], []
+    await flush(rows, docs)
+    
+    return result
+
+# Batch endpoints: one $in read and one bulk_write per batch, with a result per item
+MAX_BATCH_SIZE = 500
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchGetResult(BaseModel):
+    clients: List[Client]  # In request order
+    missing: List[str]
+
+class BatchUpdateItem(BaseModel):
+    id: str
+    update: ClientUpdate
+    if_match: Optional[str] = None  # ETag from a previous read; makes this item conditional
+
+class BatchUpdateRequest(BaseModel):
+    updates: List[BatchUpdateItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: int  # As for the single-client endpoint: 200, 404 or 412
+    etag: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]  # In request order
+
+def unique_ids(ids: List[str]) -> List[str]:
+    return list(dict.fromkeys(ids))
+
+@router.post("/api/clients/batch-get", response_model=BatchGetResult)
+async def batch_get_clients(
+    request: BatchGetRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get many clients by id in a single query"""
+    ids = unique_ids(request.ids)
+    found = {doc["id"]: doc async for doc in repository.find_many(ids, CLIENT_PROJECTION)}
+    result = {
+        "clients": [found[client_id] for client_id in ids if client_id in found],
+        "missing": [client_id for client_id in ids if client_id not in found],
+    }
+    if FAST_RESPONSES:
+        return ORJSONResponse({**result, "clients": trusted_rows(result["clients"], Client)})
+    return result
+
+@router.post("/api/clients/batch-update", response_model=BatchResult)
+async def batch_update_clients(
+    request: BatchUpdateRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Apply per-client updates, e.g. reassigning owners, with one bulk write"""
+    ids = [item.id for item in request.updates]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Each client may appear only once per batch")
+    
+    # Before-images feed the stats rollups and change events, and each write is
+    # conditional on the version read here, so nothing changes in between unseen
+    previous = {doc["id"]: doc async for doc in repository.find_many(ids, CLIENT_PROJECTION)}
+    results = {}
+    pending = []
+    for item in request.updates:
+        before = previous.get(item.id)
+        if before is None:
+            results[item.id] = BatchItemResult(id=item.id, status=404, error="Client not found")
+        elif not if_match_allows(item.if_match, client_etag(before)):
+            results[item.id] = BatchItemResult(id=item.id, status=412, error="Client has been modified")
+        else:
+            pending.append((before, client_update_fields(item.update)))
+    
+    if pending:
+        # Clients changed after they were read are left alone and reported as 412
+        updated = await repository.update_many(pending)
+        pending = [(before, update_data) for before, update_data in pending if before["id"] in updated]
     
-    # Generate SharePoint folder URL (mock)
-    sharepoint_base = os.getenv("SHAREPOINT_SITE_URL", "https://mock.sharepoint.com")
-    client_name = client_data.data.get("company_name") or f"{client_data.data.get('first_name', '')} {client_data.data.get('last_name', '')}"
-    client.documents.sharepoint_folder_url = f"{sharepoint_base}/Client_{client.id}_{client_name.replace(' ', '_')}"
+    deltas = Counter()
+    jobs = []
+    for before, update_data in pending:
+        updated_client = merge_update(before, update_data)
+        deltas.update(client_deltas(before, -1))
+        deltas.update(client_deltas(updated_client))
+        if "data" in update_data or "quickbooks" in update_data:
+            jobs.extend(sync_jobs(updated_client))
+        change_feed.record(client_event("update", updated_client, client=change_feed.summary(updated_client)))
+        results[before["id"]] = BatchItemResult(id=before["id"], status=200, etag=client_etag(updated_client))
+    if pending:
+        await apply_deltas(db, deltas)
+        await invalidate_records(before["id"] for before, _ in pending)
+        await invalidate_lists()
+        await job_queue.enqueue(db, jobs)
     
-    result = await db.clients.insert_one(client.model_dump())
+    return BatchResult(results=[
+        results.get(client_id) or BatchItemResult(id=client_id, status=412, error="Client has been modified")
+        for client_id in ids
+    ])
+
+@router.post("/api/clients/batch-delete", response_model=BatchResult)
+async def batch_delete_clients(
+    request: BatchDeleteRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Delete many clients, with their notes and tracking entries"""
+    ids = unique_ids(request.ids)
+    found = await repository.delete_many(ids, EVENT_PROJECTION)
+    if found:
+        deleted_ids = list(found)
+        await invalidate_records(deleted_ids)
+        await invalidate_lists()
+        
+        deltas = Counter()
+        for doc in found.values():
+            deltas.update(client_deltas(doc, -1))
+            change_feed.record(client_event("delete", doc))
+        deltas.update(await client_activity_deltas(db, deleted_ids))
+        await asyncio.gather(
+            db.client_notes.delete_many({"client_id": {"$in": deleted_ids}}),
+            db.client_tracking.delete_many({"client_id": {"$in": deleted_ids}}),
+            apply_deltas(db, deltas),
+        )
+    
+    return BatchResult(results=[
+        BatchItemResult(id=client_id, status=200) if client_id in found
+        else BatchItemResult(id=client_id, status=404, error="Client not found")
+        for client_id in ids
+    ])
+
+async def load_client(client_id: str) -> Optional[Dict[str, Any]]:
+    """Read-through lookup of a client's public record"""
+    key = await client_cache_key(client_id)
+    client = await cache.get(key)
+    if client is None:
+        client = await repository.find(client_id, CLIENT_PROJECTION)
+        await cache.set(key, client)
     return client
 
-@app.get("/api/clients/{client_id}", response_model=Client)
+@router.get("/api/clients/{client_id}", response_model=Client)
 async def get_client(
     client_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
     """Get a specific client by ID"""
-    client = await db.clients.find_one({"id": client_id})
+    client = await load_client(client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
+    
+    headers = {"ETag": client_etag(client), "Cache-Control": CACHE_CONTROL}
+    if none_match(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if FAST_RESPONSES:
+        return ORJSONResponse(trusted_rows([client], Client)[0], headers=headers)
+    response.headers.update(headers)
     return client
 
-@app.put("/api/clients/{client_id}", response_model=Client)
+def client_update_fields(client_update: ClientUpdate) -> Dict[str, Any]:
+    """$set fields for an update, with fresh search fields when data changes"""
+    update_data = {k: v for k, v in client_update.model_dump().items() if v is not None}
+    now = datetime.utcnow()
+    # Truncated to Mongo's millisecond precision so the response matches later reads
+    update_data["updated_at"] = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    if "data" in update_data:
+        update_data["search.primary"] = primary_grams(update_data["data"])
+        update_data["search.keys"] = suggest_keys(update_data["data"])
+    return update_data
+
+def merge_update(previous: Dict[str, Any], update_data: Dict[str, Any]) -> Dict[str, Any]:
+    """The public record after applying ``update_data`` to its before-image"""
+    return {
+        **previous,
+        **{field: value for field, value in update_data.items() if "." not in field},
+        "version": previous.get("version", 0) + 1,
+    }
+
+@router.put("/api/clients/{client_id}", response_model=Client)
 async def update_client(
     client_id: str,
     client_update: ClientUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
-    """Update a client"""
-    client = await db.clients.find_one({"id": client_id})
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
+    """Update a client; an If-Match ETag makes the update conditional"""
+    update_data = client_update_fields(client_update)
     
-    update_data = {k: v for k, v in client_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.utcnow()
-    
-    await db.clients.update_one({"id": client_id}, {"$set": update_data})
+    # The before-image feeds the stats rollups; the new record is merged locally
+    previous = await repository.update(client_id, update_data, CLIENT_PROJECTION, if_match)
+    if not previous:
+        # Only a failed precondition needs the extra lookup to pick 404 vs 412
+        if if_match and await repository.exists(client_id):
+            raise HTTPException(status_code=412, detail="Client has been modified")
+        raise HTTPException(status_code=404, detail="Client not found")
+    updated_client = merge_update(previous, update_data)
     
-    updated_client = await db.clients.find_one({"id": client_id})
+    deltas = client_deltas(previous, -1)
+    deltas.update(client_deltas(updated_client))
+    await apply_deltas(db, deltas)
+    await invalidate_client(client_id)
+    if "data" in update_data or "quickbooks" in update_data:
+        await job_queue.enqueue(db, sync_jobs(updated_client))
+    change_feed.record(client_event("update", updated_client, client=change_feed.summary(updated_client)))
+    response.headers["ETag"] = client_etag(updated_client)
     return updated_client
 
-@app.delete("/api/clients/{client_id}")
+@router.delete("/api/clients/{client_id}")
 async def delete_client(
     client_id: str,
     current_user: dict = Depends(get_current_user)
 ):
     """Delete a client"""
-    result = await db.clients.delete_one({"id": client_id})
-    if result.deleted_count == 0:
+    deleted = await repository.delete(client_id, EVENT_PROJECTION)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Client not found")
+    await invalidate_client(client_id)
+    change_feed.record(client_event("delete", deleted))
+    
+    deltas = client_deltas(deleted, -1)
+    deltas.update(await client_activity_deltas(db, client_id))
+    await asyncio.gather(
+        db.client_notes.delete_many({"client_id": client_id}),
+        db.client_tracking.delete_many({"client_id": client_id}),
+        apply_deltas(db, deltas),
+    )
     return {"message": "Client deleted successfully"}
 
-@app.post("/api/clients/{client_id}/notes", response_model=Note)
+@router.post("/api/clients/{client_id}/notes", response_model=Note)
 async def add_note(
     client_id: str,
     note_content: str,
     current_user: dict = Depends(get_current_user)
 ):
     """Add a note to a client"""
-    client = await db.clients.find_one({"id": client_id})
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     note = Note(
         content=note_content,
         created_by=current_user.get("email", "unknown")
     )
     
-    await db.clients.update_one(
-        {"id": client_id},
-        {"$push": {"notes": note.model_dump()}}
-    )
+    # Indexing the note's grams doubles as the existence check
+    client = await repository.push_note_grams(client_id, note_grams(note.content), EVENT_PROJECTION)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    
+    await db.client_notes.insert_one({"client_id": client_id, **note.model_dump()})
+    # New note text can change which clients a search returns
+    await invalidate_lists()
+    change_feed.record(client_event("note", client, note=note.model_dump()))
     
     return note
 
-@app.post("/api/clients/{client_id}/tracking", response_model=TrackingEntry)
+@router.post("/api/clients/{client_id}/tracking", response_model=TrackingEntry)
 async def add_tracking_entry(
     client_id: str,
     activity_type: str,
@@ -265,10 +1050,6 @@ async def add_tracking_entry(
     current_user: dict = Depends(get_current_user)
 ):
     """Add a tracking entry to a client"""
-    client = await db.clients.find_one({"id": client_id})
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
     tracking_entry = TrackingEntry(
         activity_type=activity_type,
         description=description,
@@ -276,34 +1057,171 @@ async def add_tracking_entry(
         created_by=current_user.get("email", "unknown")
     )
     
-    await db.clients.update_one(
-        {"id": client_id},
-        {"$push": {"tracking": tracking_entry.model_dump()}}
-    )
+    # Moving the client up its owners' worklists doubles as the existence check
+    client = await repository.record_activity(client_id, tracking_entry.created_at, EVENT_PROJECTION)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    
+    await db.client_tracking.insert_one({"client_id": client_id, **tracking_entry.model_dump()})
+    await apply_deltas(db, activity_deltas([(tracking_entry.created_at, tracking_entry.activity_type)]))
+    # Worklist pages are ordered by last activity
+    await invalidate_lists()
+    change_feed.record(client_event("tracking", client, entry=tracking_entry.model_dump()))
     
     return tracking_entry
 
-@app.get("/api/clients/{client_id}/sharepoint-url")
+# Notes and tracking live in their own collections, paged newest first
+ACTIVITY_SORT_KEYS = ["created_at", "id"]
+
+async def get_activity_page(collection, client_id: str, limit: int, cursor: Optional[str], response: Response):
+    query = {"client_id": client_id}
+    if cursor:
+        try:
+            query.update(keyset_filter(ACTIVITY_SORT_KEYS, decode_cursor(cursor, ACTIVITY_SORT_KEYS)))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    
+    db_cursor = collection.find(query, {"_id": 0, "client_id": 0}).sort(sort_spec(ACTIVITY_SORT_KEYS)).limit(limit + 1)
+    entries, next_cursor = split_page(await db_cursor.to_list(length=limit + 1), limit, ACTIVITY_SORT_KEYS)
+    # An empty first page is the only case where we need to tell "no entries" from "no client"
+    if not entries and not cursor and not await repository.exists(client_id):
+        raise HTTPException(status_code=404, detail="Client not found")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return entries
+
+@router.get("/api/clients/{client_id}/notes", response_model=List[Note])
+async def get_notes(
+    client_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Number of notes to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a client's notes, newest first"""
+    return await get_activity_page(db.client_notes, client_id, limit, cursor, response)
+
+@router.get("/api/clients/{client_id}/tracking", response_model=List[TrackingEntry])
+async def get_tracking_entries(
+    client_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Number of tracking entries to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a client's tracking entries, newest first"""
+    return await get_activity_page(db.client_tracking, client_id, limit, cursor, response)
+
+@router.get("/api/clients/{client_id}/sharepoint-url")
 async def get_sharepoint_url(
     client_id: str,
     current_user: dict = Depends(get_current_user)
 ):
     """Get SharePoint folder URL for a client"""
-    client = await db.clients.find_one({"id": client_id})
+    client = await load_client(client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
     sharepoint_url = client.get("documents", {}).get("sharepoint_folder_url")
     if not sharepoint_url:
-        # Generate mock SharePoint URL
-        sharepoint_base = os.getenv("SHAREPOINT_SITE_URL", "https://mock.sharepoint.com")
-        client_name = client["data"].get("company_name") or f"{client['data'].get('first_name', '')} {client['data'].get('last_name', '')}"
-        sharepoint_url = f"{sharepoint_base}/Client_{client_id}_{client_name.replace(' ', '_')}"
+        # Provisioning is still queued; the folder will get the conventional name
+        return {"sharepoint_url": sharepoint.expected_url(client), "provisioned": False}
     
-    return {"sharepoint_url": sharepoint_url}
+    return {"sharepoint_url": sharepoint_url, "provisioned": True}
+
+class ClientJob(BaseModel):
+    id: str
+    kind: str
+    client_id: str
+    status: str  # queued, running, succeeded or failed
+    attempts: int
+    max_attempts: int
+    run_at: datetime  # Next attempt, or lease expiry while running
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+@router.get("/api/clients/{client_id}/jobs", response_model=List[ClientJob])
+async def get_client_jobs(
+    client_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Number of jobs to return"),
+    current_user: dict = Depends(get_current_user)
+):
+    """A client's background jobs, newest first"""
+    jobs = await job_queue.jobs_for(db, client_id, limit)
+    if not jobs and not await repository.exists(client_id):
+        raise HTTPException(status_code=404, detail="Client not found")
+    return jobs
+
+async def set_client_fields(client_id: str, fields: Dict[str, Any]) -> bool:
+    """Store a job's outcome on a client; its job_version moves, not the version user edits are checked against"""
+    updated = await repository.set_fields(client_id, fields)
+    await invalidate_client(client_id)
+    return updated
+
+async def provision_sharepoint(job: Dict[str, Any]) -> Dict[str, Any]:
+    client = await repository.find(job["client_id"], CLIENT_PROJECTION)
+    if not client:
+        return {"skipped": "client deleted"}
+    if client.get("documents", {}).get("sharepoint_folder_url"):
+        return {"url": client["documents"]["sharepoint_folder_url"]}
+    url = await sharepoint.provision_folder(client)
+    await set_client_fields(client["id"], {"documents.sharepoint_folder_url": url})
+    return {"url": url}
+
+async def sync_quickbooks(job: Dict[str, Any]) -> Dict[str, Any]:
+    if not quickbooks.enabled:
+        return {"skipped": "QUICKBOOKS_API_URL not set"}
+    client = await repository.find(job["client_id"], CLIENT_PROJECTION)
+    if not client:
+        return {"skipped": "client deleted"}
+    customer_id = await quickbooks.sync_customer(client)
+    if customer_id != (client.get("quickbooks") or {}).get("customer_id"):
+        await set_client_fields(client["id"], {"quickbooks.customer_id": customer_id})
+    return {"customer_id": customer_id}
+
+# Dashboard statistics (see stats.py)
+@router.get("/api/stats/clients")
+async def get_client_stats(
+    live: bool = Query(False, description="Aggregate from the clients instead of the rollups"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Client counts by type, department and primary owner"""
+    return await (live_client_stats(repository) if live else client_stats(db))
+
+@router.get("/api/stats/activity")
+async def get_activity_stats(
+    weeks: int = Query(12, ge=1, le=520, description="Number of ISO weeks, ending with the current one"),
+    activity_type: Optional[str] = Query(None, description="Only this activity type"),
+    live: bool = Query(False, description="Aggregate from the tracking entries instead of the rollups"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Tracking entries per ISO week and activity type"""
+    if live:
+        return await live_activity_stats(db, weeks, activity_type)
+    return await activity_stats(db, weeks, activity_type)
+
+@router.get("/api/cache/stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss counters for the read-through cache"""
+    return cache.stats()
+
+@router.get("/api/metrics")
+async def get_metrics(reader: dict = Depends(get_metrics_reader)):
+    """Request and database metrics in Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/api/diagnostics/query-plans")
+async def get_query_plans(current_user: dict = Depends(get_current_user)):
+    """Explain every handler's query shape; 503 if any falls back to a collection scan"""
+    report = await verify_query_plans(db)
+    ok = not any(entry["collscan"] for entry in report)
+    return JSONResponse(status_code=200 if ok else 503, content={"ok": ok, "queries": report})
 
 # Mock Microsoft Authentication endpoint
-@app.post("/api/auth/microsoft")
+@router.post("/api/auth/microsoft")
 async def microsoft_auth(token: str):
     """Mock Microsoft authentication endpoint"""
     # In real implementation, validate Microsoft token here
@@ -319,5 +1237,6 @@ async def microsoft_auth(token: str):
     raise HTTPException(status_code=401, detail="Invalid Microsoft token")
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # Workers, event loop, keep-alive and drain come from SERVE_* (see serve.py)
+    from serve import main
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""Request coalescing for identical concurrent reads.
+
+``SingleFlight.do(key, fn)`` runs ``fn`` once for all callers that ask for
+the same key while it is in flight; every caller gets the same result (or
+exception).  The work runs in its own task, so one caller going away does
+not cancel it for the others; it is cancelled only when nobody is left
+waiting.  Nothing is kept once the flight lands: caching stays the job of
+cache.py, this only collapses the burst of misses in front of it.
+
+``SupersedingLimiter`` caps the in-flight calls per key (for searches,
+the user and their search box's session id).  A call beyond the cap
+cancels that key's oldest one, whose caller gets ``Superseded``;
+search-as-you-type only ever wants the latest answer.
+
+Both report to ``Metrics``: ``singleflight_calls_total{role="leader"}``
+counts queries actually run and ``role="shared"`` callers that joined
+one, so shared / (leader + shared) is the coalescing ratio.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Superseded(Exception):
+    """The call was cancelled in favour of a newer one with the same key"""
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, group: str, metrics=None):
+        self.group = group
+        self.metrics = metrics
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def _landed(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            # The task inherits this caller's context, so its DB commands are
+            # attributed to the request that started it
+            flight = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda _: self._landed(key, flight))
+            self._flights[key] = flight
+            role = "leader"
+        else:
+            role = "shared"
+        if self.metrics is not None:
+            self.metrics.record_flight(self.group, role)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+
+class SupersedingLimiter:
+    """At most ``limit`` calls in flight per key; 0 disables the cap"""
+
+    def __init__(self, group: str, limit: int, metrics=None):
+        self.group = group
+        self.limit = limit
+        self.metrics = metrics
+        self._running: Dict[Hashable, List[asyncio.Task]] = {}
+
+    async def run(self, key: Optional[Hashable], fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.limit or key is None:
+            return await fn()
+        task = asyncio.ensure_future(fn())
+        running = self._running.setdefault(key, [])
+        running.append(task)
+        while len(running) > self.limit:
+            running.pop(0).cancel()
+            if self.metrics is not None:
+                self.metrics.record_superseded(self.group)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if task.cancelled() and not (current and current.cancelling()):
+                raise Superseded() from None
+            raise
+        finally:
+            if task in running:
+                running.remove(task)
+            if not running and self._running.get(key) is running:
+                del self._running[key]
@@ -0,0 +1,185 @@
+"""Dashboard statistics from an incrementally maintained rollup collection.
+
+``client_stats`` holds one counter document per group:
+
+    {"_id": "type:person", "dimension": "type", "key": "person", "count": 42}
+    {"_id": "activity:2024-W05:call", "dimension": "activity",
+     "week": "2024-W05", "activity_type": "call", "count": 7}
+
+Write handlers turn each change into a ``Counter`` of deltas and apply it
+with one unordered bulk write of upserted ``$inc``s, so reading a
+dashboard costs O(groups) rather than O(clients).  The ``live_*``
+functions compute the same figures with aggregation pipelines over
+indexed fields; ``rebuild`` uses them to recreate the rollups from
+scratch (``python manage.py rebuild-stats``).
+
+Weeks are ISO weeks (``%G-W%V``), which sort correctly as strings.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pymongo import UpdateOne
+
+STATS_COLLECTION = "client_stats"
+
+# Dimension name -> client field it counts
+CLIENT_DIMENSIONS = {
+    "type": "type",
+    "department": "ownership.department",
+    "primary_owner": "ownership.primary_owner",
+}
+UNASSIGNED = "unassigned"
+
+
+def _field(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def iso_week(value: datetime) -> str:
+    year, week, _ = value.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def client_deltas(doc: Dict[str, Any], sign: int = 1) -> Counter:
+    """Counter changes for adding (sign=1) or removing (sign=-1) a client"""
+    return Counter({
+        (dimension, _field(doc, path) or UNASSIGNED): sign
+        for dimension, path in CLIENT_DIMENSIONS.items()
+    })
+
+
+def activity_deltas(entries: Iterable[Tuple[datetime, str]], sign: int = 1) -> Counter:
+    """Counter changes for (created_at, activity_type) tracking entries"""
+    deltas = Counter()
+    for created_at, activity_type in entries:
+        deltas["activity", iso_week(created_at), activity_type] += sign
+    return deltas
+
+
+async def client_activity_deltas(db, client_id: Union[str, List[str]], sign: int = -1) -> Counter:
+    """Counter changes for all of one or more clients' tracking entries, e.g. before deleting them"""
+    deltas = Counter()
+    async for group in db.client_tracking.aggregate(activity_pipeline(client_id=client_id)):
+        deltas["activity", group["_id"]["week"], group["_id"]["activity_type"]] += sign * group["count"]
+    return deltas
+
+
+def _counter_fields(group: Tuple[str, ...]) -> Dict[str, Any]:
+    if group[0] == "activity":
+        return {"dimension": "activity", "week": group[1], "activity_type": group[2]}
+    return {"dimension": group[0], "key": group[1]}
+
+
+async def apply_deltas(db, deltas: Counter) -> None:
+    """Apply counter changes in one round trip; a no-op when nothing changed"""
+    updates = [
+        UpdateOne(
+            {"_id": ":".join(group)},
+            {"$inc": {"count": delta}, "$setOnInsert": _counter_fields(group)},
+            upsert=True,
+        )
+        for group, delta in deltas.items() if delta
+    ]
+    if updates:
+        await db[STATS_COLLECTION].bulk_write(updates, ordered=False)
+
+
+async def client_stats(db) -> Dict[str, Any]:
+    """Client counts by type, department and primary owner, from the rollups"""
+    result: Dict[str, Any] = {f"by_{dimension}": {} for dimension in CLIENT_DIMENSIONS}
+    cursor = db[STATS_COLLECTION].find({"dimension": {"$in": list(CLIENT_DIMENSIONS)}}, {"_id": 0})
+    async for doc in cursor:
+        if doc["count"] > 0:
+            result[f"by_{doc['dimension']}"][doc["key"]] = doc["count"]
+    result["total"] = sum(result["by_type"].values())
+    return result
+
+
+def first_week(weeks: int, now: Optional[datetime] = None) -> str:
+    """The earliest ISO week in a window of ``weeks`` weeks ending this week"""
+    return iso_week((now or datetime.utcnow()) - timedelta(weeks=weeks - 1))
+
+
+async def activity_stats(db, weeks: int = 12, activity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Tracking entries per ISO week and activity type over the last ``weeks`` weeks, from the rollups"""
+    query: Dict[str, Any] = {"dimension": "activity", "week": {"$gte": first_week(weeks)}}
+    if activity_type:
+        query["activity_type"] = activity_type
+    cursor = db[STATS_COLLECTION].find(query, {"_id": 0, "week": 1, "activity_type": 1, "count": 1})
+    rows = [
+        {"week": doc["week"], "activity_type": doc["activity_type"], "count": doc["count"]}
+        async for doc in cursor if doc["count"] > 0
+    ]
+    return sorted(rows, key=lambda row: (row["week"], row["activity_type"]))
+
+
+def client_pipeline(path: str) -> List[Dict[str, Any]]:
+    """Count clients by ``path``; the leading sort lets the planner walk that field's index"""
+    return [
+        {"$sort": {path: 1}},
+        {"$group": {"_id": f"${path}", "count": {"$sum": 1}}},
+    ]
+
+
+def activity_pipeline(
+    since: Optional[datetime] = None,
+    activity_type: Optional[str] = None,
+    client_id: Union[str, List[str], None] = None,
+) -> List[Dict[str, Any]]:
+    """Count tracking entries by ISO week and activity type, optionally from ``since`` on"""
+    match: Dict[str, Any] = {}
+    if client_id:
+        match["client_id"] = {"$in": client_id} if isinstance(client_id, list) else client_id
+    match["created_at"] = {"$gte": since} if since else {"$exists": True}
+    if activity_type:
+        match["activity_type"] = activity_type
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"week": {"$dateToString": {"format": "%G-W%V", "date": "$created_at"}},
+                    "activity_type": {"$ifNull": ["$activity_type", UNASSIGNED]}},
+            "count": {"$sum": 1},
+        }},
+    ]
+
+
+async def live_client_stats(clients) -> Dict[str, Any]:
+    """Same figures as ``client_stats``, counted from the client repository itself"""
+    result: Dict[str, Any] = {}
+    for dimension, path in CLIENT_DIMENSIONS.items():
+        groups = await clients.count_by(path)
+        result[f"by_{dimension}"] = {(key or UNASSIGNED): count for key, count in groups.items()}
+    result["total"] = sum(result["by_type"].values())
+    return result
+
+
+async def live_activity_stats(db, weeks: int = 12, activity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Same figures as ``activity_stats``, aggregated from the tracking entries themselves"""
+    since = datetime.strptime(f"{first_week(weeks)}-1", "%G-W%V-%u")
+    groups = await db.client_tracking.aggregate(activity_pipeline(since, activity_type)).to_list(length=None)
+    rows = [{**group["_id"], "count": group["count"]} for group in groups]
+    return sorted(rows, key=lambda row: (row["week"], row["activity_type"]))
+
+
+async def rebuild(db) -> int:
+    """Recompute every rollup and swap them in; returns the number of groups"""
+    deltas = Counter()
+    for dimension, path in CLIENT_DIMENSIONS.items():
+        async for group in db.clients.aggregate(client_pipeline(path)):
+            deltas[dimension, group["_id"] or UNASSIGNED] += group["count"]
+    async for group in db.client_tracking.aggregate(activity_pipeline()):
+        deltas["activity", group["_id"]["week"], group["_id"]["activity_type"]] += group["count"]
+
+    staging = db[f"{STATS_COLLECTION}_rebuild"]
+    await staging.drop()
+    docs = [{"_id": ":".join(group), **_counter_fields(group), "count": count} for group, count in deltas.items()]
+    if docs:
+        await staging.insert_many(docs)
+        await staging.rename(STATS_COLLECTION, dropTarget=True)
+    else:
+        await db[STATS_COLLECTION].delete_many({})
+    return len(docs)
@@ -0,0 +1,206 @@
+"""Typeahead suggestions for GET /api/clients/suggest.
+
+``SuggestIndex`` keeps one sorted list of ``(token, client_id)`` pairs for
+the folded tokens of each client's name and email fields, so a prefix
+lookup is a ``bisect`` plus a short forward scan.  It is loaded from the
+database in the background at startup and kept current by the change
+feed (events.py); writes that arrive while it loads are replayed over the
+loaded snapshot.  Each process holds its own index.  With change streams
+every process sees every worker's writes; with the in-process feed it
+sees only its own, which is why serve.py runs a single worker then.  A
+``reset`` event (a delete the change stream could not attribute) reloads
+the index.
+
+Until the index is ready, ``suggest_filter`` serves the same lookups from
+the ``search.keys`` index with anchored regexes.
+"""
+import asyncio
+import logging
+import re
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from events import RESET, Event
+from search import MAX_QUERY_TERMS, SUGGEST_FIELDS, suggest_keys, tokenize
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_PROJECTION = {"_id": 0, "id": 1, "type": 1, **{f"data.{field}": 1 for field in SUGGEST_FIELDS}}
+
+# Index entries examined per lookup; bounds the cost of one-letter queries
+MAX_SCAN = 2000
+
+
+def display_name(client_type: Optional[str], data: Dict[str, Any]) -> str:
+    """The name the client list shows for a client"""
+    if client_type == "person":
+        return f"{data.get('first_name') or ''} {data.get('last_name') or ''}".strip() or "Unnamed Person"
+    return data.get("company_name") or "Unnamed Company"
+
+
+def suggestion(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": doc["id"], "name": display_name(doc.get("type"), doc.get("data") or {}), "type": doc.get("type")}
+
+
+def suggest_terms(q: str) -> List[str]:
+    """Folded query tokens; single letters count, unlike full-text search terms"""
+    terms: List[str] = []
+    for token in tokenize(q):
+        if token not in terms:
+            terms.append(token)
+    return terms[:MAX_QUERY_TERMS]
+
+
+def suggest_filter(q: str, client_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Mongo filter for the cold-start fallback, or None if ``q`` has no tokens"""
+    terms = suggest_terms(q)
+    if not terms:
+        return None
+    query: Dict[str, Any] = {"$and": [{"search.keys": {"$regex": f"^{re.escape(term)}"}} for term in terms]}
+    if client_type:
+        query["type"] = client_type
+    return query
+
+
+class _Entry(NamedTuple):
+    id: str
+    name: str
+    folded_name: str
+    type: Optional[str]
+    keys: Tuple[str, ...]
+
+
+class SuggestIndex:
+    """In-process prefix index over client names and emails"""
+
+    def __init__(self):
+        self.ready = False
+        self.loading = False
+        self._keys: List[Tuple[str, str]] = []
+        self._clients: Dict[str, _Entry] = {}
+        # Writes seen while loading: client id -> document, or None if deleted
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._repository = None
+
+    @staticmethod
+    def _entry(doc: Dict[str, Any]) -> _Entry:
+        item = suggestion(doc)
+        return _Entry(item["id"], item["name"], " ".join(tokenize(item["name"])), item["type"],
+                      tuple(suggest_keys(doc.get("data") or {})))
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        """Index a created or updated client (needs ``id``, ``type`` and ``data``)"""
+        if not self.ready:
+            if self.loading:
+                self._pending[doc["id"]] = doc
+            return
+        self._discard(doc["id"])
+        entry = self._entry(doc)
+        self._clients[entry.id] = entry
+        for key in entry.keys:
+            insort(self._keys, (key, entry.id))
+
+    def remove(self, client_id: str) -> None:
+        if not self.ready:
+            if self.loading:
+                self._pending[client_id] = None
+            return
+        self._discard(client_id)
+
+    def apply(self, event: Event) -> None:
+        """Change feed listener: index inserts and updates, drop deletes, reload on reset"""
+        if event.get("type") in ("insert", "update") and event.get("client"):
+            self.add(event["client"])
+        elif event.get("type") == "delete":
+            self.remove(event["client_id"])
+        elif event == RESET and self._repository is not None:
+            self._reload()
+
+    def _reload(self) -> None:
+        # Lookups fall back to the database until the new snapshot is in
+        if self._task:
+            self._task.cancel()
+        self.ready, self.loading, self._pending = False, True, {}
+        self._task = asyncio.create_task(self.load(self._repository))
+
+    def _discard(self, client_id: str) -> None:
+        entry = self._clients.pop(client_id, None)
+        if entry is None:
+            return
+        for key in entry.keys:
+            position = bisect_left(self._keys, (key, client_id))
+            if position < len(self._keys) and self._keys[position] == (key, client_id):
+                del self._keys[position]
+
+    def search(self, q: str, limit: int = 8, client_type: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Up to ``limit`` matches for ``q``, or None while the index is still loading.
+
+        Every query token must prefix some token of the client.  The
+        longest one drives the scan; names starting with the query rank
+        first, then names in alphabetical order.
+        """
+        if not self.ready:
+            return None
+        terms = suggest_terms(q)
+        if not terms:
+            return []
+        anchor = max(terms, key=len)
+        others = [term for term in terms if term != anchor]
+        seen = set()
+        matches: List[_Entry] = []
+        position = bisect_left(self._keys, (anchor,))
+        end = min(len(self._keys), position + MAX_SCAN)
+        while position < end:
+            key, client_id = self._keys[position]
+            position += 1
+            if not key.startswith(anchor):
+                break
+            if client_id in seen:
+                continue
+            seen.add(client_id)
+            entry = self._clients[client_id]
+            if client_type and entry.type != client_type:
+                continue
+            if all(any(key.startswith(term) for key in entry.keys) for term in others):
+                matches.append(entry)
+        folded_query = " ".join(terms)
+        matches.sort(key=lambda entry: (not entry.folded_name.startswith(folded_query), entry.folded_name))
+        return [{"id": entry.id, "name": entry.name, "type": entry.type} for entry in matches[:limit]]
+
+    async def load(self, repository) -> None:
+        """Build the index from the client repository, then apply writes made meanwhile"""
+        keys: List[Tuple[str, str]] = []
+        clients: Dict[str, _Entry] = {}
+        try:
+            async for doc in repository.scan(SUGGEST_PROJECTION):
+                entry = self._entry(doc)
+                clients[entry.id] = entry
+                keys.extend((key, entry.id) for key in entry.keys)
+        except PyMongoError:
+            logger.exception("Loading the suggestion index failed; suggestions stay on the database")
+            self.loading = False
+            self._pending = {}
+            return
+        keys.sort()
+        self._keys, self._clients = keys, clients
+        self.ready, self.loading = True, False
+        pending, self._pending = self._pending, {}
+        for client_id, doc in pending.items():
+            if doc is None:
+                self.remove(client_id)
+            else:
+                self.add(doc)
+        logger.info("Suggestion index loaded %d clients", len(clients))
+
+    async def start(self, repository) -> None:
+        self._repository = repository
+        self.loading = True
+        self._task = asyncio.create_task(self.load(repository))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -1,9 +1,64 @@
 import requests
+import asyncio
+import os
+import subprocess
 import sys
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any
 
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+# Builds the app and runs its lifespan startup, with nothing listening
+STARTUP_SCRIPT = """
+import asyncio, server
+app = server.create_app()
+async def start():
+    async with app.router.lifespan_context(app):
+        print(server.change_feed.source)
+asyncio.run(start())
+"""
+
+class FakeRedis:
+    """In-process stand-in for the redis.asyncio calls RedisCache makes, on a settable clock"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.values = {}
+        self.expiry = {}
+
+    def _live(self, key):
+        if key in self.expiry and self.expiry[key] <= self.now:
+            self.values.pop(key, None)
+            self.expiry.pop(key)
+        return key in self.values
+
+    async def get(self, key):
+        return self.values[key] if self._live(key) else None
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        self.expiry.pop(key, None)
+        if ex:
+            self.expiry[key] = self.now + ex
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+
+    async def incr(self, key):
+        value = int(self.values[key]) + 1 if self._live(key) else 1
+        self.values[key] = str(value).encode()
+        return value
+
+    async def expire(self, key, seconds):
+        if self._live(key):
+            self.expiry[key] = self.now + seconds
+
+
 class ClientManagementAPITester:
     def __init__(self, base_url="http://localhost:8001"):
         self.base_url = base_url
@@ -40,6 +95,141 @@ class ClientManagementAPITester:
             self.log_test("Health Check", False, f"Error: {str(e)}")
             return False
 
+    def test_mongomock_startup(self):
+        """Test that the app starts on MONGO_URL=mongomock:// with the default engine and change feed"""
+        try:
+            env = dict(os.environ, MONGO_URL="mongomock://", STORAGE_ENGINE="motor", CHANGE_FEED="auto")
+            result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=BACKEND_DIR, env=env,
+                                    capture_output=True, text=True, timeout=60)
+            source = result.stdout.strip()
+            success = result.returncode == 0 and source == "local"
+            details = f"Exit: {result.returncode}, Change feed: {source or 'N/A'}"
+            if not success and result.stderr.strip():
+                details += f", Error: {result.stderr.strip().splitlines()[-1]}"
+            self.log_test("Mongomock Startup", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Mongomock Startup", False, f"Error: {str(e)}")
+            return False
+
+    def test_redis_cache_stand_in(self):
+        """Test RedisCache against a local stand-in: get/set/delete/incr, TTLs and hit/miss counters"""
+        try:
+            sys.path.insert(0, BACKEND_DIR)
+            from cache import RedisCache
+
+            async def exercise():
+                client = FakeRedis()
+                cache = RedisCache(client, default_ttl=30)
+                record = {"id": "c1", "updated_at": datetime(2024, 1, 2, 3, 4, 5)}
+                checks = {"miss": await cache.get("client:c1") is None}
+                await cache.set("client:c1", record)
+                checks["hit"] = await cache.get("client:c1") == record
+                await cache.set("client:c2", {"id": "c2"}, ttl=5)
+                client.now = 6
+                checks["ttl"] = await cache.get("client:c2") is None and await cache.get("client:c1") == record
+                await cache.delete("client:c1")
+                checks["delete"] = await cache.get("client:c1") is None
+                checks["incr"] = [await cache.incr("gen"), await cache.incr("gen"), await cache.counter("gen")] == [1, 2, 2]
+                await cache.incr("gen:c1", ttl=10)
+                client.now = 17
+                checks["counter ttl"] = await cache.counter("gen:c1") == 0 and await cache.counter("gen") == 2
+                stats = cache.stats()
+                checks["stats"] = (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 3, 4)
+                return checks
+
+            checks = asyncio.run(exercise())
+            failed = [name for name, ok in checks.items() if not ok]
+            success = not failed
+            details = f"Checks: {len(checks)}" + (f", Failed: {failed}" if failed else "")
+            self.log_test("Redis Cache (Stand-in)", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Redis Cache (Stand-in)", False, f"Error: {str(e)}")
+            return False
+
+    def test_token_validation(self):
+        """Test that Entra token checks reject bad tokens with 401 and refetch keys for an unknown kid, rate limited"""
+        try:
+            sys.path.insert(0, BACKEND_DIR)
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric import rsa
+            from fastapi import HTTPException
+            from fastapi.security import HTTPAuthorizationCredentials
+            from jose import jwk, jwt
+            import server
+            from auth import JWKSCache, TokenAuthenticator
+
+            audience, issuer = "test-client-id", "https://login.microsoftonline.com/test-tenant/v2.0"
+
+            def make_key(kid):
+                pem = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+                    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+                signing_key = jwk.construct(pem, "RS256")
+                return signing_key, dict(signing_key.public_key().to_dict(), kid=kid, use="sig")
+
+            def mint(signing_key, kid, **claims):
+                now = int(time.time())
+                claims = {"aud": audience, "iss": issuer, "sub": "user-1", "iat": now, "exp": now + 3600, **claims}
+                return jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": kid})
+
+            (key1, public1), (key2, public2) = make_key("k1"), make_key("k2")
+            jwks = {"keys": [public1]}
+            fetches = []
+
+            async def fetcher():
+                fetches.append(time.monotonic())
+                return jwks
+
+            async def status(token):
+                try:
+                    await server.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+                    return 200
+                except HTTPException as e:
+                    return e.status_code
+
+            async def exercise():
+                keys = JWKSCache(fetcher, min_refresh=1.0)
+                server.authenticator = TokenAuthenticator(keys, audience=audience, issuer=issuer, leeway=0)
+                await keys.refresh()
+                now = int(time.time())
+                checks = {
+                    "valid": await status(mint(key1, "k1")) == 200,
+                    "expired": await status(mint(key1, "k1", exp=now - 10)) == 401,
+                    "audience": await status(mint(key1, "k1", aud="someone-else")) == 401,
+                    "issuer": await status(mint(key1, "k1", iss="https://issuer.example")) == 401,
+                    "signature": await status(mint(key2, "k1")) == 401,
+                }
+                # Unknown kid: one refetch, then none until min_refresh has passed
+                await asyncio.sleep(1.0)
+                before = len(fetches)
+                rotated = mint(key2, "k2")
+                checks["unknown kid"] = await status(rotated) == 401 and len(fetches) == before + 1
+                jwks["keys"].append(public2)
+                checks["refresh rate limited"] = await status(rotated) == 401 and len(fetches) == before + 1
+                await asyncio.sleep(1.0)
+                checks["rotated key"] = await status(rotated) == 200 and len(fetches) == before + 2
+                # A memoized token is dropped from the LRU at its exp; jose compares whole seconds
+                short = mint(key1, "k1", exp=int(time.time()) + 1)
+                checks["lru before exp"] = await status(short) == 200
+                await asyncio.sleep(2.1)
+                checks["lru after exp"] = await status(short) == 401
+                return checks
+
+            previous = server.authenticator
+            try:
+                checks = asyncio.run(exercise())
+            finally:
+                server.authenticator = previous
+            failed = [name for name, ok in checks.items() if not ok]
+            success = not failed
+            details = f"Checks: {len(checks)}, JWKS fetches: {len(fetches)}" + (f", Failed: {failed}" if failed else "")
+            self.log_test("Token Validation", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Token Validation", False, f"Error: {str(e)}")
+            return False
+
     def test_get_clients_empty(self):
         """Test getting clients when database is empty"""
         try:
@@ -147,6 +337,74 @@ class ClientManagementAPITester:
             self.log_test("Get Clients (With Data)", False, f"Error: {str(e)}")
             return False
 
+    def test_get_clients_summary(self):
+        """Test that list rows are summaries unless sections are expanded"""
+        try:
+            response = requests.get(f"{self.base_url}/api/clients", headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                clients = response.json()
+                success = all('notes' not in c and 'credentials' not in c for c in clients)
+                response = requests.get(f"{self.base_url}/api/clients?expand=documents", headers=self.headers)
+                expanded = response.json()
+                success = success and response.status_code == 200 and all('documents' in c for c in expanded)
+                details += f", Summary Rows: {len(clients)}, Expanded Rows: {len(expanded)}"
+            
+            self.log_test("Get Clients (Summary Projection)", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Get Clients (Summary Projection)", False, f"Error: {str(e)}")
+            return False
+
+    def test_paginate_clients(self):
+        """Test cursor pagination through the client list"""
+        try:
+            response = requests.get(f"{self.base_url}/api/clients?limit=1", headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                first_page = response.json()
+                next_cursor = response.headers.get('X-Next-Cursor')
+                success = len(first_page) == 1 and next_cursor is not None
+                if success:
+                    response = requests.get(f"{self.base_url}/api/clients",
+                                          params={"limit": 1, "cursor": next_cursor}, headers=self.headers)
+                    second_page = response.json()
+                    success = (response.status_code == 200 and len(second_page) == 1
+                               and second_page[0]['id'] != first_page[0]['id'])
+                details += f", Next Cursor: {next_cursor}"
+            
+            self.log_test("Paginate Clients", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Paginate Clients", False, f"Error: {str(e)}")
+            return False
+
+    def test_streamed_compressed_page(self):
+        """Test that a large page is streamed as a JSON array with gzip encoding"""
+        try:
+            response = requests.get(
+                f"{self.base_url}/api/clients",
+                params={"limit": 500},
+                headers={**self.headers, "Accept-Encoding": "gzip"}
+            )
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                encoding = response.headers.get("Content-Encoding")
+                success = encoding == "gzip" and isinstance(response.json(), list)
+                details += f", Content-Encoding: {encoding}, Rows: {len(response.json())}"
+            
+            self.log_test("Streamed Compressed Page", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Streamed Compressed Page", False, f"Error: {str(e)}")
+            return False
+
     def test_search_clients(self):
         """Test client search functionality"""
         try:
@@ -165,6 +423,128 @@ class ClientManagementAPITester:
             self.log_test("Search Clients", False, f"Error: {str(e)}")
             return False
 
+    def test_coalesced_list_queries(self):
+        """Test that identical concurrent list requests all succeed and are counted as coalesced"""
+        try:
+            with ThreadPoolExecutor(max_workers=10) as pool:
+                responses = list(pool.map(
+                    lambda _: requests.get(f"{self.base_url}/api/clients?client_type=company&limit=7",
+                                           headers=self.headers),
+                    range(10)
+                ))
+            statuses = sorted({response.status_code for response in responses})
+            success = statuses == [200] and len({response.text for response in responses}) == 1
+            details = f"Statuses: {statuses}"
+            
+            if success:
+                metrics = requests.get(f"{self.base_url}/api/metrics", headers=self.headers).text
+                success = 'singleflight_calls_total{group="list_clients",role="leader"}' in metrics
+                details += ", Metrics: singleflight_calls_total present"
+            
+            self.log_test("Coalesced List Queries", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Coalesced List Queries", False, f"Error: {str(e)}")
+            return False
+
+    def test_concurrent_searches(self):
+        """Test that concurrent searches from one account without a search session are never superseded"""
+        try:
+            terms = ["jo", "joh", "john", "do", "doe", "tech", "te", "acme", "ma", "main"]
+            with ThreadPoolExecutor(max_workers=len(terms)) as pool:
+                responses = list(pool.map(
+                    lambda term: requests.get(f"{self.base_url}/api/clients", params={"search": term},
+                                              headers=self.headers),
+                    terms
+                ))
+            statuses = sorted({response.status_code for response in responses})
+            success = statuses == [200]
+            details = f"Statuses: {statuses}"
+            
+            self.log_test("Concurrent Searches", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Concurrent Searches", False, f"Error: {str(e)}")
+            return False
+
+    def test_search_clients_prefix(self):
+        """Test search-as-you-type prefix matching and relevance ordering"""
+        try:
+            response = requests.get(f"{self.base_url}/api/clients?search=jo do", headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                clients = response.json()
+                details += f", Search Results: {len(clients)}"
+                success = len(clients) >= 1 and clients[0].get('data', {}).get('last_name') == 'Doe'
+            
+            self.log_test("Search Clients (Prefix)", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Search Clients (Prefix)", False, f"Error: {str(e)}")
+            return False
+
+    def test_search_clients_special_characters(self):
+        """Test that regex/operator characters in search input are handled safely"""
+        try:
+            response = requests.get(f"{self.base_url}/api/clients", params={"search": '(john" -[*'},
+                                  headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                clients = response.json()
+                details += f", Search Results: {len(clients)}"
+            
+            self.log_test("Search Clients (Special Characters)", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Search Clients (Special Characters)", False, f"Error: {str(e)}")
+            return False
+
+    def test_search_clients_no_terms(self):
+        """Test that a search with nothing searchable in it matches no clients rather than all of them"""
+        try:
+            responses = [requests.get(f"{self.base_url}/api/clients", params={"search": search}, headers=self.headers)
+                         for search in ["a", "!!", "(a+)+$"]]
+            statuses = sorted({response.status_code for response in responses})
+            success = statuses == [200]
+            details = f"Statuses: {statuses}"
+            
+            if success:
+                counts = [len(response.json()) for response in responses]
+                success = counts == [0, 0, 0]
+                details += f", Result counts: {counts}"
+            
+            self.log_test("Search Clients (No Terms)", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Search Clients (No Terms)", False, f"Error: {str(e)}")
+            return False
+
+    def test_suggest_clients(self):
+        """Test typeahead suggestions for a name prefix"""
+        try:
+            response = requests.get(
+                f"{self.base_url}/api/clients/suggest",
+                params={"q": "Joh"},
+                headers=self.headers
+            )
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                suggestions = response.json()
+                success = any(item['name'].startswith("John") for item in suggestions)
+                details += f", Suggestions: {[item['name'] for item in suggestions]}"
+            
+            self.log_test("Suggest Clients", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Suggest Clients", False, f"Error: {str(e)}")
+            return False
+
     def test_filter_clients_by_type(self):
         """Test client filtering by type"""
         try:
@@ -183,6 +563,78 @@ class ClientManagementAPITester:
             self.log_test("Filter Clients by Type", False, f"Error: {str(e)}")
             return False
 
+    def test_bulk_import_clients(self):
+        """Test bulk import from an NDJSON body with per-row errors"""
+        try:
+            rows = [
+                {"type": "person",
+                 "data": {"first_name": "Bulk", "last_name": "Person", "email": "bulk.person@example.com"},
+                 "ownership": {"primary_owner": "user@company.com"}},
+                {"type": "company"},  # Missing data and ownership
+                {"type": "company",
+                 "data": {"company_name": "Bulk Industries", "contact_person": "Pat Bulk", "email": "info@bulk.example"},
+                 "ownership": {"primary_owner": "user@company.com"}},
+            ]
+            body = "\n".join(json.dumps(row) for row in rows)
+            headers = {**self.headers, 'Content-Type': 'application/x-ndjson'}
+            response = requests.post(f"{self.base_url}/api/clients/bulk", data=body, headers=headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                result = response.json()
+                success = (result.get('inserted') == 2 and result.get('failed') == 1
+                           and result['errors'][0]['row'] == 2)
+                details += f", Inserted: {result.get('inserted')}, Failed: {result.get('failed')}"
+            
+            self.log_test("Bulk Import Clients", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Bulk Import Clients", False, f"Error: {str(e)}")
+            return False
+
+    def test_export_clients(self):
+        """Test streaming export as NDJSON and CSV"""
+        try:
+            response = requests.get(f"{self.base_url}/api/clients/export", headers=self.headers, stream=True)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                exported = [json.loads(line) for line in response.iter_lines() if line]
+                response = requests.get(f"{self.base_url}/api/clients/export?format=csv&client_type=company",
+                                      headers=self.headers)
+                csv_lines = response.text.splitlines()
+                success = (len(exported) >= 1 and response.status_code == 200
+                           and csv_lines[0].startswith("id,type,"))
+                details += f", NDJSON Rows: {len(exported)}, CSV Lines: {len(csv_lines)}"
+            
+            self.log_test("Export Clients", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Export Clients", False, f"Error: {str(e)}")
+            return False
+
+    def test_export_clients_search(self):
+        """Test exporting search results, which run as a text-score aggregation"""
+        try:
+            response = requests.get(f"{self.base_url}/api/clients/export", params={"search": "John"},
+                                  headers=self.headers, stream=True)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                exported = [json.loads(line) for line in response.iter_lines() if line]
+                success = (len(exported) >= 1
+                           and all("quickbooks" in row and "score" not in row and "search" not in row for row in exported))
+                details += f", NDJSON Rows: {len(exported)}"
+            
+            self.log_test("Export Clients (Search)", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Export Clients (Search)", False, f"Error: {str(e)}")
+            return False
+
     def test_get_specific_client(self):
         """Test getting a specific client by ID"""
         if not self.created_client_id:
@@ -229,6 +681,147 @@ class ClientManagementAPITester:
             self.log_test("Update Client", False, f"Error: {str(e)}")
             return False
 
+    def test_batch_operations(self):
+        """Test batch get (with a missing id) and a batch owner reassignment"""
+        if not self.created_client_id:
+            self.log_test("Batch Operations", False, "No client ID available")
+            return False
+            
+        try:
+            get_response = requests.post(
+                f"{self.base_url}/api/clients/batch-get",
+                json={"ids": [self.created_client_id, "missing-client-id"]},
+                headers=self.headers
+            )
+            client = get_response.json()["clients"][0] if get_response.status_code == 200 else {}
+            update_response = requests.post(
+                f"{self.base_url}/api/clients/batch-update",
+                json={"updates": [
+                    {"id": self.created_client_id, "update": {"ownership": client.get("ownership")}},
+                    {"id": "missing-client-id", "update": {}},
+                ]},
+                headers=self.headers
+            )
+            success = get_response.status_code == update_response.status_code == 200
+            details = f"Status: {get_response.status_code}/{update_response.status_code}"
+            
+            if success:
+                statuses = [item["status"] for item in update_response.json()["results"]]
+                success = get_response.json()["missing"] == ["missing-client-id"] and statuses == [200, 404]
+                details += f", Missing: {get_response.json()['missing']}, Update statuses: {statuses}"
+            
+            self.log_test("Batch Operations", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Batch Operations", False, f"Error: {str(e)}")
+            return False
+
+    def test_conditional_requests(self):
+        """Test ETag/If-None-Match (304) and If-Match (412) on a client"""
+        if not self.created_client_id:
+            self.log_test("Conditional Requests", False, "No client ID available")
+            return False
+            
+        try:
+            url = f"{self.base_url}/api/clients/{self.created_client_id}"
+            response = requests.get(url, headers=self.headers)
+            etag = response.headers.get('ETag')
+            success = response.status_code == 200 and etag is not None
+            details = f"Status: {response.status_code}, ETag: {etag}"
+            
+            if success:
+                not_modified = requests.get(url, headers={**self.headers, 'If-None-Match': etag})
+                updated = requests.put(url, json={"data": {"phone": "+1-555-8888"}},
+                                     headers={**self.headers, 'If-Match': etag})
+                stale = requests.put(url, json={"data": {"phone": "+1-555-7777"}},
+                                   headers={**self.headers, 'If-Match': etag})
+                success = (not_modified.status_code == 304 and updated.status_code == 200
+                           and stale.status_code == 412)
+                details += (f", If-None-Match: {not_modified.status_code}, If-Match: {updated.status_code}"
+                            f", Stale If-Match: {stale.status_code}")
+            
+            self.log_test("Conditional Requests", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Conditional Requests", False, f"Error: {str(e)}")
+            return False
+
+    def test_job_write_keeps_version(self):
+        """Test that a background job's write leaves the version user edits are checked against alone"""
+        try:
+            response = requests.post(f"{self.base_url}/api/clients", json={
+                "type": "company",
+                "data": {"company_name": "Job Write Corp", "email": "jobs@example.com"},
+                "ownership": {"primary_owner": "user@company.com"}
+            }, headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                created = response.json()
+                url = f"{self.base_url}/api/clients/{created['id']}"
+                status = None
+                for _ in range(50):
+                    jobs = requests.get(f"{url}/jobs", headers=self.headers).json()
+                    status = next((job["status"] for job in jobs if job["kind"] == "sharepoint.provision"), None)
+                    if status in ("succeeded", "failed"):
+                        break
+                    time.sleep(0.2)
+                current = requests.get(url, headers=self.headers)
+                client = current.json()
+                success = (status == "succeeded" and client["version"] == created["version"]
+                           and bool((client.get("documents") or {}).get("sharepoint_folder_url")))
+                details += f", Job: {status}, Version: {created['version']} -> {client['version']}"
+                
+                if success:
+                    updated = requests.put(url, json={"data": {"phone": "+1-555-6666"}},
+                                         headers={**self.headers, 'If-Match': current.headers.get('ETag')})
+                    success = updated.status_code == 200
+                    details += f", If-Match: {updated.status_code}"
+                requests.delete(url, headers=self.headers)
+            
+            self.log_test("Job Write Keeps Version", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Job Write Keeps Version", False, f"Error: {str(e)}")
+            return False
+
+    def test_compressed_validators(self):
+        """Test strong per-encoding ETags, Vary on every compressible response, and weak If-Match rejection"""
+        if not self.created_client_id:
+            self.log_test("Compressed Validators", False, "No client ID available")
+            return False
+            
+        try:
+            gzip_headers = {**self.headers, "Accept-Encoding": "gzip"}
+            # Expanded rows, so even a few of them are worth compressing
+            params = {"limit": 100, "expand": "quickbooks,documents,credentials"}
+            page = requests.get(f"{self.base_url}/api/clients", params=params, headers=gzip_headers)
+            etag = page.headers.get("ETag") or ""
+            success = (page.headers.get("Content-Encoding") == "gzip" and etag.endswith('-gzip"')
+                       and not etag.startswith("W/"))
+            details = f"Status: {page.status_code}, ETag: {etag}"
+            
+            if success:
+                not_modified = requests.get(f"{self.base_url}/api/clients", params=params,
+                                            headers={**gzip_headers, "If-None-Match": etag})
+                url = f"{self.base_url}/api/clients/{self.created_client_id}"
+                plain = requests.get(url, headers={**self.headers, "Accept-Encoding": "identity"})
+                weak = requests.put(url, json={"data": {"phone": "+1-555-5555"}},
+                                    headers={**self.headers, "If-Match": f'W/{plain.headers.get("ETag")}'})
+                success = (not_modified.status_code == 304 and not_modified.headers.get("ETag") == etag
+                           and "Accept-Encoding" in plain.headers.get("Vary", "")
+                           and "Accept-Encoding" in not_modified.headers.get("Vary", "")
+                           and weak.status_code == 412)
+                details += (f", If-None-Match: {not_modified.status_code}, Vary (identity): "
+                            f"{plain.headers.get('Vary')}, Weak If-Match: {weak.status_code}")
+            
+            self.log_test("Compressed Validators", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Compressed Validators", False, f"Error: {str(e)}")
+            return False
+
     def test_add_note(self):
         """Test adding a note to a client"""
         if not self.created_client_id:
@@ -281,6 +874,97 @@ class ClientManagementAPITester:
             self.log_test("Add Tracking Entry", False, f"Error: {str(e)}")
             return False
 
+    def test_my_clients(self):
+        """Test the caller's worklist: owned and co-owned clients, most recently active first"""
+        if not self.created_client_id:
+            self.log_test("My Clients", False, "No client ID available")
+            return False
+        
+        try:
+            def create(primary_owner, secondary_owners):
+                body = {"type": "company",
+                        "data": {"company_name": "Worklist Co", "contact_person": "Pat Doe", "email": "pat@worklist.example"},
+                        "ownership": {"primary_owner": primary_owner, "secondary_owners": secondary_owners}}
+                return requests.post(f"{self.base_url}/api/clients", json=body, headers=self.headers).json()["id"]
+            
+            co_owned = create("someone.else@company.com", ["user@company.com"])
+            not_mine = create("someone.else@company.com", [])
+            # Activity on the older client moves it to the top
+            requests.post(f"{self.base_url}/api/clients/{self.created_client_id}/tracking",
+                        params={"activity_type": "email", "description": "Worklist check"}, headers=self.headers)
+            
+            response = requests.get(f"{self.base_url}/api/clients/mine", headers=self.headers)
+            filtered = requests.get(f"{self.base_url}/api/clients", params={"owner": "me", "limit": 1000},
+                                  headers=self.headers)
+            success = response.status_code == filtered.status_code == 200
+            details = f"Status: {response.status_code}/{filtered.status_code}"
+            
+            if success:
+                page = response.json()
+                ids = [client["id"] for client in page["clients"]]
+                counts = page.get("counts") or {}
+                success = (
+                    page["owner"] == "user@company.com"
+                    and ids[:1] == [self.created_client_id]
+                    and co_owned in ids and not_mine not in ids
+                    and counts.get("secondary", 0) >= 1
+                    and counts.get("total") == counts.get("primary", 0) + counts.get("secondary", 0)
+                    and [client["id"] for client in filtered.json()][:len(ids)] == ids
+                )
+                details += f", Counts: {counts}, First: {ids[:1]}"
+            
+            self.log_test("My Clients", success, details)
+            return success
+        except Exception as e:
+            self.log_test("My Clients", False, f"Error: {str(e)}")
+            return False
+
+    def test_get_notes(self):
+        """Test listing a client's notes from the notes collection"""
+        if not self.created_client_id:
+            self.log_test("Get Notes", False, "No client ID available")
+            return False
+            
+        try:
+            response = requests.get(f"{self.base_url}/api/clients/{self.created_client_id}/notes", 
+                                  headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                notes = response.json()
+                success = len(notes) >= 1
+                details += f", Notes: {len(notes)}"
+            
+            self.log_test("Get Notes", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Get Notes", False, f"Error: {str(e)}")
+            return False
+
+    def test_get_tracking_entries(self):
+        """Test listing a client's tracking entries from the tracking collection"""
+        if not self.created_client_id:
+            self.log_test("Get Tracking Entries", False, "No client ID available")
+            return False
+            
+        try:
+            response = requests.get(f"{self.base_url}/api/clients/{self.created_client_id}/tracking", 
+                                  headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                entries = response.json()
+                success = len(entries) >= 1
+                details += f", Tracking Entries: {len(entries)}"
+            
+            self.log_test("Get Tracking Entries", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Get Tracking Entries", False, f"Error: {str(e)}")
+            return False
+
     def test_get_sharepoint_url(self):
         """Test getting SharePoint URL for a client"""
         if not self.created_client_id:
@@ -303,6 +987,152 @@ class ClientManagementAPITester:
             self.log_test("Get SharePoint URL", False, f"Error: {str(e)}")
             return False
 
+    def test_client_jobs(self):
+        """Test that creating a client queued its SharePoint provisioning job"""
+        if not self.created_client_id:
+            self.log_test("Client Jobs", False, "No client ID available")
+            return False
+            
+        try:
+            response = requests.get(f"{self.base_url}/api/clients/{self.created_client_id}/jobs", 
+                                  headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                jobs = {job["kind"]: job["status"] for job in response.json()}
+                success = "sharepoint.provision" in jobs
+                details += f", Jobs: {jobs}"
+            
+            self.log_test("Client Jobs", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Client Jobs", False, f"Error: {str(e)}")
+            return False
+
+    def test_change_stream(self):
+        """Test that a note added to a client arrives on a change stream opened with a ticket"""
+        if not self.created_client_id:
+            self.log_test("Change Stream", False, "No client ID available")
+            return False
+        
+        try:
+            # Bearer tokens are refused in the query string; EventSource clients use a ticket
+            token_in_url = requests.get(f"{self.base_url}/api/clients/stream", params={"access_token": self.token})
+            ticket = requests.post(f"{self.base_url}/api/clients/stream/ticket", headers=self.headers).json()["ticket"]
+            stream = requests.get(f"{self.base_url}/api/clients/stream",
+                                params={"ticket": ticket}, stream=True, timeout=10)
+            success = (token_in_url.status_code == 401 and stream.status_code == 200
+                       and stream.headers.get('content-type', '').startswith('text/event-stream'))
+            details = f"Token in URL: {token_in_url.status_code}, Status: {stream.status_code}"
+            
+            if success:
+                lines = stream.iter_lines(decode_unicode=True)
+                next(lines)  # connected once the first frame arrives
+                requests.post(f"{self.base_url}/api/clients/{self.created_client_id}/notes",
+                            params={"note_content": "Change stream check"}, headers=self.headers)
+                event_id, event = None, None
+                for line in lines:
+                    if line.startswith('id: '):
+                        event_id = line[4:]
+                    elif line.startswith('data: '):
+                        payload = json.loads(line[6:])
+                        if payload.get('type') == 'note' and payload.get('client_id') == self.created_client_id:
+                            event = payload
+                            break
+                success = event is not None and event_id is not None
+                details += f", Event ID: {event_id}"
+            stream.close()
+            
+            self.log_test("Change Stream", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Change Stream", False, f"Error: {str(e)}")
+            return False
+
+    def test_client_stats(self):
+        """Test that the stats rollups agree with a live aggregation"""
+        try:
+            rollup = requests.get(f"{self.base_url}/api/stats/clients", headers=self.headers)
+            live = requests.get(f"{self.base_url}/api/stats/clients", params={"live": "true"}, headers=self.headers)
+            activity = requests.get(f"{self.base_url}/api/stats/activity", params={"weeks": 4}, headers=self.headers)
+            success = rollup.status_code == live.status_code == activity.status_code == 200
+            details = f"Status: {rollup.status_code}/{live.status_code}/{activity.status_code}"
+            
+            if success:
+                success = rollup.json() == live.json()
+                details += f", Total: {rollup.json().get('total')}, Matches live: {success}"
+                details += f", Activity groups: {len(activity.json())}"
+            
+            self.log_test("Client Stats", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Client Stats", False, f"Error: {str(e)}")
+            return False
+
+    def test_metrics(self):
+        """Test that /api/metrics exports route histograms, DB commands and pool usage"""
+        try:
+            requests.get(f"{self.base_url}/api/clients", params={"limit": 5}, headers=self.headers)
+            anonymous = requests.get(f"{self.base_url}/api/metrics")
+            response = requests.get(f"{self.base_url}/api/metrics", headers=self.headers)
+            success = anonymous.status_code in (401, 403) and response.status_code == 200
+            details = f"Anonymous: {anonymous.status_code}, Status: {response.status_code}"
+            
+            if success:
+                body = response.text
+                success = ('http_request_duration_seconds_bucket{method="GET",route="/api/clients"' in body
+                           and 'db_pool_checkouts_total' in body)
+                details += f", Route histogram and pool metrics: {success}, DB commands exported: {'db_commands_total' in body}"
+            
+            self.log_test("Metrics", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Metrics", False, f"Error: {str(e)}")
+            return False
+
+    def test_cache_stats(self):
+        """Test that repeated detail reads are served from the cache"""
+        if not self.created_client_id:
+            self.log_test("Cache Stats", False, "No client ID available")
+            return False
+            
+        try:
+            before = requests.get(f"{self.base_url}/api/cache/stats", headers=self.headers).json()
+            for _ in range(2):
+                requests.get(f"{self.base_url}/api/clients/{self.created_client_id}", headers=self.headers)
+            response = requests.get(f"{self.base_url}/api/cache/stats", headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            if success:
+                after = response.json()
+                success = after.get('backend') == 'NullCache' or after['hits'] > before['hits']
+                details += f", Hits: {after.get('hits')}, Misses: {after.get('misses')}"
+            
+            self.log_test("Cache Stats", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Cache Stats", False, f"Error: {str(e)}")
+            return False
+
+    def test_query_plans(self):
+        """Test that no handler query falls back to a collection scan"""
+        try:
+            response = requests.get(f"{self.base_url}/api/diagnostics/query-plans", headers=self.headers)
+            success = response.status_code == 200
+            details = f"Status: {response.status_code}"
+            
+            report = response.json()
+            scans = [q['handlers'][0] for q in report.get('queries', []) if q.get('collscan')]
+            details += f", Queries: {len(report.get('queries', []))}, COLLSCAN: {scans or 'none'}"
+            
+            self.log_test("Query Plans", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Query Plans", False, f"Error: {str(e)}")
+            return False
+
     def test_microsoft_auth(self):
         """Test mock Microsoft authentication"""
         try:
@@ -336,6 +1166,20 @@ class ClientManagementAPITester:
             self.log_test("Unauthorized Access", False, f"Error: {str(e)}")
             return False
 
+    def test_invalid_token(self):
+        """Test API with a bearer token that does not validate"""
+        try:
+            headers_bad_auth = {'Content-Type': 'application/json', 'Authorization': 'Bearer not-a-valid-token'}
+            response = requests.get(f"{self.base_url}/api/clients", headers=headers_bad_auth)
+            success = response.status_code == 401
+            details = f"Status: {response.status_code} (Expected 401)"
+            
+            self.log_test("Invalid Token", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Invalid Token", False, f"Error: {str(e)}")
+            return False
+
     def run_all_tests(self):
         """Run all API tests"""
         print("🚀 Starting Client Management API Tests")
@@ -344,19 +1188,48 @@ class ClientManagementAPITester:
         # Test sequence
         tests = [
             self.test_health_endpoint,
+            self.test_mongomock_startup,
+            self.test_redis_cache_stand_in,
+            self.test_token_validation,
             self.test_unauthorized_access,
+            self.test_invalid_token,
             self.test_microsoft_auth,
             self.test_get_clients_empty,
             self.test_create_person_client,
             self.test_create_company_client,
             self.test_get_clients_with_data,
+            self.test_get_clients_summary,
+            self.test_paginate_clients,
+            self.test_streamed_compressed_page,
             self.test_search_clients,
+            self.test_search_clients_prefix,
+            self.test_coalesced_list_queries,
+            self.test_concurrent_searches,
+            self.test_search_clients_special_characters,
+            self.test_search_clients_no_terms,
+            self.test_suggest_clients,
             self.test_filter_clients_by_type,
+            self.test_bulk_import_clients,
+            self.test_export_clients,
+            self.test_export_clients_search,
             self.test_get_specific_client,
             self.test_update_client,
+            self.test_batch_operations,
+            self.test_conditional_requests,
+            self.test_job_write_keeps_version,
+            self.test_compressed_validators,
             self.test_add_note,
             self.test_add_tracking_entry,
+            self.test_my_clients,
+            self.test_get_notes,
+            self.test_get_tracking_entries,
             self.test_get_sharepoint_url,
+            self.test_client_jobs,
+            self.test_change_stream,
+            self.test_client_stats,
+            self.test_metrics,
+            self.test_cache_stats,
+            self.test_query_plans,
         ]
         
         for test in tests:
@@ -0,0 +1,151 @@
+"""Authentication overhead per request, in microseconds.
+
+Generates a local RSA key set, serves it from a stub JWKS server on
+127.0.0.1 and times each authenticator path:
+
+    mock          the development mock-token check
+    verified      a token seen before, served from the token LRU
+    full verify   a token seen for the first time (signature + claims)
+    rejected      a token signed by an unknown key
+
+Before timing it checks that bad audience, issuer, expiry and signature
+are rejected and that a rotated ``kid`` triggers exactly one JWKS refetch.
+
+Usage:
+    python benchmarks/auth.py [--iterations 20000] [--tokens 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from auth import JWKSCache, MockAuthenticator, TokenAuthenticator, url_fetcher  # noqa: E402
+
+AUDIENCE = "bench-client-id"
+ISSUER = "https://login.microsoftonline.com/bench-tenant/v2.0"
+
+
+def make_key(kid: str):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    signing_key = jwk.construct(pem, "RS256")
+    public = signing_key.public_key().to_dict()
+    public.update(kid=kid, use="sig")
+    return signing_key, public
+
+
+def mint(signing_key, kid: str, n: int = 0, **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "aud": AUDIENCE,
+        "iss": ISSUER,
+        "sub": f"user-{n}",
+        "oid": f"oid-{n}",
+        "preferred_username": f"user{n}@company.com",
+        "name": f"User {n}",
+        "iat": now,
+        "exp": now + 3600,
+        **overrides,
+    }
+    return jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": kid})
+
+
+class StubJWKSServer:
+    """Serves a mutable JWK Set and counts fetches"""
+
+    def __init__(self, keys):
+        self.jwks = {"keys": list(keys)}
+        self.fetches = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.fetches += 1
+                body = json.dumps(stub.jwks).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/keys"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+async def timed(label: str, authenticate, tokens, expect_user: bool) -> None:
+    start = time.perf_counter()
+    for token in tokens:
+        user = await authenticate(token)
+        assert (user is not None) == expect_user, label
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} {len(tokens):>8} {elapsed / len(tokens) * 1e6:>10.1f}")
+
+
+async def main(args) -> int:
+    signing_key, public = make_key("key-1")
+    rotated_key, rotated_public = make_key("key-2")
+    stranger_key, _ = make_key("key-x")
+    stub = StubJWKSServer([public])
+
+    try:
+        keys = JWKSCache(url_fetcher(stub.url), min_refresh=0)
+        validator = TokenAuthenticator(keys, audience=AUDIENCE, issuer=ISSUER, max_entries=args.tokens * 2)
+        await validator.start()
+
+        user = await validator.authenticate(mint(signing_key, "key-1"))
+        assert user == {"sub": "oid-0", "email": "user0@company.com", "name": "User 0"}, user
+        for label, token in [
+            ("audience", mint(signing_key, "key-1", aud="someone-else")),
+            ("issuer", mint(signing_key, "key-1", iss="https://evil.example.com")),
+            ("expired", mint(signing_key, "key-1", exp=int(time.time()) - 3600)),
+            ("signature", mint(stranger_key, "key-1")),
+        ]:
+            assert await validator.authenticate(token) is None, f"{label} check accepted a bad token"
+
+        fetches = stub.fetches
+        stub.jwks = {"keys": [public, rotated_public]}
+        assert await validator.authenticate(mint(rotated_key, "key-2")) is not None
+        assert stub.fetches == fetches + 1, "kid rotation should refetch the JWKS once"
+        keys.min_refresh = 3600
+        print(f"Correctness checks passed ({stub.fetches} JWKS fetches)\n")
+
+        fresh = [mint(signing_key, "key-1", n) for n in range(args.tokens)]
+        unknown = [mint(stranger_key, "key-x", n) for n in range(min(args.tokens, 1000))]
+        cached = [fresh[n % len(fresh)] for n in range(args.iterations)]
+        mock = MockAuthenticator()
+
+        print(f"{'path':<14} {'calls':>8} {'us/call':>10}")
+        await timed("mock", mock.authenticate, ["mock-token"] * args.iterations, True)
+        await timed("full verify", validator.authenticate, fresh, True)
+        await timed("verified", validator.authenticate, cached, True)
+        await timed("rejected", validator.authenticate, unknown, False)
+        await validator.stop()
+        print(f"\nJWKS fetches: {stub.fetches}; token cache: {validator.tokens.stats()}")
+    finally:
+        stub.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="Calls for the mock and cached paths")
+    parser.add_argument("--tokens", type=int, default=2000, help="Distinct tokens for the full-verify path")
+    sys.exit(asyncio.run(main(parser.parse_args())))
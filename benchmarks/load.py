@@ -0,0 +1,427 @@
+"""Concurrent mixed-workload load test with stored baselines.
+
+Seeds synthetic clients (through the bulk import endpoint) with notes and
+tracking entries, then runs a weighted mix of scenarios from many
+concurrent workers for a fixed duration:
+
+    search      search-as-you-type: one list request per keystroke
+    paging      list pages followed through X-Next-Cursor
+    detail      client detail with its first notes and tracking pages
+    note        note appends
+    bulk        NDJSON bulk imports
+
+Latency percentiles (p50/p95/p99) and requests/sec are reported per
+endpoint.  Results can be saved as a baseline and later runs compared
+against it; the comparison exits non-zero on a regression.
+
+By default the app runs in-process through ASGITransport against a scratch
+database on a local mongod (dropped afterwards).  ``--mongo-url mongomock://``
+uses mongomock-motor instead, when installed; it has no text search, so
+search requests are reported as errors unless clients are kept in the
+in-memory engine (``--engine memory``, see repository.py).  ``--url``
+drives a live server.
+
+After the run, the share of list queries served by joining an identical
+one already in flight (the singleflight coalescing ratio) and the number
+of superseded searches are read from /api/metrics.  Every worker signs in
+as the same mock user; each typed search sends its own X-Search-Session,
+as a browser tab would, so workers never supersede each other.
+
+Usage:
+    python benchmarks/load.py [--clients 1000] [--duration 30] [--concurrency 32]
+    python benchmarks/load.py --save-baseline benchmarks/baselines/local.json
+    python benchmarks/load.py --baseline benchmarks/baselines/local.json [--tolerance 0.2]
+    python benchmarks/load.py --url http://localhost:8001 [--no-seed]
+    python benchmarks/load.py --mongo-url mongomock:// --engine memory
+    python benchmarks/load.py --mongo-url mongomock:// --engine memory --baseline benchmarks/baselines/memory.json
+
+benchmarks/baselines/memory.json was recorded with the defaults against
+the in-memory engine on one core.  Notes, tracking and the job queue still
+live in mongomock, which scans whole collections, so its figures only make
+sense as a regression reference for that setup.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+AUTH_HEADERS = {"Authorization": "Bearer mock-token"}
+
+FIRST_NAMES = ["Anna", "Bruno", "Chloé", "Dmitri", "Elena", "Farid", "Grace", "Hiroshi", "Inès", "João",
+               "Katarzyna", "Liam", "María", "Noah", "Olivia", "Pieter", "Quentin", "Rosa", "Søren", "Tomás"]
+LAST_NAMES = ["Andersen", "Bianchi", "Costa", "Dubois", "Eriksson", "Fischer", "García", "Hansen", "Ivanova",
+              "Jansen", "Kowalski", "López", "Müller", "Nowak", "O'Brien", "Petrov", "Rossi", "Schmidt"]
+COMPANY_WORDS = ["Acme", "Northwind", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay",
+                 "Soylent", "Cyberdyne", "Tyrell", "Wonka", "Gringotts", "Oscorp"]
+COMPANY_SUFFIXES = ["Holdings", "GmbH", "Partners", "Logistics", "Consulting", "Labs", "& Co"]
+NOTE_PHRASES = ["Followed up on renewal terms", "Requested updated tax documents", "Discussed Q3 budget",
+                "Sent engagement letter", "Left voicemail about invoice", "Reviewed payroll setup"]
+ACTIVITY_TYPES = ["call", "email", "meeting", "document"]
+
+# Scenario weights for the default mix
+DEFAULT_MIX = {"search": 35, "paging": 20, "detail": 30, "note": 10, "bulk": 5}
+
+SEARCH_PAGE = 20
+LIST_PAGE = 50
+LIST_PAGES = 3
+ACTIVITY_PAGE = 20
+BULK_BATCH = 100
+
+
+def synthetic_client(rng: random.Random, i: int) -> dict:
+    if rng.random() < 0.6:
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        client_type = "person"
+        data = {
+            "first_name": first,
+            "last_name": last,
+            "email": f"{first.lower()}.{i}@example.com",
+            "phone": f"+1-555-{rng.randrange(10000):04d}",
+        }
+    else:
+        name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+        client_type = "company"
+        data = {
+            "company_name": name,
+            "contact_person": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"office{i}@example.com",
+            "industry": rng.choice(["Retail", "Manufacturing", "Healthcare", "Finance"]),
+        }
+    return {
+        "type": client_type,
+        "data": data,
+        "ownership": {"primary_owner": f"owner{rng.randrange(20)}@company.com", "department": "Sales"},
+    }
+
+
+def search_words(client: dict) -> List[str]:
+    data = client["data"]
+    return [word for key in ("first_name", "last_name", "company_name") for word in data.get(key, "").split()]
+
+
+def ndjson(records: List[dict]) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+class Recorder:
+    """Latency samples and error counts per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, http: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await http.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        if response is None or response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    results = {}
+    for label, samples in sorted(recorder.latencies.items()):
+        ordered = sorted(samples)
+        results[label] = {
+            "requests": len(ordered),
+            "errors": recorder.errors.get(label, 0),
+            "rps": round(len(ordered) / elapsed, 2),
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+        }
+    return results
+
+
+async def seed(http: httpx.AsyncClient, args, rng: random.Random) -> List[dict]:
+    """Bulk-import clients, collect their ids, then add notes and tracking"""
+    clients = [synthetic_client(rng, i) for i in range(args.clients)]
+    for start in range(0, len(clients), 1000):
+        response = await http.post(
+            "/api/clients/bulk",
+            content=ndjson(clients[start:start + 1000]),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+
+    seeded, cursor = [], None
+    while True:
+        params = {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+        response = await http.get("/api/clients", params=params)
+        response.raise_for_status()
+        seeded.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def add_activity(client_id: str):
+        async with semaphore:
+            for _ in range(args.notes):
+                await http.post(f"/api/clients/{client_id}/notes", params={"note_content": rng.choice(NOTE_PHRASES)})
+            for _ in range(args.tracking):
+                await http.post(f"/api/clients/{client_id}/tracking", params={
+                    "activity_type": rng.choice(ACTIVITY_TYPES),
+                    "description": rng.choice(NOTE_PHRASES),
+                })
+
+    await asyncio.gather(*(add_activity(client["id"]) for client in seeded))
+    return seeded
+
+
+async def scenario_search(http, recorder, rng, clients):
+    words = search_words(rng.choice(clients)) or ["acme"]
+    word = rng.choice(words)
+    session = {"X-Search-Session": f"{rng.getrandbits(64):016x}"}
+    for end in range(2, len(word) + 1):
+        await recorder.request(http, "GET /api/clients?search", "GET", "/api/clients",
+                               params={"search": word[:end], "limit": SEARCH_PAGE}, headers=session)
+
+
+async def scenario_paging(http, recorder, rng, clients):
+    params = {"limit": LIST_PAGE}
+    if rng.random() < 0.3:
+        params["client_type"] = rng.choice(["person", "company"])
+    for _ in range(LIST_PAGES):
+        response = await recorder.request(http, "GET /api/clients", "GET", "/api/clients", params=params)
+        cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+        if not cursor:
+            break
+        params = {**params, "cursor": cursor}
+
+
+async def scenario_detail(http, recorder, rng, clients):
+    client_id = rng.choice(clients)["id"]
+    await recorder.request(http, "GET /api/clients/{id}", "GET", f"/api/clients/{client_id}")
+    await asyncio.gather(
+        recorder.request(http, "GET /api/clients/{id}/notes", "GET", f"/api/clients/{client_id}/notes",
+                         params={"limit": ACTIVITY_PAGE}),
+        recorder.request(http, "GET /api/clients/{id}/tracking", "GET", f"/api/clients/{client_id}/tracking",
+                         params={"limit": ACTIVITY_PAGE}),
+    )
+
+
+async def scenario_note(http, recorder, rng, clients):
+    client_id = rng.choice(clients)["id"]
+    await recorder.request(http, "POST /api/clients/{id}/notes", "POST", f"/api/clients/{client_id}/notes",
+                           params={"note_content": rng.choice(NOTE_PHRASES)})
+
+
+async def scenario_bulk(http, recorder, rng, clients):
+    records = [synthetic_client(rng, rng.randrange(10 ** 9)) for _ in range(BULK_BATCH)]
+    await recorder.request(http, "POST /api/clients/bulk", "POST", "/api/clients/bulk",
+                           content=ndjson(records), headers={"Content-Type": "application/x-ndjson"})
+
+
+SCENARIOS = {
+    "search": scenario_search,
+    "paging": scenario_paging,
+    "detail": scenario_detail,
+    "note": scenario_note,
+    "bulk": scenario_bulk,
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}; expected one of {', '.join(SCENARIOS)}")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+async def run_load(http: httpx.AsyncClient, args, clients: List[dict]) -> Dict[str, dict]:
+    recorder = Recorder()
+    names, weights = zip(*args.mix.items())
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(seed_value: int):
+        rng = random.Random(seed_value)
+        while time.perf_counter() < deadline:
+            await SCENARIOS[rng.choices(names, weights)[0]](http, recorder, rng, clients)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(args.seed * 1000 + n) for n in range(args.concurrency)))
+    return summarize(recorder, time.perf_counter() - start)
+
+
+async def flight_counts(http: httpx.AsyncClient) -> Dict[str, float]:
+    """Coalescing and superseding counters from /api/metrics"""
+    response = await http.get("/api/metrics")
+    if response.status_code != 200:
+        return {}
+    counts = {}
+    for line in response.text.splitlines():
+        if line.startswith(("singleflight_calls_total", "superseded_calls_total")):
+            name, _, value = line.rpartition(" ")
+            counts[name] = float(value)
+    return counts
+
+
+def report_coalescing(before: Dict[str, float], after: Dict[str, float]) -> None:
+    delta = {name: value - before.get(name, 0) for name, value in after.items()}
+    leaders = delta.get('singleflight_calls_total{group="list_clients",role="leader"}', 0)
+    shared = delta.get('singleflight_calls_total{group="list_clients",role="shared"}', 0)
+    superseded = delta.get('superseded_calls_total{group="search_clients"}', 0)
+    if leaders or shared:
+        print(f"\nList cache misses: {leaders + shared:.0f}, queries run: {leaders:.0f}, "
+              f"coalescing ratio: {shared / (leaders + shared):.1%}, superseded searches: {superseded:.0f}")
+
+
+def compare(baseline: Dict[str, dict], results: Dict[str, dict], tolerance: float) -> List[str]:
+    """Print the diff against a baseline; return the regressions"""
+    regressions = []
+    print(f"\n{'endpoint':<34} {'p95 base':>9} {'p95 now':>9} {'p99 base':>9} {'p99 now':>9} {'rps base':>9} {'rps now':>9}")
+    for label, now in results.items():
+        base = baseline.get(label)
+        if base is None:
+            print(f"{label:<34} {'(new)':>9}")
+            continue
+        print(f"{label:<34} {base['p95_ms']:>9.2f} {now['p95_ms']:>9.2f} {base['p99_ms']:>9.2f} "
+              f"{now['p99_ms']:>9.2f} {base['rps']:>9.1f} {now['rps']:>9.1f}")
+        for metric in ("p95_ms", "p99_ms"):
+            if now[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{label}: {metric} {base[metric]:.2f} -> {now[metric]:.2f}")
+        if now["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: rps {base['rps']:.1f} -> {now['rps']:.1f}")
+        error_rate, base_rate = now["errors"] / now["requests"], base["errors"] / base["requests"]
+        if now["errors"] and error_rate > base_rate * (1 + tolerance):
+            regressions.append(f"{label}: error rate {base_rate:.1%} -> {error_rate:.1%}")
+    return regressions
+
+
+async def in_process_client(args):
+    """Point the app at a scratch database and return (http client, cleanup)"""
+    import server
+    from indexes import ensure_indexes
+    from repository import create_client_repository
+
+    if args.mongo_url.startswith("mongomock://"):
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--mongo-url mongomock:// requires the 'mongomock-motor' package")
+        mongo = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(args.mongo_url)
+    await mongo.drop_database(args.database)
+    app = server.create_app()
+    server.db = mongo[args.database]
+    server.repository = create_client_repository(server.db, args.engine)
+    await ensure_indexes(server.db)
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    http = httpx.AsyncClient(transport=transport, base_url="http://load", headers=AUTH_HEADERS, timeout=None)
+
+    async def cleanup():
+        await http.aclose()
+        if not args.keep:
+            await mongo.drop_database(args.database)
+        mongo.close()
+
+    return http, cleanup
+
+
+async def main(args) -> int:
+    rng = random.Random(args.seed)
+    if args.url:
+        http = httpx.AsyncClient(base_url=args.url, headers=AUTH_HEADERS, timeout=30,
+                                 limits=httpx.Limits(max_connections=args.concurrency))
+        cleanup = http.aclose
+    else:
+        http, cleanup = await in_process_client(args)
+
+    try:
+        start = time.perf_counter()
+        if args.no_seed:
+            response = await http.get("/api/clients", params={"limit": 1000})
+            response.raise_for_status()
+            clients = response.json()
+        else:
+            clients = await seed(http, args, rng)
+        if not clients:
+            print("No clients to run against; drop --no-seed", file=sys.stderr)
+            return 1
+        print(f"Seeded {len(clients)} clients in {time.perf_counter() - start:.1f}s; "
+              f"running {args.concurrency} workers for {args.duration}s")
+        before = await flight_counts(http)
+        results = await run_load(http, args, clients)
+        after = await flight_counts(http)
+    finally:
+        await cleanup()
+
+    print(f"\n{'endpoint':<34} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, row in results.items():
+        print(f"{label:<34} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+    report_coalescing(before, after)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        config = {key: getattr(args, key) for key in ("clients", "notes", "tracking", "concurrency", "duration", "seed", "mix")}
+        config["target"] = args.url or ("mongomock" if args.mongo_url.startswith("mongomock://") else "mongod")
+        config["engine"] = None if args.url else args.engine
+        with open(args.save_baseline, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline["results"], results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000, help="Synthetic clients to seed")
+    parser.add_argument("--notes", type=int, default=5, help="Notes seeded per client")
+    parser.add_argument("--tracking", type=int, default=5, help="Tracking entries seeded per client")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent workers")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run the workload")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. search=35,paging=20,detail=30,note=10,bulk=5")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for data and workload")
+    parser.add_argument("--url", help="Drive a live server instead of the in-process app")
+    parser.add_argument("--no-seed", action="store_true", help="Use the clients already on the server")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"),
+                        help="mongod for the in-process app, or mongomock:// for the in-memory stand-in")
+    parser.add_argument("--engine", choices=["motor", "memory"], default="motor",
+                        help="Client storage engine for the in-process app")
+    parser.add_argument("--database", default="client_management_load")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write results as a baseline JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before failing")
+    sys.exit(asyncio.run(main(parser.parse_args())))
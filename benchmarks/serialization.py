@@ -0,0 +1,110 @@
+"""Response serialization cost: response_model path vs FAST_RESPONSES.
+
+Seeds clients with populated quickbooks/documents/credentials sections,
+warms the read-through cache so the database drops out of the timing,
+then requests the same URLs with the fast path off and on through the
+in-process app.  Bodies from both paths are compared before timing.
+
+Usage:
+    python benchmarks/serialization.py [--clients 500] [--iterations 200] [--mongo-url mongomock://]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+import server  # noqa: E402
+from repository import MotorClientRepository  # noqa: E402
+
+AUTH_HEADERS = {"Authorization": "Bearer mock-token"}
+
+
+def rich_client(i: int) -> server.Client:
+    client = server.build_client(server.ClientCreate(
+        type="company",
+        data={
+            "company_name": f"Serialization Bench {i} GmbH",
+            "contact_person": f"Contact {i}",
+            "email": f"office{i}@example.com",
+            "phone": f"+49 30 {i:06d}",
+            "address": f"Hauptstraße {i}, 10115 Berlin",
+            "industry": "Manufacturing",
+        },
+        ownership={"primary_owner": "bench@company.com", "secondary_owners": ["a@company.com", "b@company.com"]},
+    ))
+    client.quickbooks = server.QuickBooksData(customer_id=f"QB-{i}", payment_terms="Net 30", credit_limit=25000.0)
+    client.documents.document_categories = ["contracts", "invoices", "tax", "payroll"]
+    client.documents.access_permissions = ["finance", "sales"]
+    client.credentials.login_portals = [
+        {"name": f"Portal {n}", "url": f"https://portal{n}.example.com", "username": f"user{i}"} for n in range(5)
+    ]
+    return client
+
+
+async def timed(http: httpx.AsyncClient, url: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        response = await http.get(url)
+        response.raise_for_status()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def main(args) -> int:
+    if args.mongo_url.startswith("mongomock://"):
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--mongo-url mongomock:// requires the 'mongomock-motor' package")
+        mongo = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(args.mongo_url)
+    await mongo.drop_database(args.database)
+    app = server.create_app()
+    server.db = mongo[args.database]
+    server.repository = MotorClientRepository(server.db)
+    clients = [rich_client(i) for i in range(args.clients)]
+    await server.repository.insert_many([server.client_document(client) for client in clients])
+
+    urls = {
+        "get_clients limit=50": "/api/clients?limit=50",
+        "get_clients limit=50 expand": "/api/clients?limit=50&expand=quickbooks,documents,credentials",
+        "get_clients limit=500 expand": "/api/clients?limit=500&expand=quickbooks,documents,credentials",
+        "get_client": f"/api/clients/{clients[0].id}",
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as http:
+        bodies = {}
+        for fast in (False, True):
+            server.FAST_RESPONSES = fast
+            for url in urls.values():
+                bodies[url, fast] = json.loads((await http.get(url)).content)
+        for url in urls.values():
+            assert bodies[url, False] == bodies[url, True], f"fast path changed the body of {url}"
+
+        print(f"{'request':<30} {'model us':>10} {'fast us':>10} {'speedup':>8}")
+        for label, url in urls.items():
+            results = {}
+            for fast in (False, True):
+                server.FAST_RESPONSES = fast
+                results[fast] = await timed(http, url, args.iterations)
+            print(f"{label:<30} {results[False]:>10.0f} {results[True]:>10.0f} {results[False] / results[True]:>7.1f}x")
+
+    await mongo.drop_database(args.database)
+    mongo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per URL and mode")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="client_management_bench")
+    sys.exit(asyncio.run(main(parser.parse_args())))
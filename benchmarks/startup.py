@@ -0,0 +1,166 @@
+"""Worker startup cost: import time and time to first request, against budgets.
+
+Every run starts a fresh interpreter, the way an autoscaled worker does:
+
+    import    ``import server`` (no configuration read, nothing connected)
+    app       ``server.create_app()`` after that import
+    ready     from launching ``uvicorn server:app`` until GET /api/health
+              answers, i.e. import, app build and lifespan startup
+
+The medians are checked against --import-budget-ms and --ready-budget-ms;
+the script exits non-zero if either is exceeded.  ``--top`` lists the
+slowest modules from ``python -X importtime``, and the report says which
+optional modules a plain import leaves unloaded.
+
+The ready runs need a database; ``--mongo-url mongomock:// --engine
+memory`` needs none.
+
+Usage:
+    python benchmarks/startup.py [--runs 5]
+    python benchmarks/startup.py --import-budget-ms 1200 --ready-budget-ms 2000
+    python benchmarks/startup.py --mongo-url mongomock:// --engine memory --top 15
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Tuple
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+# Imported on first use rather than by ``import server``
+DEFERRED_MODULES = ["auth", "database", "integrations", "motor", "jose"]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import server
+imported = time.perf_counter()
+loaded = [name for name in {DEFERRED_MODULES!r} if name in sys.modules]
+server.create_app()
+built = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1000, "app_ms": (built - imported) * 1000, "loaded": loaded}}))
+"""
+
+
+def child_env(args) -> Dict[str, str]:
+    env = dict(os.environ)
+    if args.mongo_url:
+        env["MONGO_URL"] = args.mongo_url
+    if args.engine:
+        env["STORAGE_ENGINE"] = args.engine
+    if args.mongo_url and args.mongo_url.startswith("mongomock://"):
+        # mongomock has no change streams
+        env["CHANGE_FEED"] = "local"
+    return env
+
+
+def measure_import(env: Dict[str, str]) -> Dict[str, object]:
+    result = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready(env: Dict[str, str], timeout: float) -> float:
+    """Milliseconds from spawning uvicorn to the first 200 from /api/health"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}:\n{process.stderr.read()}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f"/api/health did not answer within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def slowest_imports(env: Dict[str, str], top: int) -> List[Tuple[int, int, str]]:
+    """(self us, cumulative us, module) for the ``top`` modules with the most cumulative time"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server"], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(own), int(cumulative), name.rstrip()))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def summary(values: List[float]) -> str:
+    return f"{statistics.median(values):>8.1f} {min(values):>8.1f} {max(values):>8.1f}"
+
+
+def main(args) -> int:
+    env = child_env(args)
+    # The first interpreter also writes the bytecode caches; keep it out of the figures
+    measure_import(env)
+    imports = [measure_import(env) for _ in range(args.runs)]
+    ready = [] if args.skip_ready else [measure_ready(env, args.timeout) for _ in range(args.runs)]
+
+    print(f"{'phase':<10} {'median':>8} {'min':>8} {'max':>8}  (ms, {args.runs} runs)")
+    print(f"{'import':<10} {summary([run['import_ms'] for run in imports])}")
+    print(f"{'app':<10} {summary([run['app_ms'] for run in imports])}")
+    if ready:
+        print(f"{'ready':<10} {summary(ready)}")
+    loaded = sorted({name for run in imports for name in run["loaded"]})
+    print(f"\nLeft unloaded by import: {', '.join(name for name in DEFERRED_MODULES if name not in loaded) or 'none'}")
+    if loaded:
+        print(f"Loaded by import: {', '.join(loaded)}")
+
+    if args.top:
+        print(f"\n{'module':<48} {'self ms':>8} {'cum ms':>8}")
+        for own, cumulative, name in slowest_imports(env, args.top):
+            print(f"{name.strip():<48} {own / 1000:>8.1f} {cumulative / 1000:>8.1f}")
+
+    failures = []
+    import_ms = statistics.median(run["import_ms"] for run in imports)
+    if args.import_budget_ms and import_ms > args.import_budget_ms:
+        failures.append(f"import {import_ms:.1f} ms > budget {args.import_budget_ms:.0f} ms")
+    if ready and args.ready_budget_ms and statistics.median(ready) > args.ready_budget_ms:
+        failures.append(f"ready {statistics.median(ready):.1f} ms > budget {args.ready_budget_ms:.0f} ms")
+    if failures:
+        print("\nOver budget:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("\nWithin budget")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--import-budget-ms", type=float, default=1500, help="Median import time allowed (0: no check)")
+    parser.add_argument("--ready-budget-ms", type=float, default=3000,
+                        help="Median time to first request allowed (0: no check)")
+    parser.add_argument("--skip-ready", action="store_true", help="Only measure the import and app build")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for each server to answer")
+    parser.add_argument("--top", type=int, default=0, help="List the N slowest imports")
+    parser.add_argument("--mongo-url", help="MONGO_URL for the servers (default: backend/.env)")
+    parser.add_argument("--engine", choices=["motor", "memory"], help="STORAGE_ENGINE for the servers")
+    sys.exit(main(parser.parse_args()))
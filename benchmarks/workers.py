@@ -0,0 +1,184 @@
+"""List and detail throughput with one serving worker vs several.
+
+For each worker count, starts ``backend/serve.py`` against the same
+database, waits for /api/health, then drives each endpoint for
+--duration seconds with --concurrency connections:
+
+    list      GET /api/clients?limit=50, optionally filtered by type
+    detail    GET /api/clients/{id} for random seeded clients
+
+Requests/sec, p50/p99 and the speedup over the first worker count are
+reported per endpoint.  Clients are seeded once, through the first
+server, and the scratch database is dropped afterwards.
+
+The load comes from --drivers processes (default: one per core) so the
+client side does not saturate before the servers do; for clean figures
+run it on a different machine from the servers' cores, or pin the
+servers with taskset.  Several workers need state they can share (see
+serve.py): a replica set, since they run with CHANGE_FEED=changestream,
+and a cache that is not per process.  The default ``--cache none`` sends
+every read to Mongo; ``--cache redis`` shares one cache at REDIS_URL.
+The memory engine and mongomock:// live inside one process, so with
+those only ``--workers 1`` runs.
+
+Usage:
+    python benchmarks/workers.py [--workers 1,4] [--duration 15] [--concurrency 64]
+    python benchmarks/workers.py --cache redis --mongo-url mongodb://localhost:27017/bench?replicaSet=rs0
+"""
+import argparse
+import asyncio
+import os
+import multiprocessing
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import httpx
+
+from load import AUTH_HEADERS, Recorder, seed, summarize
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+LIST_PATHS = [
+    "/api/clients?limit=50",
+    "/api/clients?limit=50&client_type=person",
+    "/api/clients?limit=50&client_type=company",
+]
+
+
+def start_server(args, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, MONGO_URL=args.mongo_url, SERVE_ACCESS_LOG="false", CACHE_BACKEND=args.cache)
+    if workers > 1:
+        env["CHANGE_FEED"] = "changestream"
+        env.setdefault("STREAM_TICKET_SECRET", "workers-benchmark")
+    # A file rather than a pipe, which would block the server once full
+    log = tempfile.TemporaryFile(mode="w+")
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND, "serve.py"), "--workers", str(workers), "--port", str(args.port)],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=log,
+    )
+    deadline = time.perf_counter() + args.timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise SystemExit(f"serve.py --workers {workers} exited with {process.returncode}:\n{log.read()}")
+        try:
+            if httpx.get(f"{base_url(args)}/api/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    stop_server(process)
+    raise SystemExit(f"serve.py --workers {workers} did not answer within {args.timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    # SIGTERM drains in-flight requests; see serve.py
+    process.terminate()
+    process.wait()
+
+
+def base_url(args) -> str:
+    return f"http://127.0.0.1:{args.port}"
+
+
+async def _drive(url: str, paths: List[str], concurrency: int, duration: float, seed_value: int) -> Recorder:
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, headers=AUTH_HEADERS, timeout=30, limits=limits) as http:
+        async def worker(n: int):
+            rng = random.Random(seed_value * 1000 + n)
+            while time.perf_counter() < deadline:
+                await recorder.request(http, "request", "GET", rng.choice(paths))
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return recorder
+
+
+def drive(url: str, paths: List[str], concurrency: int, duration: float, seed_value: int) -> Tuple[List[float], int]:
+    """One driver process: (latencies in ms, errors)"""
+    recorder = asyncio.run(_drive(url, paths, concurrency, duration, seed_value))
+    return recorder.latencies["request"], recorder.errors["request"]
+
+
+def run_endpoint(args, pool: ProcessPoolExecutor, label: str, paths: List[str]) -> Dict[str, float]:
+    per_driver = max(1, args.concurrency // args.drivers)
+    start = time.perf_counter()
+    futures = [pool.submit(drive, base_url(args), paths, per_driver, args.duration, args.seed + n)
+               for n in range(args.drivers)]
+    recorder = Recorder()
+    for future in futures:
+        latencies, errors = future.result()
+        recorder.latencies[label].extend(latencies)
+        recorder.errors[label] += errors
+    return summarize(recorder, time.perf_counter() - start)[label]
+
+
+async def seed_clients(args) -> List[str]:
+    async with httpx.AsyncClient(base_url=base_url(args), headers=AUTH_HEADERS, timeout=60) as http:
+        return [client["id"] for client in await seed(http, args, random.Random(args.seed))]
+
+
+def drop_database(args) -> None:
+    if args.mongo_url.startswith("mongomock://"):
+        return  # Went away with the server
+    from pymongo import MongoClient
+
+    client = MongoClient(args.mongo_url)
+    client.drop_database(client.get_default_database().name)
+    client.close()
+
+
+def main(args) -> int:
+    counts = [int(value) for value in args.workers.split(",")]
+    results: Dict[Tuple[int, str], Dict[str, float]] = {}
+    try:
+        with ProcessPoolExecutor(max_workers=args.drivers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for index, workers in enumerate(counts):
+                server = start_server(args, workers)
+                try:
+                    if index == 0:
+                        ids = asyncio.run(seed_clients(args))
+                        print(f"Seeded {len(ids)} clients; {args.drivers} driver process(es), "
+                              f"{args.concurrency} connections, {args.duration:.0f}s per endpoint")
+                    endpoints = {"list": LIST_PATHS, "detail": [f"/api/clients/{client_id}" for client_id in ids]}
+                    for label, paths in endpoints.items():
+                        results[workers, label] = run_endpoint(args, pool, label, paths)
+                finally:
+                    stop_server(server)
+    finally:
+        if not args.keep:
+            drop_database(args)
+
+    print(f"\n{'workers':>7} {'endpoint':<8} {'requests':>8} {'errors':>6} {'rps':>9} {'p50 ms':>8} {'p99 ms':>8} {'speedup':>8}")
+    for (workers, label), row in results.items():
+        speedup = row["rps"] / results[counts[0], label]["rps"] if results[counts[0], label]["rps"] else 0
+        print(f"{workers:>7} {label:<8} {row['requests']:>8} {row['errors']:>6} {row['rps']:>9.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {speedup:>7.2f}x")
+    return 1 if any(row["errors"] for row in results.values()) else 0
+
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{cores}", help="Comma-separated worker counts to compare")
+    parser.add_argument("--clients", type=int, default=2000, help="Synthetic clients to seed")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds to drive each endpoint")
+    parser.add_argument("--concurrency", type=int, default=64, help="Connections across all drivers")
+    parser.add_argument("--drivers", type=int, default=cores, help="Load-generating processes")
+    parser.add_argument("--cache", choices=["none", "redis", "memory"], default="none",
+                        help="CACHE_BACKEND for the servers; memory only works with --workers 1")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017/client_management_workers",
+                        help="Scratch database for the servers; its path names the database")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for a server to start")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+    # load.seed() also adds notes and tracking entries; detail reads do not need them
+    args.notes = args.tracking = 0
+    sys.exit(main(args))
@@ -0,0 +1,133 @@
+"""Database round trips and latency per write request.
+
+Drives the write endpoints through the ASGI app in-process, against a
+scratch database on a real mongod, with a pymongo CommandListener counting
+every command the handlers issue.
+
+Usage:
+    python benchmarks/write_roundtrips.py [--requests 200] [--mongo-url mongodb://localhost:27017]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+import server  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from repository import MotorClientRepository  # noqa: E402
+
+AUTH_HEADERS = {"Authorization": "Bearer mock-token"}
+
+# Driver housekeeping that is not issued by the handlers
+IGNORED_COMMANDS = {"hello", "isMaster", "ismaster", "ping", "endSessions", "saslStart", "saslContinue"}
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.commands.clear()
+
+
+def client_payload(i: int) -> dict:
+    return {
+        "type": "person",
+        "data": {
+            "first_name": f"Bench{i}",
+            "last_name": "Client",
+            "email": f"bench{i}@example.com",
+            "phone": f"+1-555-{i:04d}",
+        },
+        "ownership": {"primary_owner": "bench@company.com", "department": "Sales"},
+    }
+
+
+async def measure(http, counter, name, requests):
+    counter.reset()
+    latencies = []
+    for method, url, kwargs in requests:
+        start = time.perf_counter()
+        response = await http.request(method, url, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    total = sum(counter.commands.values())
+    latencies.sort()
+    return {
+        "endpoint": name,
+        "round_trips": total / len(requests),
+        "commands": dict(counter.commands),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "mean_ms": statistics.fmean(latencies),
+    }
+
+
+async def main(args) -> int:
+    counter = CommandCounter()
+    mongo = AsyncIOMotorClient(args.mongo_url, event_listeners=[counter])
+    await mongo.drop_database(args.database)
+    app = server.create_app()
+    server.db = mongo[args.database]
+    # Round trips are counted at the driver, so clients stay on Mongo
+    server.repository = MotorClientRepository(server.db)
+    await ensure_indexes(server.db)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as http:
+        ids = []
+        for i in range(args.requests):
+            response = await http.post("/api/clients", json=client_payload(i))
+            ids.append(response.json()["id"])
+
+        results = [
+            await measure(http, counter, "PUT /api/clients/{id}", [
+                ("PUT", f"/api/clients/{cid}", {"json": {"data": {**client_payload(i)["data"], "phone": "+1-555-9999"}}})
+                for i, cid in enumerate(ids)
+            ]),
+            await measure(http, counter, "POST /api/clients/{id}/notes", [
+                ("POST", f"/api/clients/{cid}/notes", {"params": {"note_content": "Followed up on renewal terms"}})
+                for cid in ids
+            ]),
+            await measure(http, counter, "POST /api/clients/{id}/tracking", [
+                ("POST", f"/api/clients/{cid}/tracking", {"params": {"activity_type": "call", "description": "Check-in"}})
+                for cid in ids
+            ]),
+        ]
+
+    await mongo.drop_database(args.database)
+    mongo.close()
+
+    print(f"{'endpoint':<34} {'trips/req':>9} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}  commands")
+    for row in results:
+        print(
+            f"{row['endpoint']:<34} {row['round_trips']:>9.2f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['mean_ms']:>8.2f}  {row['commands']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Writes per endpoint")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="client_management_bench")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { BrowserRouter as Router, Routes, Route, Navigate } from 'react-router-dom';
 import { Toaster } from 'react-hot-toast';
 import './App.css';
@@ -19,6 +19,8 @@ function App() {
   const [clients, setClients] = useState([]);
   const [filteredClients, setFilteredClients] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [selectedClientType, setSelectedClientType] = useState('all');
   const [isAuthenticated, setIsAuthenticated] = useState(false);
@@ -49,16 +51,70 @@ function App() {
   const loadClients = useCallback(async () => {
     try {
       setLoading(true);
-      const clientsData = await clientService.getClients(searchTerm, selectedClientType);
-      setClients(clientsData);
-      setFilteredClients(clientsData);
+      const page = await clientService.getClients(searchTerm, selectedClientType);
+      setClients(page.clients);
+      setFilteredClients(page.clients);
+      setNextCursor(page.nextCursor);
     } catch (error) {
-      console.error('Failed to load clients:', error);
+      // 409: a newer search from this user replaced the request
+      if (error.response?.status !== 409) {
+        console.error('Failed to load clients:', error);
+      }
     } finally {
       setLoading(false);
     }
   }, [searchTerm, selectedClientType]);
 
+  // Load the next page using the cursor from the previous response
+  const loadMoreClients = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await clientService.getClients(searchTerm, selectedClientType, 50, nextCursor);
+      setClients(prev => [...prev, ...page.clients]);
+      setFilteredClients(prev => [...prev, ...page.clients]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Failed to load more clients:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [searchTerm, selectedClientType, nextCursor, loadingMore]);
+
+  // Read by the change stream handler without reconnecting on every keystroke
+  const latest = useRef({});
+  latest.current = { searchTerm, loadClients };
+
+  // Apply other users' changes as they happen instead of refetching the list
+  useEffect(() => {
+    if (!isAuthenticated) return undefined;
+    
+    return clientService.subscribeToChanges((event) => {
+      const { searchTerm, loadClients } = latest.current;
+      const applyDelta = (list) => {
+        switch (event.type) {
+          case 'insert':
+            // Search results are ranked server-side, so only plain lists take inserts
+            if (searchTerm || list.some(client => client.id === event.client_id)) return list;
+            return [event.client, ...list];
+          case 'update':
+            return list.map(client => client.id === event.client_id ? { ...client, ...event.client } : client);
+          case 'delete':
+            return list.filter(client => client.id !== event.client_id);
+          default:
+            return list;
+        }
+      };
+      
+      if (event.type === 'reset') {
+        loadClients();
+        return;
+      }
+      setClients(applyDelta);
+      setFilteredClients(applyDelta);
+    }, selectedClientType);
+  }, [isAuthenticated, selectedClientType]);
+
   // Handle real-time search
   useEffect(() => {
     if (isAuthenticated) {
@@ -90,14 +146,17 @@ function App() {
       setUser(null);
       setClients([]);
       setFilteredClients([]);
+      setNextCursor(null);
     } catch (error) {
       console.error('Logout failed:', error);
     }
   };
 
   const handleClientCreated = (newClient) => {
-    setClients(prev => [newClient, ...prev]);
-    setFilteredClients(prev => [newClient, ...prev]);
+    // The change stream may have delivered it already
+    const prepend = (prev) => prev.some(client => client.id === newClient.id) ? prev : [newClient, ...prev];
+    setClients(prepend);
+    setFilteredClients(prepend);
   };
 
   const handleClientUpdated = (updatedClient) => {
@@ -154,6 +213,9 @@ function App() {
                   <ClientList 
                     clients={filteredClients}
                     loading={loading}
+                    hasMore={Boolean(nextCursor)}
+                    loadingMore={loadingMore}
+                    onLoadMore={loadMoreClients}
                     onClientDeleted={handleClientDeleted}
                     searchTerm={searchTerm}
                     selectedClientType={selectedClientType}
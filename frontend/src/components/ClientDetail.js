@@ -29,9 +29,15 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
   const [editData, setEditData] = useState({});
   const [newNote, setNewNote] = useState('');
   const [newTracking, setNewTracking] = useState({ activity_type: '', description: '', outcome: '' });
+  const [notes, setNotes] = useState([]);
+  const [notesCursor, setNotesCursor] = useState(null);
+  const [tracking, setTracking] = useState([]);
+  const [trackingCursor, setTrackingCursor] = useState(null);
 
   useEffect(() => {
     loadClient();
+    loadNotes();
+    loadTracking();
   }, [id]);
 
   const loadClient = async () => {
@@ -49,6 +55,27 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
     }
   };
 
+  // Notes and tracking are paged separately from the client record
+  const loadNotes = async (cursor = null) => {
+    try {
+      const page = await clientService.getNotes(id, cursor);
+      setNotes(prev => cursor ? [...prev, ...page.items] : page.items);
+      setNotesCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Load notes error:', error);
+    }
+  };
+
+  const loadTracking = async (cursor = null) => {
+    try {
+      const page = await clientService.getTrackingEntries(id, cursor);
+      setTracking(prev => cursor ? [...prev, ...page.items] : page.items);
+      setTrackingCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Load tracking error:', error);
+    }
+  };
+
   const handleSave = async () => {
     try {
       const updatedClient = await clientService.updateClient(id, {
@@ -64,7 +91,13 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
       onClientUpdated(updatedClient);
       toast.success('Client updated successfully');
     } catch (error) {
-      toast.error('Failed to update client');
+      if (error.response?.status === 412) {
+        toast.error('This client was changed by someone else. Loaded the latest version.');
+        setIsEditing(false);
+        loadClient();
+      } else {
+        toast.error('Failed to update client');
+      }
       console.error('Update error:', error);
     }
   };
@@ -92,9 +125,9 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
     if (!newNote.trim()) return;
     
     try {
-      await clientService.addNote(id, newNote);
+      const note = await clientService.addNote(id, newNote);
       setNewNote('');
-      loadClient(); // Reload to get updated notes
+      setNotes(prev => [note, ...prev]);
       toast.success('Note added successfully');
     } catch (error) {
       toast.error('Failed to add note');
@@ -107,14 +140,14 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
     if (!newTracking.activity_type || !newTracking.description) return;
     
     try {
-      await clientService.addTrackingEntry(
+      const entry = await clientService.addTrackingEntry(
         id, 
         newTracking.activity_type, 
         newTracking.description, 
         newTracking.outcome || null
       );
       setNewTracking({ activity_type: '', description: '', outcome: '' });
-      loadClient(); // Reload to get updated tracking
+      setTracking(prev => [entry, ...prev]);
       toast.success('Tracking entry added successfully');
     } catch (error) {
       toast.error('Failed to add tracking entry');
@@ -269,14 +302,14 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
                   <Icon className="h-4 w-4 mr-2" />
                   {tab.label}
                   {/* Show counts for notes and tracking */}
-                  {tab.id === 'notes' && client.notes?.length > 0 && (
+                  {tab.id === 'notes' && notes.length > 0 && (
                     <span className="ml-2 px-2 py-0.5 text-xs bg-gray-100 text-gray-600 rounded-full">
-                      {client.notes.length}
+                      {notes.length}{notesCursor ? '+' : ''}
                     </span>
                   )}
-                  {tab.id === 'tracking' && client.tracking?.length > 0 && (
+                  {tab.id === 'tracking' && tracking.length > 0 && (
                     <span className="ml-2 px-2 py-0.5 text-xs bg-gray-100 text-gray-600 rounded-full">
-                      {client.tracking.length}
+                      {tracking.length}{trackingCursor ? '+' : ''}
                     </span>
                   )}
                 </button>
@@ -651,8 +684,8 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
               
               {/* Notes List */}
               <div className="space-y-4">
-                {client.notes && client.notes.length > 0 ? (
-                  client.notes.map((note) => (
+                {notes.length > 0 ? (
+                  notes.map((note) => (
                     <div key={note.id} className="bg-white border border-gray-200 rounded-lg p-4">
                       <div className="flex items-start justify-between mb-2">
                         <div className="flex items-center space-x-2">
@@ -678,6 +711,14 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
                     <p className="text-gray-500">No notes yet. Add your first note above.</p>
                   </div>
                 )}
+                {notesCursor && (
+                  <button
+                    onClick={() => loadNotes(notesCursor)}
+                    className="w-full py-2 text-sm text-primary-600 hover:text-primary-700"
+                  >
+                    Load older notes
+                  </button>
+                )}
               </div>
             </div>
           )}
@@ -741,8 +782,8 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
               
               {/* Tracking List */}
               <div className="space-y-4">
-                {client.tracking && client.tracking.length > 0 ? (
-                  client.tracking.map((entry) => (
+                {tracking.length > 0 ? (
+                  tracking.map((entry) => (
                     <div key={entry.id} className="bg-white border border-gray-200 rounded-lg p-4">
                       <div className="flex items-start justify-between mb-2">
                         <div className="flex items-center space-x-3">
@@ -773,6 +814,14 @@ const ClientDetail = ({ onClientUpdated, onClientDeleted }) => {
                     <p className="text-gray-500">No activities tracked yet. Add your first activity above.</p>
                   </div>
                 )}
+                {trackingCursor && (
+                  <button
+                    onClick={() => loadTracking(trackingCursor)}
+                    className="w-full py-2 text-sm text-primary-600 hover:text-primary-700"
+                  >
+                    Load older activities
+                  </button>
+                )}
               </div>
             </div>
           )}
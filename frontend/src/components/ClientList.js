@@ -4,7 +4,7 @@ import { MoreHorizontal, Plus, Filter, RotateCcw, Eye, Trash2 } from 'lucide-rea
 import { toast } from 'react-hot-toast';
 import { clientService } from '../services/clientService';
 
-const ClientList = ({ clients, loading, onClientDeleted, searchTerm, selectedClientType }) => {
+const ClientList = ({ clients, loading, hasMore, loadingMore, onLoadMore, onClientDeleted, searchTerm, selectedClientType }) => {
   const [selectedClients, setSelectedClients] = useState([]);
   const [activeTab, setActiveTab] = useState('active');
 
@@ -257,10 +257,17 @@ const ClientList = ({ clients, loading, onClientDeleted, searchTerm, selectedCli
       {filteredClients.length > 0 && (
         <div className="flex items-center justify-between px-6 py-4 border-t border-canopy-border">
           <div className="flex items-center space-x-2">
-            <button className="px-3 py-1 text-sm text-canopy-textMuted hover:text-canopy-text">←</button>
-            <button className="px-3 py-1 text-sm bg-canopy-blue text-white rounded">1</button>
-            <button className="px-3 py-1 text-sm text-canopy-textMuted hover:text-canopy-text">2</button>
-            <button className="px-3 py-1 text-sm text-canopy-textMuted hover:text-canopy-text">→</button>
+            {hasMore ? (
+              <button
+                onClick={onLoadMore}
+                disabled={loadingMore}
+                className="canopy-btn-secondary text-sm"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            ) : (
+              <span className="text-sm text-canopy-textMuted">All clients loaded</span>
+            )}
           </div>
           
           <div className="flex items-center space-x-2">
@@ -1,6 +1,7 @@
-import React from 'react';
-import { Link, useLocation } from 'react-router-dom';
+import React, { useState, useEffect } from 'react';
+import { Link, useLocation, useNavigate } from 'react-router-dom';
 import { Search, Plus, LogOut, User, MoreHorizontal } from 'lucide-react';
+import { clientService } from '../services/clientService';
 
 const Header = ({ 
   user, 
@@ -11,7 +12,39 @@ const Header = ({
   onClientTypeChange 
 }) => {
   const location = useLocation();
+  const navigate = useNavigate();
   const isHomePage = location.pathname === '/';
+  const [suggestions, setSuggestions] = useState([]);
+  const [showSuggestions, setShowSuggestions] = useState(false);
+
+  // Typeahead from the lightweight suggest endpoint; the list itself still
+  // refreshes through the full search in App.js
+  useEffect(() => {
+    const query = searchTerm.trim();
+    if (!query) {
+      setSuggestions([]);
+      return undefined;
+    }
+    
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const results = await clientService.suggestClients(query, selectedClientType);
+        if (!cancelled) setSuggestions(results);
+      } catch (error) {
+        if (!cancelled) setSuggestions([]);
+      }
+    }, 100);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm, selectedClientType]);
+
+  const openSuggestion = (clientId) => {
+    setShowSuggestions(false);
+    navigate(`/client/${clientId}`);
+  };
 
   return (
     <div className="canopy-header">
@@ -32,9 +65,29 @@ const Header = ({
                     type="text"
                     placeholder="Search clients"
                     value={searchTerm}
-                    onChange={(e) => onSearchChange(e.target.value)}
+                    onChange={(e) => {
+                      onSearchChange(e.target.value);
+                      setShowSuggestions(true);
+                    }}
+                    onFocus={() => setShowSuggestions(true)}
+                    onBlur={() => setShowSuggestions(false)}
                     className="canopy-search-input pl-10 w-80"
                   />
+                  {showSuggestions && suggestions.length > 0 && (
+                    <ul className="absolute z-10 mt-1 w-80 bg-white border border-gray-200 rounded-lg shadow-lg">
+                      {suggestions.map((suggestion) => (
+                        <li
+                          key={suggestion.id}
+                          // mousedown fires before the input's blur hides the list
+                          onMouseDown={() => openSuggestion(suggestion.id)}
+                          className="px-4 py-2 flex items-center justify-between cursor-pointer hover:bg-gray-50"
+                        >
+                          <span className="text-sm">{suggestion.name}</span>
+                          <span className="text-xs text-canopy-textMuted capitalize">{suggestion.type}</span>
+                        </li>
+                      ))}
+                    </ul>
+                  )}
                 </div>
               </div>
             )}
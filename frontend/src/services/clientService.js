@@ -20,12 +20,23 @@ apiClient.interceptors.request.use((config) => {
   return config;
 });
 
+// Identifies this tab's search box, so the server can cancel its stale
+// searches (HTTP 409) without touching other tabs or users on the same account
+const SEARCH_SESSION = (window.crypto && window.crypto.randomUUID)
+  ? window.crypto.randomUUID()
+  : Math.random().toString(36).slice(2);
+
 class ClientService {
-  async getClients(search = '', clientType = 'all', limit = 50, skip = 0) {
+  constructor() {
+    // Last ETag seen per client, sent as If-Match so updates never overwrite
+    // changes made by someone else in the meantime
+    this.etags = {};
+  }
+
+  async getClients(search = '', clientType = 'all', limit = 50, cursor = null) {
     try {
       const params = new URLSearchParams({
         limit: limit.toString(),
-        skip: skip.toString(),
       });
       
       if (search) {
@@ -36,17 +47,44 @@ class ClientService {
         params.append('client_type', clientType);
       }
       
-      const response = await apiClient.get(`/api/clients?${params}`);
-      return response.data;
+      if (cursor) {
+        params.append('cursor', cursor);
+      }
+      
+      const headers = search ? { 'X-Search-Session': SEARCH_SESSION } : {};
+      const response = await apiClient.get(`/api/clients?${params}`, { headers });
+      return {
+        clients: response.data,
+        nextCursor: response.headers['x-next-cursor'] || null,
+      };
     } catch (error) {
       console.error('Failed to fetch clients:', error);
       throw error;
     }
   }
 
+  // Typeahead matches for the search box: [{ id, name, type }]
+  async suggestClients(query, clientType = 'all', limit = 8) {
+    try {
+      const params = new URLSearchParams({ q: query, limit: limit.toString() });
+      if (clientType && clientType !== 'all') {
+        params.append('client_type', clientType);
+      }
+      
+      const response = await apiClient.get(`/api/clients/suggest?${params}`);
+      return response.data;
+    } catch (error) {
+      console.error('Failed to fetch suggestions:', error);
+      throw error;
+    }
+  }
+
   async getClient(clientId) {
     try {
       const response = await apiClient.get(`/api/clients/${clientId}`);
+      if (response.headers.etag) {
+        this.etags[clientId] = response.headers.etag;
+      }
       return response.data;
     } catch (error) {
       console.error('Failed to fetch client:', error);
@@ -66,7 +104,13 @@ class ClientService {
 
   async updateClient(clientId, updateData) {
     try {
-      const response = await apiClient.put(`/api/clients/${clientId}`, updateData);
+      const etag = this.etags[clientId];
+      const response = await apiClient.put(`/api/clients/${clientId}`, updateData, {
+        headers: etag ? { 'If-Match': etag } : {},
+      });
+      if (response.headers.etag) {
+        this.etags[clientId] = response.headers.etag;
+      }
       return response.data;
     } catch (error) {
       console.error('Failed to update client:', error);
@@ -77,6 +121,7 @@ class ClientService {
   async deleteClient(clientId) {
     try {
       const response = await apiClient.delete(`/api/clients/${clientId}`);
+      delete this.etags[clientId];
       return response.data;
     } catch (error) {
       console.error('Failed to delete client:', error);
@@ -112,6 +157,86 @@ class ClientService {
     }
   }
 
+  async getNotes(clientId, cursor = null, limit = 50) {
+    try {
+      const response = await apiClient.get(`/api/clients/${clientId}/notes`, {
+        params: { limit, cursor: cursor || undefined }
+      });
+      return {
+        items: response.data,
+        nextCursor: response.headers['x-next-cursor'] || null,
+      };
+    } catch (error) {
+      console.error('Failed to fetch notes:', error);
+      throw error;
+    }
+  }
+
+  async getTrackingEntries(clientId, cursor = null, limit = 50) {
+    try {
+      const response = await apiClient.get(`/api/clients/${clientId}/tracking`, {
+        params: { limit, cursor: cursor || undefined }
+      });
+      return {
+        items: response.data,
+        nextCursor: response.headers['x-next-cursor'] || null,
+      };
+    } catch (error) {
+      console.error('Failed to fetch tracking entries:', error);
+      throw error;
+    }
+  }
+
+  // Server-sent change events; returns a function that closes the stream.
+  // EventSource cannot send the bearer token, so the stream opens with a
+  // short-lived ticket. While the ticket is valid EventSource reconnects on
+  // its own; once it is rejected a new ticket reopens from the last event id.
+  subscribeToChanges(onEvent, clientType = 'all') {
+    let source = null;
+    let closed = false;
+    let lastEventId = null;
+    
+    const open = async () => {
+      let ticket;
+      try {
+        ticket = (await apiClient.post('/api/clients/stream/ticket')).data.ticket;
+      } catch (error) {
+        console.error('Failed to get a change stream ticket:', error);
+        if (!closed) setTimeout(open, 5000);
+        return;
+      }
+      if (closed) return;
+      
+      const params = new URLSearchParams({ ticket });
+      if (clientType && clientType !== 'all') {
+        params.append('client_type', clientType);
+      }
+      if (lastEventId) {
+        params.append('last_event_id', lastEventId);
+      }
+      source = new EventSource(`${API_BASE_URL}/api/clients/stream?${params}`);
+      ['insert', 'update', 'delete', 'note', 'tracking', 'reset'].forEach((type) => {
+        source.addEventListener(type, (message) => {
+          if (message.lastEventId) lastEventId = message.lastEventId;
+          onEvent(JSON.parse(message.data));
+        });
+      });
+      source.onerror = () => {
+        // A rejected ticket closes the EventSource rather than retrying
+        if (source && source.readyState === EventSource.CLOSED && !closed) {
+          source = null;
+          setTimeout(open, 1000);
+        }
+      };
+    };
+    
+    open();
+    return () => {
+      closed = true;
+      if (source) source.close();
+    };
+  }
+
   async getSharePointUrl(clientId) {
     try {
       const response = await apiClient.get(`/api/clients/${clientId}/sharepoint-url`);